@@ -0,0 +1,18 @@
+import os
+
+# 本地数据目录，保存传输调优结果、上传清单、缓存等
+APP_DIR = os.path.join(os.path.expanduser("~"), ".xgboost_npu")
+
+
+def get_app_path(*parts):
+    """返回本地数据目录下的路径，并确保其所在目录存在"""
+    path = os.path.join(APP_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def get_app_dir(*parts):
+    """返回本地数据目录下的子目录，不存在时创建"""
+    path = os.path.join(APP_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
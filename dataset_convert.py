@@ -0,0 +1,339 @@
+import json
+import os
+import struct
+import time
+import numpy as np
+import pandas as pd
+from app_paths import get_app_dir
+from dataset_validator import iter_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import xgboost as xgb
+except ImportError:
+    xgb = None
+
+CLASSIFICATION_TASKS = ["二分类", "多分类"]
+INTEGER_TYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32, np.int64]
+
+
+def available_formats():
+    """本地可用的转换格式"""
+    formats = []
+    if pa is not None:
+        formats += ['parquet', 'feather']
+    formats.append('npy')
+    if xgb is not None:
+        formats.append('dmatrix')
+    return formats
+
+
+class NpyStreamWriter:
+    """流式写入.npy文件：先预留固定长度的表头，关闭时回填实际行数"""
+    HEADER_SIZE = 128
+
+    def __init__(self, path, dtype, columns=None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.columns = columns
+        self.rows = 0
+        self._file = open(path, 'wb')
+        self._file.write(b'\x00' * self.HEADER_SIZE)
+
+    def write(self, array):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        self._file.write(array.tobytes())
+        self.rows += len(array)
+
+    def close(self):
+        shape = (self.rows, self.columns) if self.columns is not None else (self.rows,)
+        header = repr({'descr': np.lib.format.dtype_to_descr(self.dtype),
+                       'fortran_order': False, 'shape': shape})
+        magic = np.lib.format.magic(1, 0)
+        header_length = self.HEADER_SIZE - len(magic) - 2
+        self._file.seek(0)
+        self._file.write(magic + struct.pack('<H', header_length)
+                         + header.encode('latin1').ljust(header_length - 1) + b'\n')
+        self._file.close()
+
+
+def smallest_integer_type(minimum, maximum):
+    """能容纳 [minimum, maximum] 的最窄整数类型"""
+    for dtype in INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= minimum and maximum <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class DtypePlanner:
+    """按块统计各特征列的取值范围，确定全文件通用的最窄安全类型
+
+    整数值且无缺失的列降为最窄整数，其余数值列为float32（XGBoost内部即以float32存储），
+    取值不超过 max_categories 个的字符串列按字典编码为整数，缺失值编码为-1。
+    """
+    def __init__(self, max_categories=1024):
+        self.max_categories = max_categories
+        self.stats = {}
+
+    def update(self, chunk):
+        for column, values in chunk.items():
+            stats = self.stats.setdefault(str(column), {
+                "numeric": True, "integer": True, "min": None, "max": None, "categories": set()})
+            # 数值列也记录取值，以便后续块出现字符串时整列仍可按字典编码
+            if stats["categories"] is not None:
+                stats["categories"].update(values.dropna().astype("string").unique())
+                if len(stats["categories"]) > self.max_categories:
+                    stats["categories"] = None
+            if stats["numeric"] and (pd.api.types.is_numeric_dtype(values.dtype)
+                                     or pd.api.types.is_bool_dtype(values.dtype)):
+                array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                finite = array[np.isfinite(array)]
+                if len(finite) != len(array) or np.any(np.mod(finite, 1) != 0):
+                    stats["integer"] = False
+                if len(finite):
+                    low, high = finite.min(), finite.max()
+                    stats["min"] = low if stats["min"] is None else min(stats["min"], low)
+                    stats["max"] = high if stats["max"] is None else max(stats["max"], high)
+            else:
+                stats["numeric"] = False
+
+    def plan(self):
+        """返回 {列名: ('int'|'float', dtype) 或 ('category', 取值列表)}"""
+        plan = {}
+        for column, stats in self.stats.items():
+            if not stats["numeric"]:
+                if stats["categories"] is None:
+                    raise Exception(f"特征列 {column} 不是数值类型，且取值超过 {self.max_categories} 个，无法编码")
+                plan[column] = ("category", sorted(stats["categories"]))
+            elif stats["integer"] and stats["min"] is not None:
+                plan[column] = ("int", smallest_integer_type(stats["min"], stats["max"]))
+            else:
+                plan[column] = ("float", np.dtype(np.float32))
+        return plan
+
+
+def apply_plan(features, plan):
+    """按类型计划转换一个数据块的特征列"""
+    columns = {}
+    for column, values in features.items():
+        kind, spec = plan[str(column)]
+        if kind == "category":
+            codes = pd.Categorical(values.astype("string"), categories=spec).codes
+            columns[column] = codes.astype(smallest_integer_type(-1, len(spec) - 1))
+        else:
+            columns[column] = values.to_numpy(dtype=spec, na_value=np.nan) if kind == "float" \
+                else values.to_numpy().astype(spec)
+    return pd.DataFrame(columns, index=features.index)
+
+
+class DatasetConverter:
+    """按块将数据文件转换为紧凑的二进制格式
+
+    特征列默认统一为float32，分类任务的标签为int32、回归任务为float32；
+    开启 downcast 时先扫描一遍确定各列最窄类型并对低基数字符串列做字典编码。
+    转换结果旁生成 <文件名>.manifest.json 记录格式、列和类型。
+    """
+    def __init__(self, file_path, label_column, output_format, task_type=None, chunksize=100000,
+                 downcast=False, control=None):
+        self.file_path = file_path
+        self.label_column = label_column
+        self.output_format = output_format
+        self.task_type = task_type
+        self.chunksize = chunksize
+        self.downcast = downcast
+        self.control = control
+        self.stem = os.path.splitext(os.path.basename(file_path))[0]
+        self.output_dir = get_app_dir("converted", self.stem)
+        self.feature_columns = None
+        self.plan = None
+        self.rows = 0
+        self.memory_before = 0
+        self.memory_after = 0
+
+    @property
+    def label_dtype(self):
+        return np.int32 if self.task_type in CLASSIFICATION_TASKS else np.float32
+
+    def output_path(self, suffix):
+        return os.path.join(self.output_dir, f"{self.stem}{suffix}")
+
+    def prepare_chunk(self, chunk):
+        """拆分特征和标签，并转换为目标类型"""
+        if self.label_column not in chunk.columns:
+            raise Exception(f"标签列不存在: {self.label_column}")
+        features = chunk.drop(columns=[self.label_column])
+        if self.feature_columns is None:
+            self.feature_columns = [str(column) for column in features.columns]
+        if self.plan is not None:
+            X = apply_plan(features, self.plan)
+        else:
+            non_numeric = [str(column) for column, dtype in features.dtypes.items()
+                           if not (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype))]
+            if non_numeric:
+                raise Exception(f"以下特征列不是数值类型，无法转换为float32: {', '.join(non_numeric[:10])}")
+            X = features.astype(np.float32)
+        label = chunk[self.label_column]
+        if not pd.api.types.is_numeric_dtype(label.dtype):
+            raise Exception(f"标签列 {self.label_column} 不是数值类型")
+        if self.label_dtype is np.int32:
+            if label.isna().any() or not np.all(np.mod(label.to_numpy(dtype=np.float64), 1) == 0):
+                raise Exception(f"分类任务的标签列 {self.label_column} 必须是整数且不能为空")
+        y = label.to_numpy(dtype=self.label_dtype)
+        return X, y
+
+    def build_plan(self, progress_callback=None):
+        """第一遍扫描：统计特征列取值，确定类型计划"""
+        planner = DtypePlanner()
+        rows = 0
+        # 与数据校验一样跳过字段数不符的行，两遍扫描读到的行相同
+        for chunk in iter_chunks(self.file_path, self.chunksize, bad_lines=[]):
+            if self.control:
+                self.control.checkpoint()
+            planner.update(chunk.drop(columns=[self.label_column], errors='ignore'))
+            rows += len(chunk)
+            if progress_callback:
+                progress_callback("分析", rows)
+        self.plan = planner.plan()
+        return self.plan
+
+    def iter_prepared(self, progress_callback=None):
+        """逐块产出 (特征DataFrame, 标签数组)，同时累计转换前后的内存占用"""
+        for chunk in iter_chunks(self.file_path, self.chunksize, bad_lines=[]):
+            if self.control:
+                self.control.checkpoint()
+            # 只有表头或各行均被跳过时为空块，其列类型无法判断
+            if chunk.empty:
+                continue
+            self.memory_before += int(chunk.memory_usage(deep=True, index=False).sum())
+            X, y = self.prepare_chunk(chunk)
+            self.memory_after += int(X.memory_usage(deep=True, index=False).sum()) + y.nbytes
+            self.rows += len(y)
+            yield X, y
+            if progress_callback:
+                progress_callback("转换", self.rows)
+        # 没有数据时各格式都无法写出有效文件（npy特征矩阵的列数也无从确定）
+        if not self.rows:
+            raise Exception("数据文件中没有可转换的数据行")
+
+    def convert(self, progress_callback=None):
+        """执行转换，返回需要上传的本地文件列表（数据文件和清单）"""
+        self.rows = 0
+        self.memory_before = 0
+        self.memory_after = 0
+        writer = getattr(self, f"_convert_{self.output_format}", None)
+        if writer is None or self.output_format not in available_formats():
+            raise Exception(f"不支持的转换格式: {self.output_format}")
+        if self.downcast:
+            self.build_plan(progress_callback)
+        files = writer(progress_callback)
+        manifest_path = self.output_path(".manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.build_manifest(files), f, ensure_ascii=False, indent=2)
+        return files + [manifest_path]
+
+    def build_manifest(self, files):
+        manifest = {
+            "source": os.path.basename(self.file_path),
+            "format": self.output_format,
+            "files": [os.path.basename(path) for path in files],
+            "rows": self.rows,
+            "task_type": self.task_type,
+            "label_column": self.label_column,
+            "label_dtype": np.dtype(self.label_dtype).name,
+            "feature_columns": self.feature_columns or [],
+            "feature_dtype": "float32",
+            "memory_before": self.memory_before,
+            "memory_after": self.memory_after,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if self.plan is not None:
+            # npy和DMatrix只能存放单一类型的矩阵，逐列类型仅对Arrow格式生效
+            if self.output_format in ['parquet', 'feather']:
+                manifest["feature_dtype"] = {column: np.dtype(spec).name if kind != "category" else "category"
+                                             for column, (kind, spec) in self.plan.items()}
+            manifest["categories"] = {column: spec for column, (kind, spec) in self.plan.items()
+                                      if kind == "category"}
+        return manifest
+
+    def _arrow_table(self, X, y):
+        arrays = []
+        for column, values in X.items():
+            values = values.to_numpy()
+            if self.plan is not None and self.plan[str(column)][0] == "category":
+                # 字典编码的缺失值(-1)写为null
+                arrays.append(pa.array(values, mask=values < 0))
+            else:
+                arrays.append(pa.array(values))
+        arrays.append(pa.array(y))
+        return pa.Table.from_arrays(arrays, names=self.feature_columns + [self.label_column])
+
+    def _matrix(self, X):
+        """npy和DMatrix使用统一的float32矩阵，字典编码的缺失值还原为NaN"""
+        matrix = X.to_numpy(dtype=np.float32, na_value=np.nan)
+        if self.plan is not None:
+            for i, column in enumerate(self.feature_columns):
+                if self.plan[column][0] == "category":
+                    matrix[matrix[:, i] < 0, i] = np.nan
+        return matrix
+
+    def _convert_parquet(self, progress_callback):
+        path = self.output_path(".parquet")
+        writer = None
+        try:
+            for X, y in self.iter_prepared(progress_callback):
+                table = self._arrow_table(X, y)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return [path]
+
+    def _convert_feather(self, progress_callback):
+        # Feather V2 即 Arrow IPC 文件格式，可按批次追加
+        path = self.output_path(".feather")
+        writer = None
+        try:
+            for X, y in self.iter_prepared(progress_callback):
+                table = self._arrow_table(X, y)
+                if writer is None:
+                    writer = pa.ipc.new_file(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return [path]
+
+    def _convert_npy(self, progress_callback):
+        feature_writer = None
+        label_writer = NpyStreamWriter(self.output_path(".y.npy"), self.label_dtype)
+        try:
+            for X, y in self.iter_prepared(progress_callback):
+                if feature_writer is None:
+                    feature_writer = NpyStreamWriter(self.output_path(".X.npy"), np.float32, X.shape[1])
+                feature_writer.write(self._matrix(X))
+                label_writer.write(y)
+        finally:
+            label_writer.close()
+            if feature_writer is not None:
+                feature_writer.close()
+        return [self.output_path(".X.npy"), self.output_path(".y.npy")]
+
+    def _convert_dmatrix(self, progress_callback):
+        # DMatrix 只能整体构建，float32 的特征矩阵约为文本大小的一半
+        features, labels = [], []
+        for X, y in self.iter_prepared(progress_callback):
+            features.append(self._matrix(X))
+            labels.append(y)
+        dmatrix = xgb.DMatrix(np.vstack(features), label=np.concatenate(labels),
+                              feature_names=self.feature_columns)
+        path = self.output_path(".buffer")
+        dmatrix.save_binary(path)
+        return [path]
@@ -0,0 +1,166 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from app_paths import get_app_path
+
+# 基数估计保留的最小哈希个数，不同取值少于该数时结果精确
+SKETCH_SIZE = 2048
+# 记录取值分布的最大不同取值数
+TOP_VALUES = 100
+# 统计项变化时递增，旧缓存随之失效
+PROFILE_VERSION = 2
+
+
+class ColumnProfile:
+    """单列的累计统计"""
+    def __init__(self):
+        self.dtype = None
+        self.count = 0
+        self.nulls = 0
+        self.numeric = True
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.finite = 0
+        self.nonfinite = 0
+        self.sketch = np.empty(0, dtype=np.uint64)
+        self.values = {}
+
+    def update(self, series):
+        self.dtype = str(series.dtype)
+        self.count += len(series)
+        self.nulls += int(series.isna().sum())
+        present = series.dropna()
+        if self.numeric and (pd.api.types.is_numeric_dtype(series.dtype)
+                             or pd.api.types.is_bool_dtype(series.dtype)):
+            array = present.to_numpy(dtype=np.float64)
+            finite = np.isfinite(array)
+            self.nonfinite += int(len(array) - finite.sum())
+            array = array[finite]
+            if len(array):
+                low, high = float(array.min()), float(array.max())
+                self.minimum = low if self.minimum is None else min(self.minimum, low)
+                self.maximum = high if self.maximum is None else max(self.maximum, high)
+                self.total += float(array.sum())
+                self.finite += len(array)
+        elif len(present):
+            self.numeric = False
+        if len(present):
+            # KMV基数估计：保留全部取值哈希中最小的 SKETCH_SIZE 个
+            hashes = pd.util.hash_pandas_object(present, index=False).to_numpy()
+            self.sketch = np.unique(np.concatenate([self.sketch, hashes]))[:SKETCH_SIZE]
+        if self.values is not None:
+            counts = present.value_counts()
+            if len(counts) > TOP_VALUES:
+                self.values = None
+                return
+            for value, count in counts.items():
+                key = str(value)
+                self.values[key] = self.values.get(key, 0) + int(count)
+            if len(self.values) > TOP_VALUES:
+                self.values = None
+
+    def cardinality(self):
+        """返回 (不同取值个数, 是否精确)"""
+        if len(self.sketch) < SKETCH_SIZE:
+            return len(self.sketch), True
+        kth = float(self.sketch[-1]) / float(2 ** 64)
+        return int((SKETCH_SIZE - 1) / kth), False
+
+    def to_dict(self):
+        cardinality, exact = self.cardinality()
+        return {
+            "dtype": self.dtype,
+            "count": self.count,
+            "nulls": self.nulls,
+            "min": self.minimum if self.numeric else None,
+            "max": self.maximum if self.numeric else None,
+            "mean": self.total / self.finite if self.numeric and self.finite else None,
+            "numeric": self.numeric,
+            "nonfinite": self.nonfinite,
+            "cardinality": cardinality,
+            "cardinality_exact": exact,
+            "values": self.values,
+        }
+
+
+class DatasetProfiler:
+    """按块累计各列统计，每个数据块内的各列在线程池中并行计算"""
+    def __init__(self, max_workers=None):
+        self.columns = {}
+        self.rows = 0
+        self.memory_bytes = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1))
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        self.memory_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+        for column in chunk.columns:
+            self.columns.setdefault(str(column), ColumnProfile())
+        # 列之间相互独立，numpy/pandas的归约计算会释放GIL
+        list(self._pool.map(lambda column: self.columns[str(column)].update(chunk[column]), chunk.columns))
+
+    def finish(self):
+        self._pool.shutdown(wait=True)
+        return {
+            "version": PROFILE_VERSION,
+            "rows": self.rows,
+            "memory_bytes": self.memory_bytes,
+            "columns": {name: column.to_dict() for name, column in self.columns.items()},
+        }
+
+
+def profile_path(digest):
+    return get_app_path("profiles", f"{digest}.json")
+
+
+def load_profile(digest):
+    """读取按文件sha256缓存的数据概况，不存在时返回None"""
+    try:
+        with open(profile_path(digest), "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("version") == PROFILE_VERSION else None
+
+
+def save_profile(digest, profile):
+    with open(profile_path(digest), "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False)
+
+
+def label_distribution(profile, label_column):
+    """标签列的取值分布 {取值: 行数}，取值过多（如回归标签）时返回None"""
+    column = profile["columns"].get(label_column)
+    if column is None or column["values"] is None:
+        return None
+    return dict(sorted(column["values"].items(), key=lambda item: -item[1]))
+
+
+def format_profile(profile, label_column=None):
+    """生成数据概况的文本报告"""
+    lines = [f"行数: {profile['rows']}",
+             f"预计内存占用: {profile['memory_bytes'] / 1024 / 1024:.1f} MB",
+             f"列数: {len(profile['columns'])}"]
+    null_columns = [name for name, column in profile["columns"].items() if column["nulls"]]
+    if null_columns:
+        lines.append(f"含缺失值的列: {len(null_columns)}")
+    constant_columns = [name for name, column in profile["columns"].items() if column["cardinality"] <= 1]
+    if constant_columns:
+        lines.append(f"常量列: {', '.join(constant_columns[:10])}")
+    if label_column:
+        distribution = label_distribution(profile, label_column)
+        if distribution:
+            total = sum(distribution.values())
+            lines.append(f"标签 {label_column} 分布: " + ", ".join(
+                f"{value}: {count} ({count * 100 / total:.1f}%)" for value, count in list(distribution.items())[:10]))
+    lines.append("")
+    for name, column in profile["columns"].items():
+        text = f"{name} [{column['dtype']}] 缺失 {column['nulls']}"
+        if column["min"] is not None:
+            text += f" 最小 {column['min']:.6g} 最大 {column['max']:.6g} 均值 {column['mean']:.6g}"
+        text += f" 基数 {'' if column['cardinality_exact'] else '≈'}{column['cardinality']}"
+        lines.append(text)
+    return "\n".join(lines)
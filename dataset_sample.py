@@ -0,0 +1,87 @@
+import os
+import numpy as np
+from app_paths import get_app_dir
+from dataset_validator import iter_chunks
+
+
+class DatasetSampler:
+    """单遍流式抽样，内存占用只与数据块大小有关
+
+    已知各类别（或总行数）时按比例精确抽取：每个数据块中某类别应抽取的行数
+    服从超几何分布，逐块抽取后各类别的样本数恰好为 round(类别行数 × 比例)；
+    未知时退化为按比例的伯努利抽样。结果以CSV写入本地数据目录。
+    """
+    def __init__(self, file_path, fraction, label_column=None, class_counts=None, total_rows=None,
+                 seed=None, chunksize=100000):
+        self.file_path = file_path
+        self.fraction = fraction
+        self.label_column = label_column
+        self.class_counts = class_counts
+        self.total_rows = total_rows
+        self.seed = seed
+        self.chunksize = chunksize
+        self.stem = os.path.splitext(os.path.basename(file_path))[0]
+        self.sampled_rows = 0
+        self.rows = 0
+
+    @property
+    def stratified(self):
+        return bool(self.label_column and self.class_counts)
+
+    def output_path(self):
+        percent = f"{self.fraction * 100:g}"
+        return os.path.join(get_app_dir("samples", f"{self.stem}_{percent}pct"), f"{self.stem}.csv")
+
+    def _initial_state(self):
+        """{层: [仍需抽取的行数, 尚未读到的行数]}"""
+        if self.stratified:
+            # 每个类别至少保留一行，避免少数类在样本中消失
+            return {str(key): [min(int(count), max(1, int(round(count * self.fraction)))), int(count)]
+                    for key, count in self.class_counts.items()}
+        if self.total_rows:
+            return {None: [int(round(self.total_rows * self.fraction)), int(self.total_rows)]}
+        return {}
+
+    def _select(self, rng, state, positions, mask):
+        """在一层的若干行中选出样本，计数与实际不符时对这些行改用伯努利抽样"""
+        count = len(positions)
+        if count == 0:
+            return
+        if state is None or count > state[1]:
+            mask[positions] = rng.random(count) < self.fraction
+            return
+        need, left = state
+        take = int(rng.hypergeometric(need, left - need, count)) if need > 0 else 0
+        if take:
+            mask[rng.choice(positions, take, replace=False)] = True
+        state[0] -= take
+        state[1] -= count
+
+    def sample(self, progress_callback=None, control=None):
+        """执行抽样，返回样本文件路径"""
+        rng = np.random.default_rng(self.seed)
+        states = self._initial_state()
+        path = self.output_path()
+        self.rows = 0
+        self.sampled_rows = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            header = True
+            # 与数据校验一样跳过字段数不符的行
+            for chunk in iter_chunks(self.file_path, self.chunksize, bad_lines=[]):
+                if control:
+                    control.checkpoint()
+                mask = np.zeros(len(chunk), dtype=bool)
+                if self.stratified:
+                    keys = chunk[self.label_column].astype(str).to_numpy()
+                    for key in np.unique(keys):
+                        self._select(rng, states.get(key), np.flatnonzero(keys == key), mask)
+                else:
+                    self._select(rng, states.get(None), np.arange(len(chunk)), mask)
+                sample = chunk[mask]
+                sample.to_csv(f, header=header, index=False)
+                header = False
+                self.rows += len(chunk)
+                self.sampled_rows += len(sample)
+                if progress_callback:
+                    progress_callback(self.rows, self.sampled_rows)
+        return path
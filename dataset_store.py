@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import posixpath
+import shlex
+import threading
+from app_paths import get_app_path
+
+# 远程内容寻址存储的根目录，与数据集目录位于同一文件系统以便建立硬链接
+CAS_ROOT = "/home/HwHiAiUser/Desktop/2t/.cas/sha256"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path, control=None):
+    """流式计算本地文件的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            if control:
+                control.checkpoint()
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """本地文件摘要缓存，按 (路径, 大小, 修改时间) 判断是否仍然有效"""
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = HashCache()
+        return cls._instance
+
+    def __init__(self):
+        self.path = get_app_path("hash_cache.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, file_path):
+        stat = os.stat(file_path)
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(file_path))
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        return None
+
+    def put(self, file_path, digest):
+        stat = os.stat(file_path)
+        with self._lock:
+            self._entries[os.path.abspath(file_path)] = {
+                "size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest}
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(self.path + ".tmp", self.path)
+
+
+class RemoteStore:
+    """远程内容寻址存储：{CAS_ROOT}/<前两位>/<sha256>
+
+    上传完成的文件以硬链接加入存储；再次上传相同内容时，
+    目标路径直接链接到存储中的副本，不传输数据。
+    """
+    # 已在远程重新计算过sha256的对象 {(主机, 摘要)}，所有实例共享，连接重建后清空
+    _verified = set()
+    _verified_client = None
+    _verified_lock = threading.Lock()
+
+    def __init__(self, ssh_manager, root=CAS_ROOT):
+        self.ssh_manager = ssh_manager
+        self.root = root
+
+    def object_path(self, digest):
+        return f"{self.root}/{digest[:2]}/{digest}"
+
+    def _run(self, command):
+        _, error, exit_status = self.ssh_manager.submit_command(command).result()
+        return exit_status, error
+
+    def contains(self, digest, size):
+        """存储中是否有该摘要的对象；长度一致后还要在远程重新计算sha256
+
+        内容不符的对象被删除；无法计算摘要时只按未命中处理，对象保留。
+        """
+        path = self.object_path(digest)
+        output, _, exit_status = self.ssh_manager.submit_command(
+            f"stat -c %s {shlex.quote(path)} 2>/dev/null").result()
+        if exit_status != 0 or output.strip() != str(size):
+            return False
+        key = self._verified_key(digest)
+        with self._verified_lock:
+            if key in self._verified:
+                return True
+        remote_digest = self._remote_digest(path)
+        if remote_digest is None:
+            return False
+        if remote_digest != digest:
+            print(f"远程存储对象校验失败，已删除: {path}")
+            self._run(f"rm -f {shlex.quote(path)}")
+            return False
+        with self._verified_lock:
+            self._verified.add(key)
+        return True
+
+    def _verified_key(self, digest):
+        """重连后 ssh_client 会被替换，期间远程对象可能被改动，之前的校验结果不再可信"""
+        with self._verified_lock:
+            if self.ssh_manager.ssh_client is not RemoteStore._verified_client:
+                RemoteStore._verified_client = self.ssh_manager.ssh_client
+                self._verified.clear()
+        return (self.ssh_manager.host_key, digest)
+
+    def _remote_digest(self, path):
+        """计算远程文件的sha256，优先使用常驻代理；计算失败时返回None"""
+        agent = self.ssh_manager.agent
+        if agent is not None:
+            try:
+                return agent.hash_file(path)
+            except Exception as e:
+                print(f"远程代理计算摘要失败: {e}")
+                return None
+        output, error, exit_status = self.ssh_manager.submit_command(f"sha256sum {shlex.quote(path)}").result()
+        if exit_status != 0 or not output.strip():
+            print(f"计算远程摘要失败: {error.strip()}")
+            return None
+        return output.split()[0]
+
+    def link(self, digest, remote_path):
+        """将目标路径链接到存储对象，硬链接失败时使用符号链接"""
+        source = shlex.quote(self.object_path(digest))
+        target = shlex.quote(remote_path)
+        exit_status, error = self._run(
+            f"mkdir -p {shlex.quote(posixpath.dirname(remote_path))} && "
+            f"(ln -f {source} {target} 2>/dev/null || ln -sf {source} {target})")
+        if exit_status != 0:
+            raise Exception(f"无法链接已存储的数据集: {error.strip()}")
+
+    def add(self, remote_path, digest):
+        """将上传完成的文件加入存储，跨文件系统时复制"""
+        target = shlex.quote(self.object_path(digest))
+        source = shlex.quote(remote_path)
+        exit_status, error = self._run(
+            f"mkdir -p {shlex.quote(posixpath.dirname(self.object_path(digest)))} && "
+            f"(ln -f {source} {target} 2>/dev/null || cp -f {source} {target})")
+        if exit_status != 0:
+            raise Exception(f"无法加入远程存储: {error.strip()}")
@@ -0,0 +1,262 @@
+import os
+import re
+import warnings
+import numpy as np
+import pandas as pd
+
+SUPPORTED_EXTENSIONS = ['.csv', '.txt', '.xlsx', '.xls']
+BAD_LINE_PATTERN = re.compile(r"Skipping line (\d+)")
+
+
+def read_sample(file_path, nrows=1000):
+    """读取表头和前若干行样本，字段数不符的行由全文件扫描报告"""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext == '.csv':
+        return pd.read_csv(file_path, nrows=nrows, on_bad_lines='skip')
+    elif file_ext == '.txt':
+        return pd.read_csv(file_path, sep='\t', nrows=nrows, on_bad_lines='skip')
+    elif file_ext in ['.xlsx', '.xls']:
+        return pd.read_excel(file_path, nrows=nrows)
+    raise Exception("不支持的文件格式")
+
+
+def iter_chunks(file_path, chunksize=100000, usecols=None, bad_lines=None):
+    """按块读取数据文件，内存占用与文件大小无关
+
+    bad_lines 为列表时，CSV/TXT 中字段数不符的行会被跳过并记录行号。
+    指定 usecols 时 pandas 不再检查字段数，因此需要跳过错误行时读取全部列后再选取。
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext in ['.csv', '.txt']:
+        sep = '\t' if file_ext == '.txt' else ','
+        reader = pd.read_csv(file_path, sep=sep, chunksize=chunksize,
+                             usecols=usecols if bad_lines is None else None,
+                             on_bad_lines='warn' if bad_lines is not None else 'error')
+        with reader:
+            while True:
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter("always", pd.errors.ParserWarning)
+                    try:
+                        chunk = next(reader)
+                    except StopIteration:
+                        break
+                if bad_lines is not None:
+                    for warning in caught:
+                        bad_lines.extend(int(n) for n in BAD_LINE_PATTERN.findall(str(warning.message)))
+                    if usecols is not None:
+                        chunk = chunk[usecols]
+                yield chunk
+    elif file_ext == '.xlsx':
+        yield from _iter_xlsx_chunks(file_path, chunksize, usecols)
+    elif file_ext == '.xls':
+        # 旧版xls格式不支持流式读取，只能整体加载
+        df = pd.read_excel(file_path, usecols=usecols)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        raise Exception("不支持的文件格式")
+
+
+def _iter_xlsx_chunks(file_path, chunksize, usecols):
+    """以只读模式逐行读取xlsx，按块组装DataFrame"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        batch = []
+        for row in rows:
+            batch.append(row[:len(columns)])
+            if len(batch) >= chunksize:
+                yield _xlsx_frame(batch, columns, usecols)
+                batch = []
+        if batch:
+            yield _xlsx_frame(batch, columns, usecols)
+    finally:
+        workbook.close()
+
+
+def _xlsx_frame(batch, columns, usecols):
+    df = pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+    return df[list(usecols)] if usecols is not None else df
+
+
+def merge_dtype(current, new):
+    """合并不同数据块推断出的列类型"""
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new):
+        try:
+            return np.promote_types(current, new)
+        except TypeError:
+            pass
+    return np.dtype(object)
+
+
+class DatasetValidator:
+    """流式校验数据文件：先检查表头和样本，再按块扫描全文件"""
+    MAX_BAD_LINES = 100
+
+    def __init__(self, file_path, chunksize=100000, sample_rows=1000):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.sample_rows = sample_rows
+        self.row_count = 0
+        self.dtypes = {}
+        self.bad_lines = []
+        self.bad_line_count = 0
+        self._stopped = False
+
+    def check_header(self):
+        """读取表头和样本，表头无效时抛出异常"""
+        sample = read_sample(self.file_path, self.sample_rows)
+        if len(sample.columns) == 0:
+            raise Exception("文件没有有效的表头")
+        self.columns = [str(column) for column in sample.columns]
+        self.dtypes = {str(column): dtype for column, dtype in sample.dtypes.items()}
+        return self.columns, self.dtypes
+
+    def scan(self, progress_callback=None, chunk_callback=None):
+        """按块扫描全文件，progress_callback(行数, 异常行数) 每块调用一次
+
+        chunk_callback(数据块) 用于在同一遍读取中完成其他统计。
+        """
+        dtypes = {}
+        bad_lines = []
+        for chunk in iter_chunks(self.file_path, self.chunksize, bad_lines=bad_lines):
+            if self._stopped:
+                return False
+            self.row_count += len(chunk)
+            if chunk_callback:
+                chunk_callback(chunk)
+            for column, dtype in chunk.dtypes.items():
+                dtypes[str(column)] = merge_dtype(dtypes.get(str(column)), dtype)
+            self.dtypes = dtypes
+            self.bad_line_count += len(bad_lines)
+            if len(self.bad_lines) < self.MAX_BAD_LINES:
+                self.bad_lines.extend(bad_lines[:self.MAX_BAD_LINES - len(self.bad_lines)])
+            bad_lines.clear()
+            if progress_callback:
+                progress_callback(self.row_count, self.bad_line_count)
+        return True
+
+    def to_dict(self):
+        """可缓存的校验结果"""
+        return {"row_count": self.row_count,
+                "dtypes": {column: str(dtype) for column, dtype in self.dtypes.items()},
+                "bad_lines": self.bad_lines,
+                "bad_line_count": self.bad_line_count}
+
+    def load_dict(self, data):
+        self.row_count = data["row_count"]
+        self.dtypes = data["dtypes"]
+        self.bad_lines = data["bad_lines"]
+        self.bad_line_count = data["bad_line_count"]
+
+    def stop(self):
+        self._stopped = True
+
+
+class LabelValidator:
+    """按任务类型检查标签列：二分类恰好两类，多分类至少两类（两类时提示），回归为有限数值
+
+    统计可以来自数据概况，也可以只读取标签列按块扫描得到。
+    """
+    MAX_CLASSES = 1000
+    # 最多类与最少类的样本数之比超过该值时提示类别不平衡
+    IMBALANCE_RATIO = 10
+
+    def __init__(self, file_path, label_column, task_type, chunksize=100000):
+        self.file_path = file_path
+        self.label_column = label_column
+        self.task_type = task_type
+        self.chunksize = chunksize
+
+    def scan(self):
+        """按块统计标签列的行数、缺失值、非有限值和各类样本数
+
+        与数据校验一样跳过字段数不符的行，结果与数据概况一致。
+        """
+        stats = {"rows": 0, "nulls": 0, "nonfinite": 0, "numeric": True, "counts": {}}
+        for chunk in iter_chunks(self.file_path, self.chunksize, usecols=[self.label_column], bad_lines=[]):
+            label = chunk[self.label_column]
+            stats["rows"] += len(label)
+            stats["nulls"] += int(label.isna().sum())
+            present = label.dropna()
+            if pd.api.types.is_numeric_dtype(present.dtype) or pd.api.types.is_bool_dtype(present.dtype):
+                values = present.to_numpy(dtype=np.float64)
+                stats["nonfinite"] += int((~np.isfinite(values)).sum())
+            elif len(present):
+                stats["numeric"] = False
+            if stats["counts"] is not None:
+                for value, count in present.value_counts().items():
+                    stats["counts"][str(value)] = stats["counts"].get(str(value), 0) + int(count)
+                if len(stats["counts"]) > self.MAX_CLASSES:
+                    stats["counts"] = None
+        return stats
+
+    @staticmethod
+    def stats_from_profile(profile, label_column):
+        """从数据概况中取出标签列的统计，概况不足以判断时返回None"""
+        column = profile["columns"].get(label_column)
+        if column is None:
+            return None
+        # 概况只记录不超过100个取值的分布，类别更多时需要单独扫描标签列
+        if column["values"] is None and column["cardinality"] <= LabelValidator.MAX_CLASSES:
+            return None
+        return {"rows": column["count"], "nulls": column["nulls"], "nonfinite": column.get("nonfinite", 0),
+                "numeric": column.get("numeric", column["min"] is not None), "counts": column["values"]}
+
+    def check(self, stats=None):
+        """返回 (错误列表, 警告列表)；有错误时不应上传"""
+        if stats is None:
+            stats = self.scan()
+        errors, warnings_ = [], []
+        label = self.label_column
+        if stats["nulls"]:
+            errors.append(f"标签列 {label} 有 {stats['nulls']} 个缺失值")
+        if stats["nonfinite"]:
+            errors.append(f"标签列 {label} 有 {stats['nonfinite']} 个非有限值(inf)")
+        counts = stats["counts"]
+        if self.task_type == "回归":
+            if not stats["numeric"]:
+                errors.append(f"回归任务的标签列 {label} 必须是数值类型")
+            elif counts is not None and len(counts) <= 10:
+                warnings_.append(f"标签列 {label} 只有 {len(counts)} 个不同取值，可能更适合分类任务")
+            return errors, warnings_
+        if self.task_type not in ["二分类", "多分类"]:
+            return errors, warnings_
+        if counts is None:
+            errors.append(f"标签列 {label} 的不同取值超过 {self.MAX_CLASSES} 个，不适合分类任务")
+            return errors, warnings_
+        if self.task_type == "二分类" and len(counts) != 2:
+            errors.append(f"二分类任务的标签列 {label} 应恰好有2个类别，实际为 {len(counts)} 个")
+        elif self.task_type == "多分类" and len(counts) < 2:
+            errors.append(f"多分类任务的标签列 {label} 至少需要2个类别，实际为 {len(counts)} 个")
+        elif self.task_type == "多分类" and len(counts) == 2:
+            warnings_.append(f"标签列 {label} 只有2个类别，建议使用二分类任务")
+        if not errors:
+            expected = {"0", "1"} if self.task_type == "二分类" else {str(i) for i in range(len(counts))}
+            actual = set(self._normalize(value) for value in counts)
+            if actual != expected:
+                warnings_.append(f"标签取值为 {', '.join(sorted(counts)[:10])}，"
+                                 f"XGBoost要求类别编号为 {', '.join(sorted(expected)[:10])}")
+            largest, smallest = max(counts.values()), min(counts.values())
+            if smallest and largest / smallest > self.IMBALANCE_RATIO:
+                minority = min(counts, key=counts.get)
+                warnings_.append(f"类别不平衡: 最多类与最少类样本数之比为 {largest / smallest:.1f}，"
+                                 f"最少的类别 {minority} 只有 {smallest} 个样本")
+        return errors, warnings_
+
+    @staticmethod
+    def _normalize(value):
+        """1.0 与 1 视为同一类别编号"""
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return str(int(number)) if number.is_integer() else value
+
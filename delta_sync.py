@@ -0,0 +1,151 @@
+import hashlib
+import os
+import numpy as np
+from upload_engine import TransferProgress
+
+ADLER_MOD = 65521
+
+
+def choose_block_size(size):
+    """根据文件大小选择分块大小，兼顾匹配粒度和签名数据量"""
+    block_size = 8192
+    while block_size < 1024 * 1024 and size // block_size > 16384:
+        block_size *= 2
+    return block_size
+
+
+def rolling_adler32(buf, block_size):
+    """向量化计算 buf 中每个起始位置长度为 block_size 的窗口的adler32"""
+    x = buf.astype(np.int64)
+    prefix = np.zeros(len(x) + 1, dtype=np.int64)
+    np.cumsum(x, out=prefix[1:])
+    weighted = np.zeros(len(x) + 1, dtype=np.int64)
+    np.cumsum(np.arange(len(x), dtype=np.int64) * x, out=weighted[1:])
+    starts = np.arange(len(x) - block_size + 1, dtype=np.int64)
+    window_sum = prefix[starts + block_size] - prefix[starts]
+    weighted_sum = weighted[starts + block_size] - weighted[starts]
+    a = (1 + window_sum) % ADLER_MOD
+    b = (block_size + (block_size + starts) % ADLER_MOD * (window_sum % ADLER_MOD) - weighted_sum) % ADLER_MOD
+    return (b << 16) | a
+
+
+class DeltaSync:
+    """rsync式增量同步
+
+    由远程代理计算已有文件的分块签名，本地用滚动校验找出未变化的块，
+    只发送变化部分的字面数据和“复制旧块”指令，远程重建后校验sha256再替换。
+    """
+    SEGMENT_SIZE = 2 * 1024 * 1024
+    BATCH_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, ssh_manager):
+        self.ssh_manager = ssh_manager
+        self.literal_bytes = 0
+        self.copied_bytes = 0
+
+    def sync(self, local_path, remote_path, progress_callback=None, control=None):
+        """将本地文件增量同步到远程已有文件，返回本地文件的sha256
+
+        取消时远程只留下临时文件，原文件在 commit 之前不会被修改。
+        """
+        agent = self.ssh_manager.agent
+        if agent is None:
+            raise Exception("增量同步需要远程代理")
+        total = os.path.getsize(local_path)
+        block_size = choose_block_size(total)
+        signature = agent.request("signature", path=remote_path, block_size=block_size)
+        # 弱校验 -> {强校验: 块序号}
+        blocks = {}
+        for index, (weak, strong) in enumerate(zip(signature["weak"], signature["strong"])):
+            blocks.setdefault(weak, {}).setdefault(strong, index)
+        weak_keys = np.array(sorted(blocks), dtype=np.int64)
+
+        progress = TransferProgress(total)
+        self.literal_bytes = 0
+        self.copied_bytes = 0
+        self._batch_ops = []
+        self._batch_payload = []
+        self._batch_size = 0
+        self._first_batch = True
+        self._agent = agent
+        self._remote_path = remote_path
+        self._temp_path = f"{remote_path}.delta-tmp"
+        digest = hashlib.sha256()
+
+        with open(local_path, 'rb') as f:
+            position = 0        # 下一个待匹配的位置
+            literal_start = 0   # 尚未发送的字面数据起点
+            hashed_until = 0
+            segment_start = 0
+            while segment_start < total:
+                if control:
+                    control.checkpoint()
+                f.seek(segment_start)
+                data = f.read(self.SEGMENT_SIZE + block_size - 1)
+                # 计算整体摘要时只处理尚未读过的部分
+                digest.update(data[hashed_until - segment_start:])
+                hashed_until = segment_start + len(data)
+                if len(data) >= block_size and len(weak_keys):
+                    buf = np.frombuffer(data, dtype=np.uint8)
+                    weak = rolling_adler32(buf, block_size)
+                    candidates = np.nonzero(np.isin(weak, weak_keys))[0]
+                    for candidate in candidates:
+                        start = segment_start + int(candidate)
+                        if start < position:
+                            continue
+                        window = data[candidate:candidate + block_size]
+                        index = blocks[int(weak[candidate])].get(hashlib.md5(window).hexdigest()[:16])
+                        if index is None:
+                            continue
+                        self._emit_literal(f, literal_start, start)
+                        self._emit_copy(index * block_size, block_size)
+                        position = start + block_size
+                        literal_start = position
+                segment_start = max(segment_start + self.SEGMENT_SIZE, position)
+                progress.add(min(segment_start, total) - progress.sent)
+                if progress_callback:
+                    progress_callback(*progress.snapshot())
+            self._emit_literal(f, literal_start, total)
+        self._flush_batch(force=True)
+        agent.request("commit", target=self._temp_path, path=remote_path, sha256=digest.hexdigest())
+        return digest.hexdigest()
+
+    def _emit_copy(self, offset, length):
+        # 与上一条复制指令相邻时合并
+        if self._batch_ops and self._batch_ops[-1][0] == "c" and \
+                self._batch_ops[-1][1] + self._batch_ops[-1][2] == offset:
+            self._batch_ops[-1][2] += length
+        else:
+            self._batch_ops.append(["c", offset, length])
+        self.copied_bytes += length
+        self._flush_batch()
+
+    def _emit_literal(self, f, start, end):
+        """从本地文件读取 [start, end) 作为字面数据，按批次大小分段"""
+        current = f.tell()
+        while start < end:
+            size = min(end - start, self.BATCH_SIZE - self._batch_size)
+            f.seek(start)
+            data = f.read(size)
+            if not data:
+                raise Exception("本地文件在同步过程中被修改")
+            self._batch_ops.append(["l", len(data)])
+            self._batch_payload.append(data)
+            self._batch_size += len(data)
+            self.literal_bytes += len(data)
+            start += len(data)
+            self._flush_batch()
+        f.seek(current)
+
+    def _flush_batch(self, force=False):
+        """批次数据足够大时发送给远程代理，按顺序逐批应用"""
+        if not force and self._batch_size < self.BATCH_SIZE and len(self._batch_ops) < 10000:
+            return
+        if not self._batch_ops and not self._first_batch:
+            return
+        self._agent.request("patch", payload=b"".join(self._batch_payload), base=self._remote_path,
+                            target=self._temp_path, ops=self._batch_ops, reset=self._first_batch)
+        self._first_batch = False
+        self._batch_ops = []
+        self._batch_payload = []
+        self._batch_size = 0
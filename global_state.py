@@ -2,6 +2,8 @@ class GlobalState:
     _instance = None
     _task_type = None
     _upload_id = 0
+    _dataset_dir = None
+    _dataset_files = None
     
     @classmethod
     def get_instance(cls):
@@ -23,4 +25,21 @@ class GlobalState:
     
     @upload_id.setter
     def upload_id(self, value):
-        self._upload_id = value 
\ No newline at end of file
+        self._upload_id = value
+    
+    @property
+    def dataset_dir(self):
+        return self._dataset_dir
+    
+    @dataset_dir.setter
+    def dataset_dir(self, value):
+        self._dataset_dir = value
+    
+    @property
+    def dataset_files(self):
+        """已上传并校验的数据文件: [{name, remote_path, size, sha256}, ...]"""
+        return self._dataset_files or []
+    
+    @dataset_files.setter
+    def dataset_files(self, value):
+        self._dataset_files = value
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from app_paths import get_app_path
+
+QUEUED = "等待中"
+RUNNING = "运行中"
+SUCCEEDED = "已完成"
+FAILED = "失败"
+CANCELLED = "已取消"
+
+
+class JobQueue:
+    """持久化的训练任务队列，保存在 jobs.json 中，应用重启后继续
+
+    任务按优先级（大者优先）和加入顺序出队；失败的任务在重试次数内重新排队。
+    等待时间和运行时间按墙钟累计，跨重启仍然有效。
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = JobQueue()
+        return cls._instance
+
+    def __init__(self, path=None):
+        self.path = path or get_app_path("jobs.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.jobs = data["jobs"]
+            self._next_id = data["next_id"]
+        except (OSError, ValueError, KeyError):
+            self.jobs = []
+            self._next_id = 1
+        # 上次退出时仍在运行的任务被中断，重新排队且不计入重试次数
+        now = time.time()
+        for job in self.jobs:
+            if job["status"] == RUNNING:
+                job["run_time"] += now - job["started_at"]
+                job["attempts"] -= 1
+                job["status"] = QUEUED
+                job["queued_at"] = now
+                job["error"] = "应用退出时任务被中断"
+        self._save()
+
+    def _save(self):
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"next_id": self._next_id, "jobs": self.jobs}, f, ensure_ascii=False, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+    def add(self, script, dataset_dir, task_type, target, params=None, priority=0, max_retries=0):
+        """加入任务，返回任务记录"""
+        now = time.time()
+        with self._lock:
+            job = {
+                "id": self._next_id,
+                "script": script,
+                "dataset_dir": dataset_dir,
+                "task_type": task_type,
+                "target": target,
+                "params": params or {},
+                "priority": priority,
+                "max_retries": max_retries,
+                "attempts": 0,
+                "status": QUEUED,
+                "created_at": now,
+                "queued_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "wait_time": 0.0,
+                "run_time": 0.0,
+                "error": None,
+            }
+            self._next_id += 1
+            self.jobs.append(job)
+            self._save()
+            return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            for job in self.jobs:
+                if job["id"] == job_id:
+                    return dict(job)
+        return None
+
+    def snapshot(self):
+        """所有任务的副本，运行中的任务包含截至当前的耗时"""
+        now = time.time()
+        with self._lock:
+            jobs = [dict(job) for job in self.jobs]
+        for job in jobs:
+            if job["status"] == QUEUED:
+                job["wait_time"] += now - job["queued_at"]
+            elif job["status"] == RUNNING:
+                job["run_time"] += now - job["started_at"]
+        return jobs
+
+    def start_next(self, limits):
+        """按各执行位置的并发上限取出下一个可运行的任务并标记为运行中，没有时返回None"""
+        now = time.time()
+        with self._lock:
+            running = {}
+            for job in self.jobs:
+                if job["status"] == RUNNING:
+                    running[job["target"]] = running.get(job["target"], 0) + 1
+            candidates = [job for job in self.jobs if job["status"] == QUEUED
+                          and running.get(job["target"], 0) < limits.get(job["target"], 1)]
+            if not candidates:
+                return None
+            job = min(candidates, key=lambda item: (-item["priority"], item["id"]))
+            job["status"] = RUNNING
+            job["attempts"] += 1
+            job["wait_time"] += now - job["queued_at"]
+            job["started_at"] = now
+            self._save()
+            return dict(job)
+
+    def _finish_attempt(self, job, success, error, now):
+        job["run_time"] += now - job["started_at"]
+        job["finished_at"] = now
+        job["error"] = error
+        if success:
+            job["status"] = SUCCEEDED
+        elif job["attempts"] <= job["max_retries"]:
+            job["status"] = QUEUED
+            job["queued_at"] = now
+        else:
+            job["status"] = FAILED
+
+    def finish(self, job_id, success, error=None):
+        """记录一次运行的结果，失败且还有重试次数时重新排队；返回更新后的任务"""
+        with self._lock:
+            for job in self.jobs:
+                if job["id"] == job_id and job["status"] == RUNNING:
+                    self._finish_attempt(job, success, error, time.time())
+                    self._save()
+                    return dict(job)
+        return None
+
+    def cancel(self, job_id):
+        """取消等待中的任务，运行中的任务不受影响"""
+        now = time.time()
+        with self._lock:
+            for job in self.jobs:
+                if job["id"] == job_id and job["status"] == QUEUED:
+                    job["wait_time"] += now - job["queued_at"]
+                    job["status"] = CANCELLED
+                    job["finished_at"] = now
+                    self._save()
+                    return True
+        return False
+
+    def clear_finished(self):
+        """移除已结束的任务"""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job["status"] in (QUEUED, RUNNING)]
+            self._save()
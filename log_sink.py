@@ -0,0 +1,76 @@
+import collections
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QTextCursor
+
+
+class LogSink(QObject):
+    """合并批量写入的日志输出
+
+    行先进入缓冲区，由定时器按帧率上限一次性插入文本框；文本框只保留最近
+    max_lines 行，完整日志同时写入磁盘文件。
+    """
+    def __init__(self, text_edit, max_lines=5000, fps=30, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.max_lines = max_lines
+        self.log_path = None
+        self._file = None
+        # 超过显示上限的行插入后也会被裁掉，缓冲区同样只保留最近的部分
+        self._pending = collections.deque(maxlen=max_lines)
+        self.text_edit.document().setMaximumBlockCount(max_lines)
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, 1000 // fps))
+        self._timer.timeout.connect(self.flush)
+
+    def open(self, log_path):
+        """清空显示，之后的日志同时写入 log_path"""
+        self.close()
+        self.clear()
+        self.log_path = log_path
+        self._file = open(log_path, "w", encoding="utf-8")
+
+    def append(self, text):
+        self._pending.append(text)
+        if self._file is not None:
+            self._file.write(text + "\n")
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """将缓冲的行一次性插入文本框末尾"""
+        if not self._pending:
+            self._timer.stop()
+            return
+        text = "\n".join(self._pending)
+        self._pending.clear()
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.text_edit.document().isEmpty():
+            text = "\n" + text
+        cursor.insertText(text)
+        # 用户向上翻看时不强制滚动到底部
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        self._pending.clear()
+        self._timer.stop()
+        self.text_edit.clear()
+
+    def close(self):
+        """写出剩余的行并关闭日志文件"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_log(self):
+        """读取完整日志，没有日志文件时返回文本框中的内容"""
+        if self.log_path is None:
+            return self.text_edit.toPlainText()
+        if self._file is not None:
+            self._file.flush()
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            return f.read()
@@ -0,0 +1,43 @@
+import queue
+import threading
+import time
+
+# 读取线程与消费者之间最多缓冲的行数，消费者跟不上时读取线程阻塞，
+# 子进程随之在管道写满后等待，内存占用有上限
+MAX_PENDING_LINES = 10000
+
+
+def _pump(name, pipe, lines):
+    """逐行读取一个管道，读到EOF后放入结束标记"""
+    try:
+        for line in iter(pipe.readline, ''):
+            lines.put((name, time.monotonic(), line.rstrip('\r\n')))
+    finally:
+        pipe.close()
+        lines.put((name, None, None))
+
+
+def iter_process_lines(process, max_pending=MAX_PENDING_LINES):
+    """同时读取子进程的stdout和stderr，按到达顺序产出 (流名称, 单调时间戳, 行文本)
+
+    两个管道各由一个线程读取，任一管道写满都不会阻塞另一个；
+    Windows 上管道不支持 select，因此使用线程而不是 selectors。
+    """
+    lines = queue.Queue(max_pending)
+    pumps = [threading.Thread(target=_pump, args=(name, pipe, lines), daemon=True)
+             for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr))]
+    for pump in pumps:
+        pump.start()
+    remaining = len(pumps)
+    while remaining:
+        name, timestamp, line = lines.get()
+        if timestamp is None:
+            remaining -= 1
+            continue
+        yield name, timestamp, line
+
+
+def iter_stream_lines(stream):
+    """为远程 CommandStream 的输出行加上到达时的单调时间戳"""
+    for name, line in stream:
+        yield name, time.monotonic(), line
@@ -0,0 +1,385 @@
+import json
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+# 帧格式: 头部(JSON长度, 附加数据长度) + JSON + 附加二进制数据
+FRAME_HEADER = struct.Struct("!II")
+
+# 在远程板卡上运行的代理程序，只依赖Python标准库
+AGENT_SOURCE = r'''
+import hashlib
+import json
+import os
+import stat
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+FRAME_HEADER = struct.Struct("!II")
+BLOCK_SIZE = 1024 * 1024
+_write_lock = threading.Lock()
+
+
+def read_exact(stream, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def send(stream, message, payload=b""):
+    body = json.dumps(message).encode("utf-8")
+    with _write_lock:
+        stream.write(FRAME_HEADER.pack(len(body), len(payload)) + body)
+        if payload:
+            stream.write(payload)
+        stream.flush()
+
+
+def op_ping(request, payload):
+    return {"pid": os.getpid()}, b""
+
+
+def op_run(request, payload):
+    process = subprocess.run(request["command"], shell=True, cwd=request.get("cwd"),
+                             stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, timeout=request.get("timeout"))
+    return {"stdout": process.stdout.decode("utf-8", "replace"),
+            "stderr": process.stderr.decode("utf-8", "replace"),
+            "exit_status": process.returncode}, b""
+
+
+def op_stat(request, payload):
+    try:
+        st = os.stat(request["path"])
+    except FileNotFoundError:
+        return {"exists": False}, b""
+    return {"exists": True, "size": st.st_size, "mtime": st.st_mtime,
+            "is_dir": stat.S_ISDIR(st.st_mode), "mode": st.st_mode}, b""
+
+
+def op_mkdir(request, payload):
+    os.makedirs(request["path"], exist_ok=True)
+    return {"path": request["path"], "is_dir": os.path.isdir(request["path"])}, b""
+
+
+def hash_range(path, algorithm, offset, length):
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = BLOCK_SIZE if remaining is None else min(BLOCK_SIZE, remaining)
+            block = f.read(size)
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def op_hash(request, payload):
+    algorithm = request.get("algorithm", "sha256")
+    ranges = request.get("ranges") or [[request.get("offset", 0), request.get("length")]]
+    digests = [hash_range(request["path"], algorithm, offset, length) for offset, length in ranges]
+    return {"digest": digests[0], "digests": digests}, b""
+
+
+def op_tail(request, payload):
+    lines = request.get("lines", 100)
+    max_bytes = request.get("max_bytes", 1024 * 1024)
+    with open(request["path"], "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= lines and len(data) < max_bytes:
+            size = min(65536, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + data
+    # 末尾的换行不算作新的一行
+    ending = b"\n" if data.endswith(b"\n") else b""
+    body = data[:-1] if ending else data
+    data = b"\n".join(body.split(b"\n")[-lines:]) + ending if lines > 0 else b""
+    data = data[-max_bytes:]
+    return {"size": len(data)}, data
+
+
+def op_signature(request, payload):
+    """按块计算adler32弱校验和md5强校验，用于增量同步"""
+    block_size = request["block_size"]
+    weak = []
+    strong = []
+    with open(request["path"], "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if len(block) < block_size:
+                break
+            weak.append(zlib.adler32(block))
+            strong.append(hashlib.md5(block).hexdigest()[:16])
+    return {"size": os.path.getsize(request["path"]), "block_size": block_size,
+            "weak": weak, "strong": strong}, b""
+
+
+def op_patch(request, payload):
+    """按指令把旧文件中的区间和新的字面数据依次追加到临时文件"""
+    mode = "wb" if request.get("reset") else "ab"
+    position = 0
+    with open(request["base"], "rb") as base, open(request["target"], mode) as target:
+        for op in request["ops"]:
+            if op[0] == "c":
+                base.seek(op[1])
+                remaining = op[2]
+                while remaining > 0:
+                    block = base.read(min(BLOCK_SIZE, remaining))
+                    if not block:
+                        raise IOError("base file shorter than expected")
+                    target.write(block)
+                    remaining -= len(block)
+            else:
+                target.write(payload[position:position + op[1]])
+                position += op[1]
+        size = target.tell()
+    return {"size": size}, b""
+
+
+def op_commit(request, payload):
+    """校验临时文件的sha256，一致时替换目标文件"""
+    digest = hash_range(request["target"], "sha256", 0, None)
+    if digest != request["sha256"]:
+        os.remove(request["target"])
+        raise ValueError("sha256 mismatch after patch")
+    os.replace(request["target"], request["path"])
+    return {"digest": digest}, b""
+
+
+OPS = {
+    "ping": op_ping,
+    "run": op_run,
+    "stat": op_stat,
+    "mkdir": op_mkdir,
+    "hash": op_hash,
+    "tail": op_tail,
+    "signature": op_signature,
+    "patch": op_patch,
+    "commit": op_commit,
+}
+
+
+def handle(stream, request, payload):
+    try:
+        handler = OPS.get(request.get("op"))
+        if handler is None:
+            raise ValueError("unknown op %r" % request.get("op"))
+        result, data = handler(request, payload)
+        send(stream, {"id": request.get("id"), "ok": True, "result": result}, data)
+    except Exception as e:
+        send(stream, {"id": request.get("id"), "ok": False,
+                      "error": "%s: %s" % (type(e).__name__, e)})
+
+
+def main():
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    workers = ThreadPoolExecutor(max_workers=4)
+    while True:
+        header = read_exact(stdin, FRAME_HEADER.size)
+        if header is None:
+            break
+        body_size, payload_size = FRAME_HEADER.unpack(header)
+        request = json.loads(read_exact(stdin, body_size).decode("utf-8"))
+        payload = read_exact(stdin, payload_size) if payload_size else b""
+        if request.get("op") == "exit":
+            break
+        workers.submit(handle, stdout, request, payload)
+    workers.shutdown(wait=True)
+
+
+main()
+'''
+
+
+def _read_exact(stream, size):
+    """从流中读取指定长度的数据，遇到EOF返回None"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+class RemoteAgent:
+    """常驻远程代理的客户端
+
+    通过单个通道发送带长度前缀的JSON请求，多个线程可同时发起请求，
+    响应按请求ID分发。rfile/wfile 可以是SSH通道，也可以是本地子进程的管道。
+    """
+    def __init__(self, rfile, wfile, on_close=None):
+        self._rfile = rfile
+        self._wfile = wfile
+        self._on_close = on_close
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="remote-agent-reader", daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def start_remote(cls, channel_pool, python="python3", timeout=15):
+        """在远程主机上通过通道池的一个通道启动代理"""
+        channel = channel_pool.open_channel()
+        try:
+            channel.exec_command(f"exec {python} -u -c {shlex.quote(AGENT_SOURCE)} 2>/tmp/xgboost_npu_agent.log")
+            agent = cls(channel.makefile('rb'), channel.makefile('wb'),
+                        on_close=lambda: channel_pool.release_channel(channel))
+        except Exception:
+            channel_pool.release_channel(channel)
+            raise
+        agent._check_alive(timeout)
+        return agent
+
+    @classmethod
+    def start_local(cls, python=None, timeout=15):
+        """以本地子进程启动代理，用于调试和测试"""
+        process = subprocess.Popen([python or sys.executable, "-u", "-c", AGENT_SOURCE],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        def close_process():
+            process.stdin.close()
+            process.wait(timeout=5)
+
+        agent = cls(process.stdout, process.stdin, on_close=close_process)
+        agent._check_alive(timeout)
+        return agent
+
+    def _check_alive(self, timeout):
+        try:
+            self.ping(timeout=timeout)
+        except Exception as e:
+            self.close()
+            raise Exception(f"远程代理启动失败: {str(e)}")
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def submit(self, op, payload=b"", **params):
+        """发送请求，返回Future；结果为字典，附加数据存放在 'data' 键中"""
+        future = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise Exception("远程代理已关闭")
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+        message = dict(params, id=request_id, op=op)
+        body = json.dumps(message).encode('utf-8')
+        try:
+            with self._write_lock:
+                self._wfile.write(FRAME_HEADER.pack(len(body), len(payload)) + body)
+                if payload:
+                    self._wfile.write(payload)
+                self._wfile.flush()
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise Exception(f"向远程代理发送请求失败: {str(e)}")
+        return future
+
+    def request(self, op, payload=b"", timeout=None, **params):
+        """发送请求并等待结果"""
+        return self.submit(op, payload, **params).result(timeout)
+
+    def _read_loop(self):
+        error = "远程代理已退出"
+        try:
+            while True:
+                header = _read_exact(self._rfile, FRAME_HEADER.size)
+                if header is None:
+                    break
+                body_size, payload_size = FRAME_HEADER.unpack(header)
+                body = _read_exact(self._rfile, body_size)
+                payload = _read_exact(self._rfile, payload_size) if payload_size else b""
+                if body is None or payload is None:
+                    break
+                message = json.loads(body.decode('utf-8'))
+                with self._pending_lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if message.get("ok"):
+                    result = message.get("result") or {}
+                    if payload:
+                        result["data"] = payload
+                    future.set_result(result)
+                else:
+                    future.set_exception(Exception(f"远程代理错误: {message.get('error')}"))
+        except Exception as e:
+            error = f"远程代理通信中断: {str(e)}"
+        finally:
+            self._fail_pending(error)
+
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(Exception(error))
+
+    def close(self):
+        """通知代理退出并释放通道"""
+        if not self._closed:
+            try:
+                self.submit("exit")
+            except Exception:
+                pass
+        self._fail_pending("远程代理已关闭")
+        if self._on_close:
+            on_close, self._on_close = self._on_close, None
+            try:
+                on_close()
+            except Exception as e:
+                print(f"关闭远程代理时出错: {e}")
+
+    def ping(self, timeout=None):
+        return self.request("ping", timeout=timeout)
+
+    def run(self, command, cwd=None, timeout=None):
+        """执行shell命令，返回(stdout, stderr, 退出码)"""
+        result = self.request("run", command=command, cwd=cwd, timeout=timeout)
+        return result["stdout"], result["stderr"], result["exit_status"]
+
+    def stat(self, path):
+        return self.request("stat", path=path)
+
+    def mkdir(self, path):
+        """相当于 mkdir -p"""
+        return self.request("mkdir", path=path)
+
+    def hash_file(self, path, algorithm="sha256", ranges=None):
+        """计算远程文件的摘要；传入 ranges=[(offset, length), ...] 时返回各区间的摘要列表"""
+        if ranges:
+            return self.request("hash", path=path, algorithm=algorithm,
+                                ranges=[list(r) for r in ranges])["digests"]
+        return self.request("hash", path=path, algorithm=algorithm)["digest"]
+
+    def tail(self, path, lines=100, max_bytes=1024 * 1024):
+        """读取远程文件末尾若干行"""
+        result = self.request("tail", path=path, lines=lines, max_bytes=max_bytes)
+        return result.get("data", b"").decode('utf-8', errors='replace')
@@ -0,0 +1,79 @@
+import posixpath
+import shlex
+import threading
+from ssh_manager import SSHManager
+
+
+class RemotePathManager:
+    """远程目录准备
+
+    一次往返完成 mkdir -p 和存在性检查；已确认存在的目录在本次连接内缓存，
+    出错或连接重建后缓存失效。
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = RemotePathManager()
+        return cls._instance
+
+    def __init__(self):
+        self.ssh_manager = SSHManager.get_instance()
+        self._known = set()
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _check_session(self):
+        """重连后 ssh_client 会被替换，此时之前确认过的目录不再可信"""
+        with self._lock:
+            if self.ssh_manager.ssh_client is not self._client:
+                self._client = self.ssh_manager.ssh_client
+                self._known.clear()
+
+    def ensure_dirs(self, paths):
+        """确保多个远程目录存在，未缓存的目录在一次往返中创建并验证"""
+        self._check_session()
+        paths = [posixpath.normpath(path) for path in paths]
+        with self._lock:
+            missing = sorted({path for path in paths if path not in self._known})
+        if not missing:
+            return
+        try:
+            agent = self.ssh_manager.agent
+            if agent is not None:
+                # 请求同时发出，代理并行处理
+                futures = [agent.submit("mkdir", path=path) for path in missing]
+                failed = [path for path, future in zip(missing, futures) if not future.result().get("is_dir")]
+                error = ""
+            else:
+                quoted = " ".join(shlex.quote(path) for path in missing)
+                checks = " && ".join(f"test -d {shlex.quote(path)}" for path in missing)
+                _, error, exit_status = self.ssh_manager.submit_command(
+                    f"mkdir -p {quoted} && {checks}").result()
+                failed = missing if exit_status != 0 else []
+        except Exception:
+            self.invalidate()
+            raise
+        if failed:
+            raise Exception(f"无法创建或访问目录: {', '.join(failed)} {error.strip()}".strip())
+        with self._lock:
+            for path in missing:
+                # 父目录随之存在
+                while path not in ("/", "", ".") and path not in self._known:
+                    self._known.add(path)
+                    path = posixpath.dirname(path)
+
+    def ensure_dir(self, path):
+        self.ensure_dirs([path])
+        return path
+
+    def invalidate(self, path=None):
+        """清除缓存；指定路径时只清除该目录及其子目录"""
+        with self._lock:
+            if path is None:
+                self._known.clear()
+                return
+            path = posixpath.normpath(path)
+            self._known = {known for known in self._known
+                           if known != path and not known.startswith(path.rstrip("/") + "/")}
@@ -1,31 +1,524 @@
+import codecs
+import json
+import os
+import random
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import paramiko
+from app_paths import get_app_path
+from remote_agent import RemoteAgent
+
+
+def iter_channel(channel, chunk_size=32768, poll_interval=1.0):
+    """同时读取通道的stdout与stderr，按到达顺序产出(流名称, 数据块)"""
+    while True:
+        received = False
+        if channel.recv_ready():
+            data = channel.recv(chunk_size)
+            if data:
+                received = True
+                yield 'stdout', data
+        if channel.recv_stderr_ready():
+            data = channel.recv_stderr(chunk_size)
+            if data:
+                received = True
+                yield 'stderr', data
+        if received:
+            continue
+        # 收到EOF且缓冲区已读空，说明输出结束
+        if channel.eof_received or channel.closed:
+            if not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            continue
+        # 等待新数据到达，避免忙等
+        select.select([channel], [], [], poll_interval)
+
+
+class ChannelPool:
+    """在同一个SSH transport上复用的通道池
+
+    限制同时打开的通道数量，超出上限的调用方排队等待；
+    submit() 返回 Future，可在多个线程中并发执行远程命令。
+    """
+    def __init__(self, transport, max_channels=8):
+        self.transport = transport
+        self.max_channels = max_channels
+        self._slots = threading.BoundedSemaphore(max_channels)
+        self._executor = ThreadPoolExecutor(max_workers=max_channels,
+                                            thread_name_prefix="ssh-channel")
+
+    def open_channel(self):
+        """占用一个通道名额并打开会话通道"""
+        self._slots.acquire()
+        try:
+            if not self.transport.is_active():
+                raise Exception("SSH连接已断开")
+            return self.transport.open_session()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release_channel(self, channel):
+        """关闭通道并归还名额"""
+        try:
+            channel.close()
+        finally:
+            self._slots.release()
+
+    def run(self, command):
+        """在池中的通道上执行命令，返回(stdout, stderr, 退出码)"""
+        channel = self.open_channel()
+        try:
+            channel.exec_command(command)
+            stdout, stderr = [], []
+            for name, data in iter_channel(channel):
+                (stdout if name == 'stdout' else stderr).append(data)
+            exit_status = channel.recv_exit_status()
+        finally:
+            self.release_channel(channel)
+        return (b''.join(stdout).decode(errors='replace'),
+                b''.join(stderr).decode(errors='replace'),
+                exit_status)
+
+    def submit(self, command):
+        """异步执行命令，返回结果为(stdout, stderr, 退出码)的Future"""
+        return self._executor.submit(self.run, command)
+
+    def shutdown(self):
+        """停止接收新任务，已提交的命令继续完成"""
+        self._executor.shutdown(wait=False)
+
+
+class CommandStream:
+    """流式读取远程命令的输出
+
+    迭代产出 (流名称, 行文本)；binary=True 时产出 (流名称, 字节块)。
+    数据按需从通道读取，未读取的数据受SSH窗口限制，内存占用有上限；
+    迭代结束后通过 exit_status 获取退出码。
+    """
+    def __init__(self, pool, command, binary=False, chunk_size=32768,
+                 max_line_length=1024 * 1024, encoding='utf-8'):
+        self.pool = pool
+        self.command = command
+        self.binary = binary
+        self.chunk_size = chunk_size
+        self.max_line_length = max_line_length
+        self.encoding = encoding
+        self.exit_status = None
+        self._channel = None
+        self._iterator = None
+
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _iterate(self):
+        channel = self.pool.open_channel()
+        self._channel = channel
+        try:
+            channel.exec_command(self.command)
+            if self.binary:
+                for name, data in iter_channel(channel, self.chunk_size):
+                    yield name, data
+            else:
+                yield from self._iterate_lines(channel)
+            self.exit_status = channel.recv_exit_status()
+        finally:
+            self._channel = None
+            self.pool.release_channel(channel)
+
+    def _iterate_lines(self, channel):
+        """将数据块切分为行，跨块的半行保留到下一次"""
+        decoders = {}
+        pending = {'stdout': '', 'stderr': ''}
+        for name in pending:
+            decoders[name] = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        for name, data in iter_channel(channel, self.chunk_size):
+            text = pending[name] + decoders[name].decode(data)
+            lines = text.split('\n')
+            pending[name] = lines.pop()
+            for line in lines:
+                yield name, line.rstrip('\r')
+            # 超长的无换行输出直接切断，避免缓冲区无限增长
+            if len(pending[name]) >= self.max_line_length:
+                yield name, pending[name]
+                pending[name] = ''
+        for name in pending:
+            rest = pending[name] + decoders[name].decode(b'', final=True)
+            if rest:
+                yield name, rest.rstrip('\r')
+
+    def close(self):
+        """提前结束读取并关闭通道"""
+        if self._iterator is not None:
+            self._iterator.close()
+        elif self._channel is not None:
+            self._channel.close()
+
+
 class SSHManager:
     _instance = None
     _ssh_client = None
-    
+    _channel_pool = None
+    _agent = None
+    _connect_kwargs = None
+    _watchdog = None
+    _pool_lock = threading.Lock()
+    _reconnect_lock = threading.RLock()
+    # OpenSSH 默认 MaxSessions 为10，为SFTP等会话预留余量
+    MAX_CHANNELS = 8
+    # 心跳间隔（秒），同时作为断线检测周期
+    KEEPALIVE_INTERVAL = 15
+    RECONNECT_ATTEMPTS = 3
+    # 传输调优的候选窗口与包大小
+    CALIBRATION_WINDOWS = (2 * 1024 * 1024, 8 * 1024 * 1024, 16 * 1024 * 1024)
+    CALIBRATION_PACKETS = (32768, 131072)
+
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
             cls._instance = SSHManager()
         return cls._instance
-    
+
     @property
     def ssh_client(self):
         return self._ssh_client
-    
+
+    @property
+    def host_key(self):
+        """当前连接的 主机:端口，未连接时为None"""
+        return self._profile_key(self._connect_kwargs) if self._connect_kwargs else None
+
     @ssh_client.setter
     def ssh_client(self, client):
+        self.stop_agent()
+        self._reset_channel_pool()
         self._ssh_client = client
-    
-    def execute_command(self, command):
-        """执行SSH命令并返回结果"""
+
+    def open_client(self, connect_kwargs, use_profile=True):
+        """按给定参数建立新的SSH连接并开启心跳，已有调优结果时按其设置传输参数"""
+        profile = self.load_transfer_profile(connect_kwargs) if use_profile else None
+        if profile:
+            try:
+                return self._connect_client(connect_kwargs, profile)
+            except paramiko.AuthenticationException:
+                raise
+            except paramiko.SSHException as e:
+                # 服务器算法配置变化时，回退到默认参数
+                print(f"按调优参数连接失败，使用默认参数: {e}")
+        return self._connect_client(connect_kwargs)
+
+    def _connect_client(self, connect_kwargs, profile=None):
+        kwargs = dict(connect_kwargs)
+        if profile:
+            kwargs['compress'] = profile['compress']
+            kwargs['disabled_algorithms'] = {
+                'ciphers': [c for c in paramiko.Transport._preferred_ciphers if c != profile['cipher']]
+            }
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            ssh_client.connect(**kwargs)
+            transport = ssh_client.get_transport()
+            if transport:
+                transport.set_keepalive(self.KEEPALIVE_INTERVAL)
+                # 调优的第一阶段只测试算法组合，窗口参数为None时保留paramiko默认值
+                if profile and profile.get('window_size'):
+                    transport.default_window_size = profile['window_size']
+                if profile and profile.get('max_packet_size'):
+                    transport.default_max_packet_size = profile['max_packet_size']
+        except Exception:
+            ssh_client.close()
+            raise
+        return ssh_client
+
+    @staticmethod
+    def _profile_key(connect_kwargs):
+        return f"{connect_kwargs['hostname']}:{connect_kwargs.get('port', 22)}"
+
+    def load_transfer_profile(self, connect_kwargs):
+        """读取指定主机缓存的传输调优结果"""
+        try:
+            with open(get_app_path("ssh_profiles.json"), "r", encoding="utf-8") as f:
+                return json.load(f).get(self._profile_key(connect_kwargs))
+        except (OSError, ValueError):
+            return None
+
+    def save_transfer_profile(self, connect_kwargs, profile):
+        path = get_app_path("ssh_profiles.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = {}
+        profiles[self._profile_key(connect_kwargs)] = profile
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _synthetic_payload(size):
+        """生成与CSV数据集相近的文本负载，使压缩效果接近真实情况"""
+        rng = random.Random(0)
+        rows = []
+        total = 0
+        while total < size:
+            row = ",".join(f"{rng.random() * 100:.4f}" for _ in range(8)) + f",{rng.randint(0, 2)}\n"
+            rows.append(row)
+            total += len(row)
+        return "".join(rows).encode()[:size]
+
+    @staticmethod
+    def _measure_echo(transport, payload, window_size=None, max_packet_size=None):
+        """通过远程cat回显负载，返回双向吞吐量（MB/s）"""
+        channel = transport.open_session(window_size=window_size, max_packet_size=max_packet_size)
+        try:
+            channel.exec_command("cat")
+
+            def send_payload():
+                try:
+                    channel.sendall(payload)
+                    channel.shutdown_write()
+                except Exception:
+                    pass
+
+            start = time.perf_counter()
+            sender = threading.Thread(target=send_payload, daemon=True)
+            sender.start()
+            received = 0
+            while received < len(payload):
+                data = channel.recv(65536)
+                if not data:
+                    break
+                received += len(data)
+            elapsed = time.perf_counter() - start
+            sender.join()
+        finally:
+            channel.close()
+        if received < len(payload):
+            raise Exception("基准测试数据不完整")
+        return len(payload) * 2 / elapsed / (1024 * 1024)
+
+    def calibrate(self, payload_size=4 * 1024 * 1024, progress=None):
+        """对当前主机测试各加密算法、压缩开关和窗口/包大小，缓存最快的组合"""
+        if not self._connect_kwargs:
+            raise Exception("SSH连接未建立")
+        payload = self._synthetic_payload(payload_size)
+        report = progress or (lambda text: None)
+        ciphers = [c for c in paramiko.Transport._preferred_ciphers if c != '3des-cbc']
+        results = []
+        best = None
+        best_client = None
+        for cipher in ciphers:
+            for compress in (False, True):
+                report(f"测试 {cipher} / 压缩{'开' if compress else '关'}...")
+                profile = {'cipher': cipher, 'compress': compress, 'window_size': None,
+                           'max_packet_size': None}
+                try:
+                    client = self._connect_client(self._connect_kwargs, profile)
+                except paramiko.SSHException as e:
+                    print(f"服务器不支持 {cipher}: {e}")
+                    break
+                try:
+                    speed = self._measure_echo(client.get_transport(), payload)
+                except Exception as e:
+                    print(f"测试 {cipher} 失败: {e}")
+                    client.close()
+                    continue
+                results.append((cipher, compress, speed))
+                if best is None or speed > best['throughput']:
+                    best = dict(profile, throughput=speed)
+                    if best_client:
+                        best_client.close()
+                    best_client = client
+                else:
+                    client.close()
+        if best is None:
+            raise Exception("没有可用的加密算法完成测试")
+        try:
+            # 在最快的算法组合上继续测试窗口与包大小
+            best_window = (None, None, best['throughput'])
+            transport = best_client.get_transport()
+            for window_size in self.CALIBRATION_WINDOWS:
+                for max_packet_size in self.CALIBRATION_PACKETS:
+                    report(f"测试窗口 {window_size // 1024}KB / 包 {max_packet_size // 1024}KB...")
+                    try:
+                        speed = self._measure_echo(transport, payload, window_size, max_packet_size)
+                    except Exception as e:
+                        print(f"测试窗口参数失败: {e}")
+                        continue
+                    if speed > best_window[2]:
+                        best_window = (window_size, max_packet_size, speed)
+        finally:
+            best_client.close()
+        best['window_size'] = best_window[0] or paramiko.common.DEFAULT_WINDOW_SIZE
+        best['max_packet_size'] = best_window[1] or paramiko.common.DEFAULT_MAX_PACKET_SIZE
+        best['throughput'] = best_window[2]
+        best['calibrated_at'] = time.time()
+        self.save_transfer_profile(self._connect_kwargs, best)
+        return best, results
+
+    def set_connection(self, client, connect_kwargs):
+        """保存已验证的连接及其参数，供断线后自动重连"""
+        self.ssh_client = client
+        self._connect_kwargs = dict(connect_kwargs)
+        self._start_watchdog()
+
+    def _start_watchdog(self):
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch_connection,
+                                              name="ssh-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch_connection(self):
+        """后台检测transport状态，断开后自动重连"""
+        while self._connect_kwargs:
+            time.sleep(self.KEEPALIVE_INTERVAL)
+            if not self._connect_kwargs or not self._ssh_client:
+                continue
+            try:
+                self.ensure_connected()
+            except Exception as e:
+                print(f"SSH自动重连失败，稍后重试: {e}")
+
+    def is_active(self):
+        if not self._ssh_client:
+            return False
+        transport = self._ssh_client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def ensure_connected(self):
+        """确认连接可用，transport断开时使用保存的参数重连"""
         if not self._ssh_client:
             raise Exception("SSH连接未建立")
-        
-        stdin, stdout, stderr = self._ssh_client.exec_command(command)
-        return stdout.read().decode(), stderr.read().decode()
-    
+        if self.is_active():
+            return self._ssh_client
+        return self.reconnect()
+
+    def reconnect(self):
+        """重新建立连接，单例保持不变，通道池和远程代理随之重建"""
+        with self._reconnect_lock:
+            # 其他线程可能已经完成重连
+            if self.is_active():
+                return self._ssh_client
+            if not self._connect_kwargs:
+                raise Exception("SSH连接已断开，且没有可用于重连的参数")
+            last_error = None
+            for attempt in range(self.RECONNECT_ATTEMPTS):
+                try:
+                    client = self.open_client(self._connect_kwargs)
+                    break
+                except Exception as e:
+                    last_error = e
+                    print(f"SSH重连第 {attempt + 1} 次失败: {e}")
+                    time.sleep(2 ** attempt)
+            else:
+                raise Exception(f"SSH自动重连失败: {last_error}")
+            had_agent = self._agent is not None
+            old_client = self._ssh_client
+            self.ssh_client = client
+            try:
+                old_client.close()
+            except Exception:
+                pass
+            print("SSH连接已自动恢复")
+            if had_agent:
+                try:
+                    self.start_agent()
+                except Exception as e:
+                    print(f"重连后远程代理启动失败: {e}")
+            return client
+
+    def open_sftp(self):
+        """在可用连接上打开SFTP会话"""
+        return self.ensure_connected().open_sftp()
+
+    @contextmanager
+    def sftp_session(self):
+        """占用通道池名额打开SFTP会话，退出时自动关闭"""
+        pool = self.channel_pool
+        channel = pool.open_channel()
+        try:
+            channel.invoke_subsystem('sftp')
+            sftp = paramiko.SFTPClient(channel)
+        except Exception:
+            pool.release_channel(channel)
+            raise
+        try:
+            yield sftp
+        finally:
+            try:
+                sftp.close()
+            finally:
+                pool.release_channel(channel)
+
+    @property
+    def channel_pool(self):
+        """获取当前连接上的通道池（按需创建）"""
+        self.ensure_connected()
+        with self._pool_lock:
+            if self._channel_pool is not None and not self._channel_pool.transport.is_active():
+                self._channel_pool.shutdown()
+                self._channel_pool = None
+            if self._channel_pool is None:
+                transport = self._ssh_client.get_transport()
+                if transport is None or not transport.is_active():
+                    raise Exception("SSH连接已断开")
+                self._channel_pool = ChannelPool(transport, self.MAX_CHANNELS)
+            return self._channel_pool
+
+    def _reset_channel_pool(self):
+        with self._pool_lock:
+            if self._channel_pool is not None:
+                self._channel_pool.shutdown()
+                self._channel_pool = None
+
+    @property
+    def agent(self):
+        """常驻远程代理，未启动或已退出时为None"""
+        if self._agent is not None and self._agent.closed:
+            self._agent = None
+        return self._agent
+
+    def start_agent(self):
+        """在当前连接上启动常驻远程代理"""
+        self.stop_agent()
+        self._agent = RemoteAgent.start_remote(self.channel_pool)
+        return self._agent
+
+    def stop_agent(self):
+        if self._agent is not None:
+            agent, self._agent = self._agent, None
+            agent.close()
+
+    def submit_command(self, command):
+        """异步执行SSH命令，返回Future，结果为(stdout, stderr, 退出码)"""
+        return self.channel_pool.submit(command)
+
+    def stream_command(self, command, binary=False, chunk_size=32768):
+        """流式执行SSH命令，返回可迭代的 CommandStream"""
+        return CommandStream(self.channel_pool, command, binary=binary, chunk_size=chunk_size)
+
+    def execute_command(self, command):
+        """执行SSH命令并返回结果"""
+        output, error, _ = self.submit_command(command).result()
+        return output, error
+
     def close(self):
         """关闭SSH连接"""
+        self._connect_kwargs = None
+        self.stop_agent()
+        self._reset_channel_pool()
         if self._ssh_client:
             self._ssh_client.close()
-            self._ssh_client = None 
\ No newline at end of file
+            self._ssh_client = None
@@ -1,9 +1,104 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QLineEdit, QPushButton, QMessageBox, QApplication)
-from PyQt5.QtCore import Qt
-import paramiko
+                           QLineEdit, QPushButton, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from ssh_manager import SSHManager
 
+class ConnectionWorker(QThread):
+    """后台建立并验证SSH连接"""
+    progress_signal = pyqtSignal(str)
+    success_signal = pyqtSignal(str, str, str)
+    error_signal = pyqtSignal(str)
+    
+    def __init__(self, connect_kwargs):
+        super().__init__()
+        self.connect_kwargs = connect_kwargs
+        self.ssh_manager = SSHManager.get_instance()
+    
+    def run(self):
+        ssh_client = None
+        try:
+            # 尝试连接
+            self.progress_signal.emit("正在建立SSH连接...")
+            ssh_client = self.ssh_manager.open_client(self.connect_kwargs)
+            
+            # 获取连接信息
+            remote_version = ""
+            transport = ssh_client.get_transport()
+            if transport:
+                remote_version = transport.remote_version
+                self.progress_signal.emit("连接建立，正在验证...")
+            
+            # 测试连接并获取用户信息
+            stdin, stdout, stderr = ssh_client.exec_command('whoami && pwd && id && echo "SSH_TEST_SUCCESS"')
+            user_info = stdout.read().decode().strip()
+            error_info = stderr.read().decode().strip()
+            
+            if stdout.channel.recv_exit_status() != 0 or "SSH_TEST_SUCCESS" not in user_info:
+                raise Exception(f"连接测试失败: {error_info}")
+            
+            # 连接成功，保存到全局管理器（同时保存参数用于断线重连）
+            self.ssh_manager.set_connection(ssh_client, self.connect_kwargs)
+            ssh_client = None
+            
+            # 通过通道池并行探测远程环境
+            self.progress_signal.emit("正在探测远程环境...")
+            env_info = self.probe_environment()
+            
+            # 启动常驻远程代理，失败时各功能回退到逐条执行命令
+            self.progress_signal.emit("正在启动远程代理...")
+            try:
+                self.ssh_manager.start_agent()
+            except Exception as e:
+                print(f"远程代理启动失败，将使用普通命令通道: {e}")
+            
+            self.success_signal.emit(remote_version, user_info, env_info)
+            
+        except Exception as e:
+            if ssh_client:
+                try:
+                    ssh_client.close()
+                except:
+                    pass
+            self.error_signal.emit(str(e))
+    
+    def probe_environment(self):
+        """并行执行环境探测命令，返回汇总文本"""
+        probes = [
+            ("Python", "python3 --version 2>&1"),
+            ("磁盘", "df -h /home/HwHiAiUser 2>/dev/null | tail -1"),
+            ("NPU", "npu-smi info -l 2>/dev/null | head -3"),
+        ]
+        futures = [(name, self.ssh_manager.submit_command(command)) for name, command in probes]
+        lines = []
+        for name, future in futures:
+            try:
+                output, _, _ = future.result(timeout=15)
+                output = output.strip()
+                if output:
+                    lines.append(f"{name}: {output}")
+            except Exception as e:
+                print(f"环境探测 {name} 失败: {e}")
+        return "\n".join(lines)
+
+class CalibrationWorker(QThread):
+    """后台测试并缓存当前主机最快的传输参数"""
+    progress_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool, str)
+    
+    def run(self):
+        try:
+            ssh_manager = SSHManager.get_instance()
+            profile, results = ssh_manager.calibrate(progress=self.progress_signal.emit)
+            lines = [f"{cipher} / 压缩{'开' if compress else '关'}: {speed:.1f} MB/s"
+                     for cipher, compress, speed in results]
+            summary = (f"最佳组合: {profile['cipher']} / 压缩{'开' if profile['compress'] else '关'}\n"
+                       f"窗口: {profile['window_size'] // 1024}KB, 包: {profile['max_packet_size'] // 1024}KB\n"
+                       f"吞吐量: {profile['throughput']:.1f} MB/s\n\n"
+                       + "\n".join(lines))
+            self.finished_signal.emit(True, summary)
+        except Exception as e:
+            self.finished_signal.emit(False, str(e))
+
 class SystemConfigWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -68,6 +163,30 @@ class SystemConfigWidget(QWidget):
         self.connect_btn.clicked.connect(self.try_connect)
         main_layout.addWidget(self.connect_btn, alignment=Qt.AlignCenter)
         
+        # 传输调优按钮（连接成功后可用）
+        self.calibrate_btn = QPushButton("传输调优")
+        self.calibrate_btn.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                color: white;
+                border: 2px solid white;
+                border-radius: 10px;
+                padding: 10px 20px;
+                font-size: 18px;
+                min-width: 150px;
+            }
+            QPushButton:hover {
+                background-color: rgba(255, 255, 255, 0.1);
+            }
+            QPushButton:disabled {
+                color: #888888;
+                border: 2px solid #888888;
+            }
+        """)
+        self.calibrate_btn.clicked.connect(self.start_calibration)
+        self.calibrate_btn.setEnabled(self.ssh_manager.ssh_client is not None)
+        main_layout.addWidget(self.calibrate_btn, alignment=Qt.AlignCenter)
+        
         # 状态标签
         self.status_label = QLabel("")
         self.status_label.setStyleSheet("color: white; font-size: 14px;")
@@ -133,116 +252,118 @@ class SystemConfigWidget(QWidget):
         # 更新状态
         self.status_label.setText("正在连接...")
         self.status_label.setStyleSheet("color: white; font-size: 14px;")
-        QApplication.processEvents()
+        self.disable_inputs()
         
-        # 尝试连接
-        ssh_client = None
-        try:
-            # 创建SSH客户端
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # 设置更详细的连接参数
-            connect_kwargs = {
-                'hostname': ip,
-                'port': port,
-                'username': username,
-                'password': password,
-                'timeout': 15,  # 增加超时时间
-                'allow_agent': False,  # 禁用SSH agent
-                'look_for_keys': False,  # 不查找密钥文件
-                'auth_timeout': 30,  # 认证超时
-                'banner_timeout': 60,  # banner超时
-            }
-            
-            # 尝试连接
-            self.status_label.setText("正在建立SSH连接...")
-            QApplication.processEvents()
-            
-            ssh_client.connect(**connect_kwargs)
-            
-            # 获取连接信息
-            transport = ssh_client.get_transport()
-            if transport:
-                remote_version = transport.remote_version
-                local_version = transport.local_version
-                self.status_label.setText("连接建立，正在验证...")
-                QApplication.processEvents()
-            
-            # 测试连接并获取用户信息
-            stdin, stdout, stderr = ssh_client.exec_command('whoami && pwd && id && echo "SSH_TEST_SUCCESS"')
-            user_info = stdout.read().decode().strip()
-            error_info = stderr.read().decode().strip()
+        # 设置更详细的连接参数
+        connect_kwargs = {
+            'hostname': ip,
+            'port': port,
+            'username': username,
+            'password': password,
+            'timeout': 15,  # 增加超时时间
+            'allow_agent': False,  # 禁用SSH agent
+            'look_for_keys': False,  # 不查找密钥文件
+            'auth_timeout': 30,  # 认证超时
+            'banner_timeout': 60,  # banner超时
+        }
+        
+        # 在后台线程中建立连接，避免界面卡死
+        self.connection_worker = ConnectionWorker(connect_kwargs)
+        self.connection_worker.progress_signal.connect(self.update_connect_progress)
+        self.connection_worker.success_signal.connect(self.connection_succeeded)
+        self.connection_worker.error_signal.connect(self.connection_failed)
+        self.connection_worker.start()
+
+    def update_connect_progress(self, text):
+        """显示连接进度"""
+        self.status_label.setText(text)
+
+    def connection_succeeded(self, remote_version, user_info, env_info):
+        """连接成功后更新界面和任务状态"""
+        # 更新状态
+        self.status_label.setText("连接成功!")
+        self.status_label.setStyleSheet("color: #00ff00; font-size: 14px;")
+        self.calibrate_btn.setEnabled(True)
+        
+        # 查找MainPage实例并更新状态
+        main_page = None
+        parent = self.parent()
+        while parent is not None:
+            if hasattr(parent, 'step_completed'):
+                main_page = parent
+                break
+            parent = parent.parent()
+        
+        if main_page:
+            main_page.step_completed[0] = True
+            main_page.set_button_enabled(main_page.buttons[1], True)
             
-            if stdout.channel.recv_exit_status() == 0 and "SSH_TEST_SUCCESS" in user_info:
-                # 连接成功，保存到全局管理器
-                self.ssh_manager.ssh_client = ssh_client
-                
-                # 更新状态
-                self.status_label.setText("连接成功!")
-                self.status_label.setStyleSheet("color: #00ff00; font-size: 14px;")
-                
-                # 禁用输入框和连接按钮
-                self.disable_inputs()
-                
-                # 查找MainPage实例并更新状态
-                main_page = None
-                parent = self.parent()
-                while parent is not None:
-                    if hasattr(parent, 'step_completed'):
-                        main_page = parent
-                        break
-                    parent = parent.parent()
-                
-                if main_page:
-                    main_page.step_completed[0] = True
-                    main_page.set_button_enabled(main_page.buttons[1], True)
-                    
-                    # 构建成功消息
-                    success_msg = f'SSH连接已建立\n'
-                    if transport:
-                        success_msg += f'SSH版本: {remote_version}\n'
-                    success_msg += f'用户信息:\n{user_info.replace("SSH_TEST_SUCCESS", "")}'
-                    
-                    QMessageBox.information(self, "连接成功", success_msg)
-                else:
-                    QMessageBox.warning(self, "警告", "无法更新任务状态，但SSH连接已建立。")
+            # 构建成功消息
+            success_msg = f'SSH连接已建立\n'
+            if remote_version:
+                success_msg += f'SSH版本: {remote_version}\n'
+            success_msg += f'用户信息:\n{user_info.replace("SSH_TEST_SUCCESS", "")}'
+            if env_info:
+                success_msg += f'\n环境信息:\n{env_info}'
             
-            else:
-                raise Exception(f"连接测试失败: {error_info}")
-                
-        except Exception as e:
-            # 连接失败
-            error_msg = str(e)
-            self.status_label.setText("连接失败")
+            QMessageBox.information(self, "连接成功", success_msg)
+        else:
+            QMessageBox.warning(self, "警告", "无法更新任务状态，但SSH连接已建立。")
+
+    def connection_failed(self, error_msg):
+        """连接失败时显示详细的错误提示"""
+        username = self.connection_worker.connect_kwargs['username']
+        ip = self.connection_worker.connect_kwargs['hostname']
+        port = self.connection_worker.connect_kwargs['port']
+        self.status_label.setText("连接失败")
+        self.status_label.setStyleSheet("color: #ff0000; font-size: 14px;")
+        
+        detailed_error = ""
+        if "Authentication failed" in error_msg:
+            detailed_error = f"用户名或密码错误\n用户名: {username}\n\n请检查:\n1. 用户名是否正确\n2. 密码是否正确\n3. 用户是否有SSH登录权限\n\n建议:\n- 尝试使用root用户登录\n- 检查用户密码是否正确\n- 确认用户没有被锁定"
+        elif "timeout" in error_msg.lower():
+            detailed_error = "连接超时，请检查:\n1. IP地址是否正确\n2. 端口号是否正确\n3. 网络连接是否正常\n4. 防火墙设置"
+        elif "Connection refused" in error_msg:
+            detailed_error = "连接被拒绝，请检查:\n1. 服务器是否开启SSH服务\n2. 防火墙是否阻止连接\n3. 端口号是否正确\n4. SSH服务是否在指定端口监听"
+        elif "No such file or directory" in error_msg:
+            detailed_error = "用户目录不存在，请检查:\n1. 用户是否已创建\n2. 用户主目录是否存在\n3. 用户shell是否正确设置"
+        elif "Permission denied" in error_msg:
+            detailed_error = "权限被拒绝，请检查:\n1. 用户是否有SSH登录权限\n2. 用户是否被禁用\n3. SSH配置是否允许该用户登录\n4. 用户shell是否正确"
+        elif "Host key verification failed" in error_msg:
+            detailed_error = "主机密钥验证失败\n这通常是正常的，程序会自动处理"
+        else:
+            detailed_error = f"连接错误: {error_msg}\n\n可能的解决方案:\n1. 检查SSH服务器配置\n2. 确认用户权限\n3. 尝试使用root用户登录\n4. 检查paramiko版本兼容性\n\n调试信息:\n- 用户名: {username}\n- 服务器: {ip}:{port}"
+        
+        QMessageBox.critical(self, "连接错误", detailed_error)
+        
+        # 重新启用所有输入框和连接按钮
+        self.enable_inputs()
+
+    def start_calibration(self):
+        """测试各加密算法、压缩和窗口参数的传输速度"""
+        reply = QMessageBox.question(self, "传输调优",
+                                     "将使用合成数据测试多种加密算法和传输参数，需要建立多次连接，是否继续？")
+        if reply != QMessageBox.Yes:
+            return
+        self.calibrate_btn.setEnabled(False)
+        self.status_label.setText("正在进行传输调优...")
+        self.status_label.setStyleSheet("color: white; font-size: 14px;")
+        self.calibration_worker = CalibrationWorker()
+        self.calibration_worker.progress_signal.connect(self.update_connect_progress)
+        self.calibration_worker.finished_signal.connect(self.calibration_finished)
+        self.calibration_worker.start()
+
+    def calibration_finished(self, success, message):
+        """显示调优结果"""
+        self.calibrate_btn.setEnabled(True)
+        if success:
+            self.status_label.setText("传输调优完成")
+            self.status_label.setStyleSheet("color: #00ff00; font-size: 14px;")
+            QMessageBox.information(self, "传输调优完成", f"{message}\n\n调优结果已保存，将在之后的连接中自动使用。")
+        else:
+            self.status_label.setText("传输调优失败")
             self.status_label.setStyleSheet("color: #ff0000; font-size: 14px;")
-            
-            detailed_error = ""
-            if "Authentication failed" in error_msg:
-                detailed_error = f"用户名或密码错误\n用户名: {username}\n\n请检查:\n1. 用户名是否正确\n2. 密码是否正确\n3. 用户是否有SSH登录权限\n\n建议:\n- 尝试使用root用户登录\n- 检查用户密码是否正确\n- 确认用户没有被锁定"
-            elif "timeout" in error_msg.lower():
-                detailed_error = "连接超时，请检查:\n1. IP地址是否正确\n2. 端口号是否正确\n3. 网络连接是否正常\n4. 防火墙设置"
-            elif "Connection refused" in error_msg:
-                detailed_error = "连接被拒绝，请检查:\n1. 服务器是否开启SSH服务\n2. 防火墙是否阻止连接\n3. 端口号是否正确\n4. SSH服务是否在指定端口监听"
-            elif "No such file or directory" in error_msg:
-                detailed_error = "用户目录不存在，请检查:\n1. 用户是否已创建\n2. 用户主目录是否存在\n3. 用户shell是否正确设置"
-            elif "Permission denied" in error_msg:
-                detailed_error = "权限被拒绝，请检查:\n1. 用户是否有SSH登录权限\n2. 用户是否被禁用\n3. SSH配置是否允许该用户登录\n4. 用户shell是否正确"
-            elif "Host key verification failed" in error_msg:
-                detailed_error = "主机密钥验证失败\n这通常是正常的，程序会自动处理"
-            else:
-                detailed_error = f"连接错误: {error_msg}\n\n可能的解决方案:\n1. 检查SSH服务器配置\n2. 确认用户权限\n3. 尝试使用root用户登录\n4. 检查paramiko版本兼容性\n\n调试信息:\n- 用户名: {username}\n- 服务器: {ip}:{port}"
-            
-            QMessageBox.critical(self, "连接错误", detailed_error)
-            
-            if ssh_client:
-                try:
-                    ssh_client.close()
-                except:
-                    pass
-            
-            # 重新启用所有输入框和连接按钮
-            self.enable_inputs()
+            QMessageBox.critical(self, "错误", f"传输调优失败：{message}")
 
     def disable_inputs(self):
         """连接成功后禁用输入框和连接按钮"""
@@ -0,0 +1,137 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import app_paths
+from dataset_convert import DatasetConverter, DtypePlanner, smallest_integer_type
+
+
+@pytest.fixture(autouse=True)
+def app_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_paths, "APP_DIR", str(tmp_path / "app"))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "count": rng.integers(0, 200, 250),
+        "ratio": rng.random(250),
+        "label": rng.integers(0, 3, 250),
+    })
+    frame.loc[5, "ratio"] = np.nan
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+    return path, frame
+
+
+def load_manifest(files):
+    with open(files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_npy_round_trip(csv_file):
+    path, frame = csv_file
+    converter = DatasetConverter(str(path), "label", "npy", "多分类", chunksize=64)
+    files = converter.convert()
+    X, y = np.load(files[0]), np.load(files[1])
+    assert X.dtype == np.float32 and y.dtype == np.int32
+    np.testing.assert_array_equal(X, frame[["count", "ratio"]].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(y, frame["label"].to_numpy())
+    manifest = load_manifest(files)
+    assert manifest["rows"] == 250
+    assert manifest["feature_columns"] == ["count", "ratio"]
+    assert manifest["files"] == ["data.X.npy", "data.y.npy"]
+
+
+def test_parquet_round_trip(csv_file):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path, frame = csv_file
+    files = DatasetConverter(str(path), "label", "parquet", "回归", chunksize=64).convert()
+    table = pq.read_table(files[0]).to_pandas()
+    assert list(table.columns) == ["count", "ratio", "label"]
+    assert str(table["label"].dtype) == "float32"
+    np.testing.assert_array_equal(table[["count", "ratio"]].to_numpy(),
+                                  frame[["count", "ratio"]].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(table["label"].to_numpy(), frame["label"].to_numpy(dtype=np.float32))
+
+
+def test_malformed_rows_are_skipped(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b,label\n1,2,0\n3,4,5,6\n5,6,1\n")
+    files = DatasetConverter(str(path), "label", "npy", "二分类").convert()
+    np.testing.assert_array_equal(np.load(files[0]), [[1, 2], [5, 6]])
+    np.testing.assert_array_equal(np.load(files[1]), [0, 1])
+
+
+def test_classification_label_must_be_integer(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,label\n1,0.5\n2,1\n")
+    with pytest.raises(Exception, match="必须是整数"):
+        DatasetConverter(str(path), "label", "npy", "二分类").convert()
+
+
+@pytest.mark.parametrize("minimum, maximum, expected", [
+    (0, 255, np.uint8),
+    (-1, 100, np.int8),
+    (-129, 0, np.int16),
+    (0, 70000, np.int32),
+    (0, 2 ** 40, np.int64),
+])
+def test_smallest_integer_type(minimum, maximum, expected):
+    assert smallest_integer_type(minimum, maximum) == np.dtype(expected)
+
+
+def test_planner_uses_ranges_across_chunks():
+    planner = DtypePlanner(max_categories=4)
+    planner.update(pd.DataFrame({"small": [1, 2], "byte": [0, 128], "grows": [1, 2], "missing": [1.0, 2.0],
+                                 "city": ["a", "b"], "mixed": [1, 2]}))
+    planner.update(pd.DataFrame({"small": [3, 4], "byte": [255, 0], "grows": [1, 300], "missing": [np.nan, 3.0],
+                                 "city": ["c", None], "mixed": ["x", "y"]}))
+    plan = planner.plan()
+    assert plan["small"] == ("int", np.dtype(np.int8))
+    assert plan["byte"] == ("int", np.dtype(np.uint8))
+    assert plan["grows"] == ("int", np.dtype(np.int16))
+    assert plan["missing"] == ("float", np.dtype(np.float32))
+    assert plan["city"] == ("category", ["a", "b", "c"])
+    # 前一块为数值、后一块出现字符串的列整体按字典编码
+    assert plan["mixed"] == ("category", ["1", "2", "x", "y"])
+
+
+def test_planner_rejects_high_cardinality_strings():
+    planner = DtypePlanner(max_categories=2)
+    planner.update(pd.DataFrame({"id": ["a", "b", "c"]}))
+    with pytest.raises(Exception, match="无法编码"):
+        planner.plan()
+
+
+def test_downcast_parquet_keeps_narrow_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "data.csv"
+    path.write_text("age,city,label\n30,bj,0\n41,sh,1\n25,,0\n")
+    converter = DatasetConverter(str(path), "label", "parquet", "二分类", downcast=True)
+    files = converter.convert()
+    table = pq.read_table(files[0])
+    assert str(table.schema.field("age").type) == "int8"
+    assert table.column("city").to_pylist() == [0, 1, None]
+    manifest = load_manifest(files)
+    assert manifest["feature_dtype"] == {"age": "int8", "city": "category"}
+    assert manifest["categories"] == {"city": ["bj", "sh"]}
+    assert converter.memory_after < converter.memory_before
+
+
+def test_downcast_npy_restores_missing_categories(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("age,city,label\n30,bj,0\n41,sh,1\n25,,0\n")
+    files = DatasetConverter(str(path), "label", "npy", "二分类", downcast=True).convert()
+    np.testing.assert_array_equal(np.load(files[0]), [[30, 0], [41, 1], [25, np.nan]])
+
+
+@pytest.mark.parametrize("output_format", ["npy", "parquet"])
+def test_no_rows_to_convert(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / "data.csv"
+    path.write_text("a,b,label\n")
+    with pytest.raises(Exception, match="没有可转换的数据行"):
+        DatasetConverter(str(path), "label", output_format, "二分类").convert()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import app_paths
+from dataset_sample import DatasetSampler
+
+
+@pytest.fixture(autouse=True)
+def app_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_paths, "APP_DIR", str(tmp_path / "app"))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    rng = np.random.default_rng(1)
+    labels = np.array([0] * 9950 + [1] * 48 + [2] * 2)
+    rng.shuffle(labels)
+    frame = pd.DataFrame({"id": np.arange(len(labels)), "label": labels})
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+    return str(path), frame
+
+
+def test_stratified_sample_hits_exact_class_counts(csv_file):
+    path, frame = csv_file
+    counts = frame["label"].value_counts().to_dict()
+    sampler = DatasetSampler(path, 0.1, label_column="label", class_counts=counts, seed=0, chunksize=777)
+    sample = pd.read_csv(sampler.sample())
+    # 每个类别恰好 round(行数 × 比例)，最少的类别至少保留一行
+    assert sample["label"].value_counts().to_dict() == {0: 995, 1: 5, 2: 1}
+    assert sampler.stratified and sampler.rows == len(frame) and sampler.sampled_rows == len(sample)
+
+
+def test_sample_keeps_original_rows_in_order(csv_file):
+    path, frame = csv_file
+    sample = pd.read_csv(DatasetSampler(path, 0.05, total_rows=len(frame), seed=3, chunksize=1000).sample())
+    assert len(sample) == 500
+    assert sample["id"].is_monotonic_increasing
+    assert (frame.set_index("id").loc[sample["id"], "label"].to_numpy() == sample["label"].to_numpy()).all()
+
+
+def test_same_seed_gives_same_sample(csv_file):
+    path, frame = csv_file
+    first = pd.read_csv(DatasetSampler(path, 0.1, total_rows=len(frame), seed=7).sample())
+    second = pd.read_csv(DatasetSampler(path, 0.1, total_rows=len(frame), seed=7).sample())
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_unknown_counts_fall_back_to_bernoulli(csv_file):
+    path, frame = csv_file
+    sampler = DatasetSampler(path, 0.1, seed=0, chunksize=1000)
+    sample = pd.read_csv(sampler.sample())
+    assert not sampler.stratified
+    assert 850 < len(sample) < 1150
+
+
+def test_stale_class_counts_still_sample_new_classes(csv_file):
+    path, frame = csv_file
+    # 统计中缺少类别2时，该类按比例随机抽取，不会出错
+    sampler = DatasetSampler(path, 0.5, label_column="label", class_counts={"0": 9950, "1": 48}, seed=0)
+    counts = pd.read_csv(sampler.sample())["label"].value_counts().to_dict()
+    assert counts[0] == 4975 and counts[1] == 24
@@ -0,0 +1,109 @@
+import hashlib
+import subprocess
+from concurrent.futures import Future
+import pytest
+from dataset_store import RemoteStore
+
+
+class CountingAgent:
+    """在本地计算摘要并记录调用次数的代理"""
+    def __init__(self):
+        self.hashed = []
+
+    def hash_file(self, path):
+        self.hashed.append(path)
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+
+class LocalSSHManager:
+    def __init__(self, host_key="board:22"):
+        self.agent = CountingAgent()
+        self.ssh_client = object()
+        self.host_key = host_key
+
+    def submit_command(self, command):
+        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        future = Future()
+        future.set_result((result.stdout, result.stderr, result.returncode))
+        return future
+
+
+@pytest.fixture(autouse=True)
+def verified(monkeypatch):
+    monkeypatch.setattr(RemoteStore, "_verified", set())
+    monkeypatch.setattr(RemoteStore, "_verified_client", None)
+
+
+@pytest.fixture
+def stored(tmp_path):
+    """存储中已有一个对象，返回 (存储根目录, 摘要, 长度)"""
+    data = b"label,x\n1,2\n"
+    digest = hashlib.sha256(data).hexdigest()
+    path = tmp_path / "cas" / digest[:2] / digest
+    path.parent.mkdir(parents=True)
+    path.write_bytes(data)
+    return str(tmp_path / "cas"), digest, len(data)
+
+
+def test_contains_checks_size_and_digest(stored):
+    root, digest, size = stored
+    store = RemoteStore(LocalSSHManager(), root=root)
+    assert store.contains(digest, size)
+    assert not store.contains(digest, size + 1)
+    assert not store.contains("0" * 64, size)
+
+
+def test_corrupt_object_is_deleted(stored):
+    root, digest, size = stored
+    store = RemoteStore(LocalSSHManager(), root=root)
+    with open(store.object_path(digest), "r+b") as f:
+        f.write(b"X")
+    assert not store.contains(digest, size)
+    assert subprocess.run(["test", "-e", store.object_path(digest)]).returncode != 0
+
+
+def test_verification_is_shared_between_stores(stored):
+    root, digest, size = stored
+    ssh_manager = LocalSSHManager()
+    assert RemoteStore(ssh_manager, root=root).contains(digest, size)
+    assert RemoteStore(ssh_manager, root=root).contains(digest, size)
+    assert len(ssh_manager.agent.hashed) == 1
+
+
+def test_verification_is_per_host_and_connection(stored):
+    root, digest, size = stored
+    ssh_manager = LocalSSHManager()
+    store = RemoteStore(ssh_manager, root=root)
+    assert store.contains(digest, size)
+    ssh_manager.host_key = "other:22"
+    assert store.contains(digest, size)
+    assert len(ssh_manager.agent.hashed) == 2
+    # 重连后重新校验
+    ssh_manager.host_key = "board:22"
+    ssh_manager.ssh_client = object()
+    assert store.contains(digest, size)
+    assert len(ssh_manager.agent.hashed) == 3
+
+
+def test_hash_error_is_a_miss_without_deleting(stored):
+    root, digest, size = stored
+    ssh_manager = LocalSSHManager()
+
+    def fail(path):
+        raise Exception("agent busy")
+
+    ssh_manager.agent.hash_file = fail
+    store = RemoteStore(ssh_manager, root=root)
+    assert not store.contains(digest, size)
+    assert subprocess.run(["test", "-e", store.object_path(digest)]).returncode == 0
+    # 之后能计算摘要时仍可命中
+    ssh_manager.agent = CountingAgent()
+    assert store.contains(digest, size)
+
+
+def test_sha256sum_fallback_without_agent(stored):
+    root, digest, size = stored
+    ssh_manager = LocalSSHManager()
+    ssh_manager.agent = None
+    assert RemoteStore(ssh_manager, root=root).contains(digest, size)
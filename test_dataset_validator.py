@@ -0,0 +1,85 @@
+import pytest
+from dataset_validator import LabelValidator, iter_chunks
+
+
+def write_labels(tmp_path, labels, extra=""):
+    path = tmp_path / "data.csv"
+    path.write_text("x,label\n" + "".join(f"{i},{label}\n" for i, label in enumerate(labels)) + extra)
+    return str(path)
+
+
+def check(tmp_path, labels, task_type, extra=""):
+    return LabelValidator(write_labels(tmp_path, labels, extra), "label", task_type, chunksize=3).check()
+
+
+def test_binary_labels_pass(tmp_path):
+    assert check(tmp_path, [0, 1, 1, 0, 1], "二分类") == ([], [])
+
+
+def test_binary_needs_exactly_two_classes(tmp_path):
+    errors, _ = check(tmp_path, [0, 1, 2, 1], "二分类")
+    assert errors == ["二分类任务的标签列 label 应恰好有2个类别，实际为 3 个"]
+
+
+def test_missing_and_infinite_labels_are_errors(tmp_path):
+    errors, _ = check(tmp_path, ["0", "", "1", "inf", "1"], "二分类")
+    assert "标签列 label 有 1 个缺失值" in errors
+    assert "标签列 label 有 1 个非有限值(inf)" in errors
+
+
+def test_multiclass_with_two_classes_warns(tmp_path):
+    errors, warnings_ = check(tmp_path, [0, 1, 0, 1], "多分类")
+    assert errors == [] and warnings_ == ["标签列 label 只有2个类别，建议使用二分类任务"]
+
+
+def test_multiclass_needs_two_classes(tmp_path):
+    errors, _ = check(tmp_path, [3, 3, 3], "多分类")
+    assert errors == ["多分类任务的标签列 label 至少需要2个类别，实际为 1 个"]
+
+
+def test_non_contiguous_classes_warn(tmp_path):
+    errors, warnings_ = check(tmp_path, [1, 2, 3, 1, 2, 3], "多分类")
+    assert errors == []
+    assert warnings_ == ["标签取值为 1, 2, 3，XGBoost要求类别编号为 0, 1, 2"]
+
+
+def test_float_class_labels_are_normalized(tmp_path):
+    assert check(tmp_path, ["0.0", "1.0", "1.0", "0.0"], "二分类") == ([], [])
+
+
+def test_imbalance_warns(tmp_path):
+    errors, warnings_ = check(tmp_path, [0] * 50 + [1] * 2, "二分类")
+    assert errors == []
+    assert warnings_ == ["类别不平衡: 最多类与最少类样本数之比为 25.0，最少的类别 1 只有 2 个样本"]
+
+
+def test_regression_needs_numeric_labels(tmp_path):
+    errors, _ = check(tmp_path, ["1.5", "abc", "2.5"], "回归")
+    assert errors == ["回归任务的标签列 label 必须是数值类型"]
+
+
+def test_regression_with_few_values_warns(tmp_path):
+    errors, warnings_ = check(tmp_path, [0, 1, 0, 1], "回归")
+    assert errors == [] and warnings_ == ["标签列 label 只有 2 个不同取值，可能更适合分类任务"]
+
+
+def test_too_many_classes(tmp_path, monkeypatch):
+    monkeypatch.setattr(LabelValidator, "MAX_CLASSES", 5)
+    errors, _ = check(tmp_path, range(10), "多分类")
+    assert errors == ["标签列 label 的不同取值超过 5 个，不适合分类任务"]
+
+
+def test_scan_skips_malformed_rows(tmp_path):
+    path = write_labels(tmp_path, [0, 1, 0], extra="9,9,9\n1,1\n")
+    stats = LabelValidator(path, "label", "二分类", chunksize=10).scan()
+    assert stats["rows"] == 4
+    assert stats["counts"] == {"0": 2, "1": 2}
+
+
+def test_iter_chunks_records_bad_lines(tmp_path):
+    path = write_labels(tmp_path, [0, 1], extra="5,5,5\n3,0\n4,1\n")
+    bad_lines = []
+    chunks = list(iter_chunks(path, chunksize=3, usecols=["label"], bad_lines=bad_lines))
+    assert [list(chunk.columns) for chunk in chunks] == [["label"], ["label"]]
+    assert [value for chunk in chunks for value in chunk["label"]] == [0, 1, 0, 1]
+    assert bad_lines == [4]
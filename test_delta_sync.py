@@ -0,0 +1,52 @@
+import hashlib
+import random
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from delta_sync import DeltaSync, choose_block_size, rolling_adler32
+from remote_agent import RemoteAgent
+
+
+@pytest.fixture
+def agent():
+    agent = RemoteAgent.start_local()
+    yield agent
+    agent.close()
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 8192])
+def test_rolling_adler32_matches_zlib(block_size):
+    rng = random.Random(block_size)
+    data = bytes(rng.getrandbits(8) for _ in range(3 * block_size + 100))
+    weak = rolling_adler32(np.frombuffer(data, dtype=np.uint8), block_size)
+    assert len(weak) == len(data) - block_size + 1
+    for start in [0, len(weak) - 1] + [rng.randrange(len(weak)) for _ in range(50)]:
+        assert int(weak[start]) == zlib.adler32(data[start:start + block_size])
+
+
+def test_rolling_adler32_on_saturated_bytes():
+    # 全部为0xff时窗口和最大，检查取模前不会溢出
+    data = b"\xff" * (1024 * 1024 + 10)
+    weak = rolling_adler32(np.frombuffer(data, dtype=np.uint8), 1024 * 1024)
+    assert [int(value) for value in weak] == [zlib.adler32(data[:1024 * 1024])] * 11
+
+
+def test_choose_block_size_bounds():
+    assert choose_block_size(0) == 8192
+    assert choose_block_size(10 ** 12) == 1024 * 1024
+
+
+def test_sync_sends_only_changed_data(agent, tmp_path):
+    rng = random.Random(0)
+    old = bytes(rng.getrandbits(8) for _ in range(200000))
+    new = old[:50000] + b"inserted" + old[50000:150000] + old[160000:]
+    remote = tmp_path / "remote.bin"
+    remote.write_bytes(old)
+    local = tmp_path / "local.bin"
+    local.write_bytes(new)
+    syncer = DeltaSync(SimpleNamespace(agent=agent))
+    assert syncer.sync(str(local), str(remote)) == hashlib.sha256(new).hexdigest()
+    assert remote.read_bytes() == new
+    assert syncer.copied_bytes > 150000
+    assert syncer.literal_bytes + syncer.copied_bytes == len(new)
@@ -0,0 +1,79 @@
+import json
+import pytest
+from job_queue import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.json")
+
+
+def add(queue, target="开发板", **kwargs):
+    return queue.add("train.py", "/data/set", "二分类", target, **kwargs)
+
+
+def test_jobs_persist_across_reload(path):
+    queue = JobQueue(path)
+    job = add(queue, params={"max_depth": 6}, priority=2)
+    reloaded = JobQueue(path)
+    assert reloaded.get(job["id"]) == job
+    assert add(reloaded)["id"] == job["id"] + 1
+
+
+def test_reload_requeues_running_jobs(path):
+    queue = JobQueue(path)
+    add(queue, max_retries=0)
+    job = queue.start_next({"开发板": 1})
+    assert job["status"] == RUNNING and job["attempts"] == 1
+    # 模拟应用在任务运行时退出
+    job = JobQueue(path).get(job["id"])
+    assert job["status"] == QUEUED
+    assert job["attempts"] == 0
+    assert job["error"] == "应用退出时任务被中断"
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["jobs"][0]["status"] == QUEUED
+
+
+def test_priority_then_insertion_order(path):
+    queue = JobQueue(path)
+    low = add(queue)
+    high = add(queue, priority=5)
+    later = add(queue)
+    limits = {"开发板": 3}
+    assert [queue.start_next(limits)["id"] for _ in range(3)] == [high["id"], low["id"], later["id"]]
+    assert queue.start_next(limits) is None
+
+
+def test_limits_are_per_target(path):
+    queue = JobQueue(path)
+    add(queue, target="开发板")
+    add(queue, target="开发板")
+    local = add(queue, target="本机")
+    limits = {"开发板": 1, "本机": 1}
+    assert queue.start_next(limits)["target"] == "开发板"
+    assert queue.start_next(limits)["id"] == local["id"]
+    assert queue.start_next(limits) is None
+
+
+def test_failed_jobs_retry_until_exhausted(path):
+    queue = JobQueue(path)
+    job = add(queue, max_retries=1)
+    queue.start_next({})
+    assert queue.finish(job["id"], False, "exit 1")["status"] == QUEUED
+    queue.start_next({})
+    finished = queue.finish(job["id"], False, "exit 1")
+    assert finished["status"] == FAILED and finished["attempts"] == 2
+    assert queue.finish(job["id"], True) is None
+
+
+def test_cancel_only_affects_queued_jobs(path):
+    queue = JobQueue(path)
+    running = add(queue)
+    waiting = add(queue)
+    queue.start_next({})
+    assert not queue.cancel(running["id"])
+    assert queue.cancel(waiting["id"])
+    queue.finish(running["id"], True)
+    assert [job["status"] for job in queue.snapshot()] == [SUCCEEDED, CANCELLED]
+    queue.clear_finished()
+    assert queue.snapshot() == []
@@ -0,0 +1,96 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from remote_agent import RemoteAgent
+
+
+@pytest.fixture
+def agent():
+    agent = RemoteAgent.start_local()
+    yield agent
+    agent.close()
+
+
+def test_ping(agent):
+    assert agent.ping(timeout=5)["pid"] > 0
+
+
+def test_concurrent_requests_are_matched_by_id(agent):
+    # 先发出的请求耗时更长，响应乱序返回
+    futures = [agent.submit("run", command=f"sleep {0.05 * (8 - i)}; echo {i}") for i in range(8)]
+    assert [future.result(10)["stdout"].strip() for future in futures] == [str(i) for i in range(8)]
+
+
+def test_requests_from_many_threads(agent):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: agent.run(f"echo {i}")[0].strip(), range(32)))
+    assert results == [str(i) for i in range(32)]
+
+
+def test_run_reports_stderr_and_exit_status(agent, tmp_path):
+    stdout, stderr, exit_status = agent.run("echo out; echo err >&2; exit 3", cwd=str(tmp_path))
+    assert (stdout, stderr, exit_status) == ("out\n", "err\n", 3)
+
+
+def test_stat_and_mkdir(agent, tmp_path):
+    path = tmp_path / "a" / "b"
+    assert agent.stat(str(path)) == {"exists": False}
+    assert agent.mkdir(str(path))["is_dir"]
+    assert agent.mkdir(str(path))["is_dir"]
+    result = agent.stat(str(path))
+    assert result["exists"] and result["is_dir"]
+
+
+def test_hash_file_and_ranges(agent, tmp_path):
+    data = bytes(range(256)) * 10000
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    assert agent.hash_file(str(path)) == hashlib.sha256(data).hexdigest()
+    ranges = [(0, 1000), (1000, 500000), (len(data) - 10, 10)]
+    assert agent.hash_file(str(path), ranges=ranges) == [
+        hashlib.sha256(data[offset:offset + length]).hexdigest() for offset, length in ranges]
+
+
+@pytest.mark.parametrize("content, lines, expected", [
+    ("1\n2\n3\n4\n5\n", 3, "3\n4\n5\n"),
+    ("1\n2\n3\n4\n5", 3, "3\n4\n5"),
+    ("1\n2\n", 10, "1\n2\n"),
+    ("1\n2\n", 0, ""),
+])
+def test_tail(agent, tmp_path, content, lines, expected):
+    path = tmp_path / "log.txt"
+    path.write_text(content)
+    assert agent.tail(str(path), lines=lines) == expected
+
+
+def test_tail_large_file(agent, tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(100000)))
+    assert agent.tail(str(path), lines=2) == "line 99998\nline 99999\n"
+
+
+def test_patch_payload_and_commit(agent, tmp_path):
+    base = tmp_path / "base.bin"
+    base.write_bytes(b"0123456789")
+    target = tmp_path / "target.part"
+    new = b"0123" + b"\x00\xffNEW" + b"6789"
+    agent.request("patch", payload=b"\x00\xffNEW", base=str(base), target=str(target), reset=True,
+                  ops=[["c", 0, 4], ["d", 5], ["c", 6, 4]])
+    agent.request("commit", target=str(target), path=str(base), sha256=hashlib.sha256(new).hexdigest())
+    assert base.read_bytes() == new
+
+
+def test_errors_do_not_break_the_channel(agent, tmp_path):
+    with pytest.raises(Exception, match="unknown op"):
+        agent.request("nope", timeout=5)
+    with pytest.raises(Exception, match="FileNotFoundError"):
+        agent.hash_file(str(tmp_path / "missing"))
+    assert agent.ping(timeout=5)
+
+
+def test_close_fails_new_requests():
+    agent = RemoteAgent.start_local()
+    agent.close()
+    assert agent.closed
+    with pytest.raises(Exception):
+        agent.ping(timeout=5)
@@ -0,0 +1,98 @@
+import queue
+import paramiko
+import pytest
+import app_paths
+from ssh_manager import SSHManager
+
+
+class EchoChannel:
+    """在内存中回显写入数据的通道，模拟远程 cat"""
+    def __init__(self):
+        self._data = queue.Queue()
+
+    def exec_command(self, command):
+        assert command == "cat"
+
+    def sendall(self, data):
+        for offset in range(0, len(data), 32768):
+            self._data.put(data[offset:offset + 32768])
+
+    def shutdown_write(self):
+        self._data.put(b"")
+
+    def recv(self, size):
+        return self._data.get(timeout=5)
+
+    def close(self):
+        pass
+
+
+class StubTransport:
+    def __init__(self):
+        self.default_window_size = paramiko.common.DEFAULT_WINDOW_SIZE
+        self.default_max_packet_size = paramiko.common.DEFAULT_MAX_PACKET_SIZE
+        self.sessions = []
+
+    def set_keepalive(self, interval):
+        pass
+
+    def open_session(self, window_size=None, max_packet_size=None):
+        # 与 paramiko 相同，未指定时使用 transport 的默认值并做范围限制
+        window_size = window_size if window_size is not None else self.default_window_size
+        max_packet_size = max_packet_size if max_packet_size is not None else self.default_max_packet_size
+        self.sessions.append((max(paramiko.common.MIN_WINDOW_SIZE, window_size),
+                              max(paramiko.common.MIN_PACKET_SIZE, max_packet_size)))
+        return EchoChannel()
+
+
+class StubClient:
+    connected = []
+
+    def __init__(self):
+        self.transport = StubTransport()
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, **kwargs):
+        StubClient.connected.append(kwargs)
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_paths, "APP_DIR", str(tmp_path))
+    monkeypatch.setattr(paramiko, "SSHClient", StubClient)
+    StubClient.connected = []
+    manager = SSHManager()
+    manager._connect_kwargs = {"hostname": "board", "port": 22}
+    return manager
+
+
+def test_calibrate_saves_a_complete_profile(manager):
+    best, results = manager.calibrate(payload_size=64 * 1024)
+    assert len(results) == 2 * (len(paramiko.Transport._preferred_ciphers) - 1)
+    assert best["cipher"] in paramiko.Transport._preferred_ciphers
+    assert isinstance(best["window_size"], int) and isinstance(best["max_packet_size"], int)
+    assert manager.load_transfer_profile(manager._connect_kwargs) == best
+
+
+def test_calibrate_connects_once_per_cipher_and_compression(manager):
+    manager.calibrate(payload_size=64 * 1024)
+    # 每个算法组合都建立了一次连接，且只禁用了被测算法以外的算法
+    assert len(StubClient.connected) == len(paramiko.Transport._preferred_ciphers) * 2 - 2
+    for kwargs in StubClient.connected:
+        assert len(kwargs["disabled_algorithms"]["ciphers"]) == len(paramiko.Transport._preferred_ciphers) - 1
+
+
+def test_open_client_applies_saved_window(manager):
+    profile = {"cipher": "aes128-ctr", "compress": False, "window_size": 8 * 1024 * 1024,
+               "max_packet_size": 131072, "throughput": 1.0}
+    manager.save_transfer_profile(manager._connect_kwargs, profile)
+    transport = manager.open_client(manager._connect_kwargs).get_transport()
+    assert (transport.default_window_size, transport.default_max_packet_size) == (8 * 1024 * 1024, 131072)
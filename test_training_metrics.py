@@ -0,0 +1,58 @@
+import math
+import random
+import pytest
+from training_metrics import TrainingMetrics, lttb
+
+
+def test_parses_xgboost_log_lines():
+    metrics = TrainingMetrics(start_time=100.0)
+    assert metrics.feed("[0]\ttrain-logloss:0.69\teval-logloss:0.70", 101.0)
+    assert metrics.feed("[1]\ttrain-logloss:0.55\teval-logloss:0.60\n", 102.5)
+    assert not metrics.feed("Training finished", 103.0)
+    series = metrics.series[("eval", "logloss")]
+    assert list(series.iterations) == [0, 1]
+    assert list(series.values) == [0.70, 0.60]
+    assert list(series.elapsed) == [1.0, 2.5]
+    assert metrics.metrics() == ["logloss"]
+    assert [item.name for item in metrics.series_for("logloss")] == ["train-logloss", "eval-logloss"]
+    assert (metrics.last_iteration, metrics.last_update) == (1, 102.5)
+
+
+def test_metric_names_with_dashes_and_symbols():
+    metrics = TrainingMetrics(start_time=0.0)
+    assert metrics.feed("[5]\tvalidation_0-rmse:1.25\teval-error@0.5:0.1\tbad-token:nan?", 1.0)
+    assert set(metrics.series) == {("validation_0", "rmse"), ("eval", "error@0.5")}
+
+
+def test_parses_json_side_channel():
+    metrics = TrainingMetrics(start_time=0.0)
+    assert metrics.feed('{"iteration": 3, "train-auc": 0.9, "loss": 0.4, "elapsed": 2, "done": true}', 1.0)
+    assert set(metrics.series) == {("train", "auc"), ("", "loss")}
+    assert metrics.series[("", "loss")].name == "loss"
+    assert not metrics.feed('{"epoch": 1, "loss": 0.3}', 2.0)
+    assert not metrics.feed('{"iteration": 1', 2.0)
+    assert not metrics.feed('[1, 2]', 2.0)
+
+
+@pytest.mark.parametrize("count, threshold", [(1000, 100), (10, 3), (5000, 4), (101, 100)])
+def test_lttb_keeps_endpoints_and_size(count, threshold):
+    rng = random.Random(count)
+    xs = list(range(count))
+    ys = [rng.random() for _ in xs]
+    indices = lttb(xs, ys, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == count - 1
+    assert indices == sorted(set(indices))
+
+
+@pytest.mark.parametrize("count, threshold", [(50, 100), (50, 50), (50, 2), (0, 10)])
+def test_lttb_returns_everything_when_not_reducing(count, threshold):
+    xs = list(range(count))
+    assert lttb(xs, xs, threshold) == xs
+
+
+def test_lttb_keeps_spikes():
+    xs = list(range(10000))
+    ys = [math.sin(x / 500) for x in xs]
+    ys[4321] = 50.0
+    assert 4321 in lttb(xs, ys, 200)
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import random
+import subprocess
+from concurrent.futures import Future
+from contextlib import contextmanager
+import pytest
+import app_paths
+from remote_agent import RemoteAgent
+from upload_engine import ChunkedUploader, TransferControl, UploadManifest
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LocalFile:
+    def __init__(self, path, mode, writes):
+        self._file = open(path, {"wb": "wb", "rb": "rb", "r+": "r+b"}[mode])
+        self._path = path
+        self._writes = writes
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def seek(self, offset):
+        self._file.seek(offset)
+
+    def write(self, data):
+        self._writes.append((self._path, self._file.tell()))
+        self._file.write(data)
+
+    def truncate(self, size):
+        self._file.truncate(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+
+class LocalSFTP:
+    def __init__(self, writes):
+        self._writes = writes
+
+    def open(self, path, mode, bufsize=-1):
+        return LocalFile(path, mode, self._writes)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            raise IOError(path)
+
+    def stat(self, path):
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            raise IOError(path)
+
+
+class LocalSSHManager:
+    """以本地文件系统和本地代理代替开发板的 SSHManager"""
+    def __init__(self, agent):
+        self.agent = agent
+        self.writes = []
+
+    @contextmanager
+    def sftp_session(self):
+        yield LocalSFTP(self.writes)
+
+    def submit_command(self, command):
+        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        future = Future()
+        future.set_result((result.stdout, result.stderr, result.returncode))
+        return future
+
+    def execute_command(self, command):
+        stdout, stderr, _ = self.submit_command(command).result()
+        return stdout, stderr
+
+
+@pytest.fixture
+def ssh_manager(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_paths, "APP_DIR", str(tmp_path / "app"))
+    agent = RemoteAgent.start_local()
+    yield LocalSSHManager(agent)
+    agent.close()
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / "data.csv"
+    path.write_bytes(bytes(rng.getrandbits(8) for _ in range(5 * CHUNK_SIZE + 123)))
+    return path
+
+
+def written_offsets(ssh_manager, path):
+    """被写入过的数据块偏移"""
+    return {offset // CHUNK_SIZE * CHUNK_SIZE for written, offset in ssh_manager.writes if written == path}
+
+
+def test_upload_writes_part_then_renames(ssh_manager, local_file, tmp_path):
+    remote = tmp_path / "remote.csv"
+    remote.write_bytes(b"old")
+    uploader = ChunkedUploader(ssh_manager, chunk_size=CHUNK_SIZE, sessions=3)
+    digest = uploader.upload(str(local_file), str(remote))
+    assert digest == hashlib.sha256(local_file.read_bytes()).hexdigest()
+    assert remote.read_bytes() == local_file.read_bytes()
+    assert not os.path.exists(f"{remote}.part")
+    assert not uploader.has_resume_point(str(local_file), str(remote))
+
+
+@pytest.mark.parametrize("size", [0, 100, CHUNK_SIZE, 2 * CHUNK_SIZE + 1])
+def test_upload_small_and_boundary_sizes(ssh_manager, tmp_path, size):
+    local = tmp_path / "small.csv"
+    local.write_bytes(os.urandom(size))
+    remote = tmp_path / "remote.csv"
+    ChunkedUploader(ssh_manager, chunk_size=CHUNK_SIZE, sessions=4).upload(str(local), str(remote))
+    assert remote.read_bytes() == local.read_bytes()
+
+
+def test_manifest_round_trip(ssh_manager, local_file):
+    manifest = UploadManifest(str(local_file), "/remote/data.csv.part", CHUNK_SIZE)
+    manifest.mark_done(0, "a" * 64)
+    manifest.mark_done(CHUNK_SIZE, "b" * 64)
+    manifest.save()
+    assert UploadManifest(str(local_file), "/remote/data.csv.part", CHUNK_SIZE).chunks == {
+        0: "a" * 64, CHUNK_SIZE: "b" * 64}
+    # 分块大小或本地文件变化后旧清单作废
+    assert UploadManifest(str(local_file), "/remote/data.csv.part", CHUNK_SIZE * 2).chunks == {}
+    os.utime(local_file, (0, 0))
+    assert UploadManifest(str(local_file), "/remote/data.csv.part", CHUNK_SIZE).chunks == {}
+
+
+def test_cancelled_upload_keeps_target_and_resume_point(ssh_manager, local_file, tmp_path):
+    remote = tmp_path / "remote.csv"
+    remote.write_bytes(b"old")
+    control = TransferControl()
+    control.cancel()
+    uploader = ChunkedUploader(ssh_manager, chunk_size=CHUNK_SIZE, sessions=1)
+    with pytest.raises(Exception, match="上传已取消"):
+        uploader.upload(str(local_file), str(remote), control=control)
+    assert remote.read_bytes() == b"old"
+    assert os.path.exists(f"{remote}.part")
+
+
+def test_resume_skips_finished_chunks(ssh_manager, local_file, tmp_path):
+    remote = tmp_path / "remote.csv"
+    data = local_file.read_bytes()
+    part = f"{remote}.part"
+    # 模拟上次上传写完了前三个数据块，其中第二块在远程已损坏
+    with open(part, "wb") as f:
+        f.write(data[:3 * CHUNK_SIZE])
+        f.truncate(len(data))
+    with open(part, "r+b") as f:
+        f.seek(CHUNK_SIZE)
+        f.write(b"corrupt")
+    manifest = UploadManifest(str(local_file), part, CHUNK_SIZE)
+    for offset in range(0, 3 * CHUNK_SIZE, CHUNK_SIZE):
+        manifest.mark_done(offset, hashlib.sha256(data[offset:offset + CHUNK_SIZE]).hexdigest())
+    manifest.save()
+
+    uploader = ChunkedUploader(ssh_manager, chunk_size=CHUNK_SIZE, sessions=2)
+    assert uploader.has_resume_point(str(local_file), str(remote))
+    uploader.upload(str(local_file), str(remote))
+    assert remote.read_bytes() == data
+    assert uploader.skipped_bytes == 2 * CHUNK_SIZE
+    assert written_offsets(ssh_manager, part) == {CHUNK_SIZE, 3 * CHUNK_SIZE, 4 * CHUNK_SIZE, 5 * CHUNK_SIZE}
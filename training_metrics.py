@@ -0,0 +1,140 @@
+import json
+import re
+from array import array
+
+# XGBoost 评估日志：[12]	train-logloss:0.31	eval-logloss:0.35
+ITERATION_LINE = re.compile(r'^\[(\d+)\]\s+(.*)$')
+# 名称中数据集与指标以第一个 '-' 分隔，如 validation_0-rmse、eval-error@0.5
+METRIC_TOKEN = re.compile(r'^([^\s:-]+)-(\S+):(\S+)$')
+
+
+class MetricSeries:
+    """一条指标曲线，按迭代顺序保存在紧凑数组中"""
+    def __init__(self, dataset, metric):
+        self.dataset = dataset
+        self.metric = metric
+        self.iterations = array('d')
+        self.values = array('d')
+        self.elapsed = array('d')
+
+    @property
+    def name(self):
+        return f"{self.dataset}-{self.metric}" if self.dataset else self.metric
+
+    def append(self, iteration, value, elapsed):
+        self.iterations.append(iteration)
+        self.values.append(value)
+        self.elapsed.append(elapsed)
+
+
+class TrainingMetrics:
+    """从训练输出中解析指标时间序列
+
+    支持 XGBoost 的评估日志行，以及每行一个JSON对象的旁路输出，
+    如 {"iteration": 3, "train-logloss": 0.4, "eval-logloss": 0.45}。
+    """
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.series = {}
+        self.last_iteration = None
+        self.last_update = None
+
+    def metrics(self):
+        """出现过的指标名称，按首次出现的顺序"""
+        return list(dict.fromkeys(series.metric for series in self.series.values()))
+
+    def series_for(self, metric):
+        return [series for series in self.series.values() if series.metric == metric]
+
+    def feed(self, line, timestamp):
+        """解析一行输出，得到指标时返回True"""
+        line = line.strip()
+        if line.startswith('{'):
+            values = self._parse_json(line)
+        else:
+            values = self._parse_log(line)
+        if not values:
+            return False
+        iteration, pairs = values
+        elapsed = timestamp - self.start_time
+        for (dataset, metric), value in pairs:
+            key = (dataset, metric)
+            if key not in self.series:
+                self.series[key] = MetricSeries(dataset, metric)
+            self.series[key].append(iteration, value, elapsed)
+        self.last_iteration = iteration
+        self.last_update = timestamp
+        return True
+
+    @staticmethod
+    def _parse_log(line):
+        match = ITERATION_LINE.match(line)
+        if not match:
+            return None
+        pairs = []
+        for token in match.group(2).split():
+            metric = METRIC_TOKEN.match(token)
+            if not metric:
+                continue
+            try:
+                value = float(metric.group(3))
+            except ValueError:
+                continue
+            pairs.append(((metric.group(1), metric.group(2)), value))
+        return (int(match.group(1)), pairs) if pairs else None
+
+    @staticmethod
+    def _parse_json(line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+        iteration = record.get("iteration", record.get("iter"))
+        if not isinstance(iteration, (int, float)):
+            return None
+        pairs = []
+        for key, value in record.items():
+            if key in ("iteration", "iter", "elapsed") or isinstance(value, bool) \
+                    or not isinstance(value, (int, float)):
+                continue
+            dataset, _, metric = key.partition('-')
+            pairs.append(((dataset, metric) if metric else ("", dataset), float(value)))
+        return (iteration, pairs) if pairs else None
+
+
+def lttb(xs, ys, threshold):
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的下标
+
+    保留首尾点，其余点按桶选取与相邻桶构成三角形面积最大的点，
+    在点数远少于原始数据时仍能保留曲线的形状和尖峰。
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+    indices = [0]
+    bucket = (count - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        # 下一个桶的平均点
+        next_start = end
+        next_end = min(int((i + 2) * bucket) + 1, count)
+        if next_start >= next_end:
+            average_x, average_y = xs[count - 1], ys[count - 1]
+        else:
+            span = next_end - next_start
+            average_x = sum(xs[next_start:next_end]) / span
+            average_y = sum(ys[next_start:next_end]) / span
+        x0, y0 = xs[previous], ys[previous]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x0 - average_x) * (ys[j] - y0) - (x0 - xs[j]) * (average_y - y0))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        previous = best
+    indices.append(count - 1)
+    return indices
@@ -1,9 +1,20 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, 
-                           QMessageBox, QApplication, QLabel, QComboBox, QGroupBox, QListWidget, QDialog, QVBoxLayout as QVBoxLayoutDialog)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, 
+                           QMessageBox, QLabel, QComboBox, QGroupBox, QListWidget, QDialog, QVBoxLayout as QVBoxLayoutDialog,
+                           QSpinBox, QLineEdit, QTableWidget, QTableWidgetItem, QAbstractItemView)
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, QPointF, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
 from global_state import GlobalState
+from app_paths import get_app_path
+from ssh_manager import SSHManager
+from log_sink import LogSink
+from process_output import iter_process_lines, iter_stream_lines
+from training_metrics import TrainingMetrics, lttb
+from job_queue import JobQueue
+import math
+import json
 import time
 import os
+import shlex
 import subprocess
 import sys
 
@@ -148,15 +159,63 @@ class LocalFileDialog(QDialog):
             self.accept()
 
 class ExecutionThread(QThread):
-    """脚本执行进程"""
+    """脚本执行进程，指定 remote_dir 时在开发板上以该目录为工作目录执行"""
     update_signal = pyqtSignal(str)
+    # 脚本输出行：(流名称 stdout/stderr, 单调时间戳, 行文本)
+    line_signal = pyqtSignal(str, float, str)
     finished_signal = pyqtSignal(bool)
     
-    def __init__(self, script_path):
+    def __init__(self, script_path, remote_dir=None, params=None):
         super().__init__()
         self.script_path = script_path
+        self.remote_dir = remote_dir
+        # 脚本参数，以 --名称=值 的形式追加到命令行
+        self.args = [f"--{name}={value}" for name, value in (params or {}).items()]
     
     def run(self):
+        if self.remote_dir:
+            self.run_remote()
+        else:
+            self.run_local()
+    
+    def emit_lines(self, lines):
+        """按到达顺序转发脚本输出，文本同时送往输出框"""
+        for name, timestamp, line in lines:
+            self.line_signal.emit(name, timestamp, line)
+            self.update_signal.emit(line)
+    
+    def run_remote(self):
+        """上传脚本到数据集目录，通过SSH执行并逐行回传stdout和stderr"""
+        try:
+            ssh_manager = SSHManager.get_instance()
+            script_name = os.path.basename(self.script_path)
+            remote_script = f"{self.remote_dir}/{script_name}"
+            self.update_signal.emit(f"\n开始在开发板上执行脚本: {self.script_path}")
+            self.update_signal.emit(f"工作目录: {self.remote_dir}")
+            
+            with ssh_manager.sftp_session() as sftp:
+                sftp.put(self.script_path, remote_script)
+            
+            # -u 关闭输出缓冲，训练日志产生后立即回传
+            command = f"cd {shlex.quote(self.remote_dir)} && python3 -u " + \
+                " ".join(shlex.quote(arg) for arg in [script_name] + self.args)
+            self.update_signal.emit(f"执行命令: {command}")
+            
+            with ssh_manager.stream_command(command) as stream:
+                self.emit_lines(iter_stream_lines(stream))
+            
+            exit_status = stream.exit_status
+            if exit_status != 0:
+                self.update_signal.emit(f"脚本执行失败，退出状态码: {exit_status}")
+                self.finished_signal.emit(False)
+            else:
+                self.update_signal.emit("脚本执行完成！")
+                self.finished_signal.emit(True)
+        except Exception as e:
+            self.update_signal.emit(f"执行出错: {str(e)}")
+            self.finished_signal.emit(False)
+    
+    def run_local(self):
         try:
             # 执行本地脚本
             self.update_signal.emit(f"\n开始执行本地脚本: {self.script_path}")
@@ -175,10 +234,14 @@ class ExecutionThread(QThread):
             
             # 构建执行命令
             command = f"cd {script_dir} && python3 {script_name}"
+            if self.args:
+                command += " " + (subprocess.list2cmdline(self.args) if os.name == 'nt'
+                                  else " ".join(shlex.quote(arg) for arg in self.args))
             
             self.update_signal.emit(f"执行命令: {command}")
             
-            # 使用subprocess执行命令
+            # 使用subprocess执行命令，关闭Python输出缓冲以保留stdout与stderr的先后顺序；
+            # 子进程输出固定为UTF-8，与读取时的编码一致（Windows默认使用本地代码页）
             process = subprocess.Popen(
                 command,
                 shell=True,
@@ -186,24 +249,17 @@ class ExecutionThread(QThread):
                 stderr=subprocess.PIPE,
                 text=True,
                 bufsize=1,
-                universal_newlines=True
+                encoding='utf-8',
+                errors='replace',
+                env=dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
             )
             
-            # 实时获取输出
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    self.update_signal.emit(output.strip())
+            # 同时读取stdout和stderr，任一管道写满都不会使脚本停住
+            self.emit_lines(iter_process_lines(process))
             
             # 获取退出状态
-            exit_status = process.poll()
+            exit_status = process.wait()
             if exit_status != 0:
-                # 获取错误输出
-                stderr_output = process.stderr.read()
-                if stderr_output:
-                    self.update_signal.emit(f"错误输出: {stderr_output}")
                 self.update_signal.emit(f"脚本执行失败，退出状态码: {exit_status}")
                 self.finished_signal.emit(False)
             else:
@@ -214,7 +270,159 @@ class ExecutionThread(QThread):
             self.update_signal.emit(f"执行出错: {str(e)}")
             self.finished_signal.emit(False)
 
+class MetricsChart(QWidget):
+    """训练指标实时曲线，每条曲线按控件宽度用LTTB降采样后绘制"""
+    COLORS = ["#4fc3f7", "#ffb74d", "#81c784", "#e57373", "#ba68c8", "#fff176"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.metrics = None
+        self.metric = None
+        self._cache = {}
+        self.setMinimumHeight(220)
+    
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+        self.metric = None
+        self._cache.clear()
+        self.update()
+    
+    def set_metric(self, metric):
+        self.metric = metric or None
+        self.update()
+    
+    def points(self, series, threshold):
+        """降采样后的点，数据长度和宽度不变时复用上次结果"""
+        key = (series.name, len(series.values), threshold)
+        cached = self._cache.get(series.name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        finite = [(x, y) for x, y in zip(series.iterations, series.values) if math.isfinite(y)]
+        xs = [x for x, _ in finite]
+        ys = [y for _, y in finite]
+        points = [(xs[i], ys[i]) for i in lttb(xs, ys, threshold)]
+        self._cache[series.name] = (key, points)
+        return points
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        painter.setPen(QColor("white"))
+        if self.metrics is None or not self.metric:
+            painter.drawText(self.rect(), Qt.AlignCenter, "等待训练指标...")
+            return
+        
+        left, top, right, bottom = 60, 30, self.width() - 20, self.height() - 30
+        if right - left < 10 or bottom - top < 10:
+            return
+        all_series = self.metrics.series_for(self.metric)
+        curves = [(series, self.points(series, max(3, (right - left) // 2))) for series in all_series]
+        values = [point for _, points in curves for point in points]
+        if not values:
+            return
+        x_min = min(x for x, _ in values)
+        x_max = max(x for x, _ in values)
+        y_min = min(y for _, y in values)
+        y_max = max(y for _, y in values)
+        x_span = (x_max - x_min) or 1.0
+        y_span = (y_max - y_min) or 1.0
+        
+        # 坐标轴与刻度
+        painter.setPen(QColor("#666666"))
+        painter.drawRect(left, top, right - left, bottom - top)
+        painter.setPen(QColor("white"))
+        painter.drawText(5, top + 10, f"{y_max:.4g}")
+        painter.drawText(5, bottom, f"{y_min:.4g}")
+        painter.drawText(left, bottom + 20, f"{x_min:g}")
+        painter.drawText(right - 60, bottom + 20, f"{x_max:g}")
+        
+        # 迭代进度及距上次更新的时间，便于发现停滞
+        status = f"{self.metric}  迭代 {self.metrics.last_iteration}"
+        if self.metrics.last_update is not None:
+            status += f"  已用 {self.metrics.last_update - self.metrics.start_time:.0f}s"
+            status += f"  距上次更新 {time.monotonic() - self.metrics.last_update:.0f}s"
+        painter.drawText(left, top - 10, status)
+        
+        painter.setRenderHint(QPainter.Antialiasing)
+        for index, (series, points) in enumerate(curves):
+            color = QColor(self.COLORS[index % len(self.COLORS)])
+            painter.setPen(QPen(color, 2))
+            painter.drawPolyline(QPolygonF([
+                QPointF(left + (x - x_min) / x_span * (right - left),
+                        bottom - (y - y_min) / y_span * (bottom - top))
+                for x, y in points]))
+            if len(series.values):
+                painter.drawText(right - 220, top + 20 + index * 18, f"{series.name}: {series.values[-1]:.5g}")
+
+class JobScheduler(QObject):
+    """按执行位置的并发上限依次运行队列中的任务，输出写入各自的日志文件
+
+    调度器与任务队列一样在整个应用中只有一个，不随训练页面的创建和销毁而改变；
+    页面只连接 jobs_changed 显示任务状态。
+    """
+    jobs_changed = pyqtSignal()
+    _instance = None
+    # 开发板任务运行时各占用一个SSH通道（先上传脚本再执行，不同时占用两个）；
+    # 通道池的一半留给交互命令、数据上传和远程代理，任务最多使用另一半
+    MAX_LIMITS = {"开发板": SSHManager.MAX_CHANNELS // 2, "本机": 4}
+    
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = JobScheduler(JobQueue.get_instance())
+        return cls._instance
+    
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+        self.limits = {"开发板": 1, "本机": 1}
+        self.running = False
+        self.threads = set()
+    
+    def start(self):
+        self.running = True
+        self.schedule()
+    
+    def pause(self):
+        """暂停调度，已在运行的任务继续完成"""
+        self.running = False
+        self.jobs_changed.emit()
+    
+    def set_limit(self, target, value):
+        """设置执行位置的并发上限，不超过为任务预留的名额"""
+        self.limits[target] = max(1, min(value, self.MAX_LIMITS[target]))
+        self.schedule()
+    
+    def schedule(self):
+        """启动所有未超出并发上限的等待任务"""
+        while self.running:
+            job = self.queue.start_next(self.limits)
+            if job is None:
+                break
+            self.launch(job)
+        self.jobs_changed.emit()
+    
+    def launch(self, job):
+        log_path = get_app_path("logs", f"job_{job['id']}_{job['attempts']}.log")
+        log = open(log_path, "w", encoding="utf-8")
+        remote_dir = job["dataset_dir"] if job["target"] == "开发板" else None
+        thread = ExecutionThread(job["script"], remote_dir, job["params"])
+        thread.update_signal.connect(lambda text: log.write(text + "\n"))
+        thread.finished_signal.connect(
+            lambda success: self.job_finished(job["id"], success, log_path))
+        # 线程真正退出后再释放引用并关闭日志；重试的任务会在此之前以新线程启动
+        thread.finished.connect(lambda: (self.threads.discard(thread), log.close()))
+        self.threads.add(thread)
+        thread.start()
+    
+    def job_finished(self, job_id, success, log_path):
+        self.queue.finish(job_id, success, None if success else f"脚本执行失败，日志: {log_path}")
+        self.schedule()
+
 class TrainingWidget(QWidget):
+    # 输出框保留的最大行数
+    MAX_OUTPUT_LINES = 5000
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.global_state = GlobalState.get_instance()
@@ -286,6 +494,18 @@ class TrainingWidget(QWidget):
         
         script_layout.addLayout(script_select_layout)
         
+        # 执行位置：开发板上以上传的数据集目录为工作目录，或在本机执行
+        target_layout = QHBoxLayout()
+        target_label = QLabel("执行位置:")
+        target_label.setStyleSheet("color: white; font-size: 18px;")
+        target_layout.addWidget(target_label)
+        self.target_combo = QComboBox()
+        self.target_combo.addItems(["开发板", "本机"])
+        self.target_combo.setStyleSheet("color: white; font-size: 18px; background-color: #2d2d2d;")
+        target_layout.addWidget(self.target_combo)
+        target_layout.addStretch()
+        script_layout.addLayout(target_layout)
+        
         layout.addWidget(script_group)
         
         # 输出显示区域
@@ -302,11 +522,11 @@ class TrainingWidget(QWidget):
         """)
         output_layout = QVBoxLayout(output_group)
         
-        self.output_text = QTextEdit()
+        self.output_text = QPlainTextEdit()
         self.output_text.setReadOnly(True)
         self.output_text.setMinimumSize(1000, 500)
         self.output_text.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #1e1e1e;
                 color: white;
                 font-family: Consolas, Monaco, monospace;
@@ -317,9 +537,28 @@ class TrainingWidget(QWidget):
             }
         """)
         output_layout.addWidget(self.output_text)
+        # 输出按帧率批量刷新，界面只保留最近的行，完整日志写入磁盘
+        self.log_sink = LogSink(self.output_text, max_lines=self.MAX_OUTPUT_LINES, parent=self)
         
         layout.addWidget(output_group)
         
+        # 训练指标区域：从输出中解析的指标曲线
+        metrics_group = QGroupBox("训练指标")
+        metrics_group.setStyleSheet(output_group.styleSheet())
+        metrics_layout = QVBoxLayout(metrics_group)
+        self.metric_combo = QComboBox()
+        self.metric_combo.setStyleSheet("color: white; font-size: 16px; background-color: #2d2d2d;")
+        metrics_layout.addWidget(self.metric_combo, alignment=Qt.AlignLeft)
+        self.metrics_chart = MetricsChart()
+        self.metric_combo.currentTextChanged.connect(self.metrics_chart.set_metric)
+        metrics_layout.addWidget(self.metrics_chart)
+        layout.addWidget(metrics_group)
+        self.metrics = None
+        # 运行期间每秒刷新一次，即使没有新指标也能看出停滞
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.metrics_chart.update)
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         
@@ -371,6 +610,79 @@ class TrainingWidget(QWidget):
         button_layout.addWidget(self.clear_btn, alignment=Qt.AlignCenter)
         
         layout.addLayout(button_layout)
+        
+        # 任务队列：排队执行多个脚本，队列保存在本地，重启后继续
+        queue_group = QGroupBox("任务队列")
+        queue_group.setStyleSheet(output_group.styleSheet())
+        queue_layout = QVBoxLayout(queue_group)
+        field_style = "color: white; font-size: 16px; background-color: #2d2d2d;"
+        
+        enqueue_layout = QHBoxLayout()
+        for text, widget in (("优先级", "priority_spin"), ("重试次数", "retries_spin")):
+            label = QLabel(text)
+            label.setStyleSheet("color: white; font-size: 16px;")
+            enqueue_layout.addWidget(label)
+            spin = QSpinBox()
+            spin.setStyleSheet(field_style)
+            setattr(self, widget, spin)
+            enqueue_layout.addWidget(spin)
+        self.priority_spin.setRange(-10, 10)
+        self.retries_spin.setRange(0, 5)
+        self.params_input = QLineEdit()
+        self.params_input.setPlaceholderText("脚本参数，如 max_depth=6 eta=0.1")
+        self.params_input.setStyleSheet(field_style)
+        enqueue_layout.addWidget(self.params_input, 1)
+        self.enqueue_btn = QPushButton("加入队列")
+        self.enqueue_btn.setStyleSheet(self.clear_btn.styleSheet())
+        self.enqueue_btn.clicked.connect(self.enqueue_job)
+        enqueue_layout.addWidget(self.enqueue_btn)
+        queue_layout.addLayout(enqueue_layout)
+        
+        self.job_queue = JobQueue.get_instance()
+        self.scheduler = JobScheduler.get_instance()
+        
+        control_layout = QHBoxLayout()
+        self.limit_spins = {}
+        for target, maximum in self.scheduler.MAX_LIMITS.items():
+            label = QLabel(f"{target}并发")
+            label.setStyleSheet("color: white; font-size: 16px;")
+            control_layout.addWidget(label)
+            spin = QSpinBox()
+            spin.setRange(1, maximum)
+            spin.setValue(self.scheduler.limits[target])
+            spin.setStyleSheet(field_style)
+            spin.valueChanged.connect(lambda value, target=target: self.set_job_limit(target, value))
+            self.limit_spins[target] = spin
+            control_layout.addWidget(spin)
+        control_layout.addStretch()
+        self.queue_btn = QPushButton("暂停队列" if self.scheduler.running else "启动队列")
+        self.cancel_job_btn = QPushButton("取消任务")
+        self.clear_jobs_btn = QPushButton("清除已结束")
+        for button, handler in ((self.queue_btn, self.toggle_queue), (self.cancel_job_btn, self.cancel_job),
+                                (self.clear_jobs_btn, self.clear_jobs)):
+            button.setStyleSheet(self.clear_btn.styleSheet())
+            button.clicked.connect(handler)
+            control_layout.addWidget(button)
+        queue_layout.addLayout(control_layout)
+        
+        self.jobs_table = QTableWidget(0, 8)
+        self.jobs_table.setHorizontalHeaderLabels(["ID", "脚本", "位置", "优先级", "状态", "尝试", "等待", "运行"])
+        self.jobs_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.jobs_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.jobs_table.horizontalHeader().setStretchLastSection(True)
+        self.jobs_table.setMinimumHeight(180)
+        self.jobs_table.setStyleSheet("color: white; background-color: #1e1e1e; font-size: 14px;")
+        queue_layout.addWidget(self.jobs_table)
+        layout.addWidget(queue_group)
+        
+        # 页面销毁时连接随之断开，调度器继续运行
+        self.scheduler.jobs_changed.connect(self.refresh_jobs)
+        # 每秒刷新等待和运行时间
+        self.jobs_timer = QTimer(self)
+        self.jobs_timer.setInterval(1000)
+        self.jobs_timer.timeout.connect(self.refresh_jobs)
+        self.jobs_timer.start()
+        self.refresh_jobs()
     
     def select_local_file(self):
         """选择本地文件"""
@@ -393,52 +705,169 @@ class TrainingWidget(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法浏览本地文件: {str(e)}")
     
-    def start_execution(self):
-        """开始执行脚本"""
+    def check_target(self):
+        """检查所选执行位置是否可用，返回 (是否可用, 远程工作目录)"""
         if not self.selected_script_path:
             QMessageBox.warning(self, "警告", "请先选择要执行的脚本文件")
+            return False, None
+        if self.target_combo.currentText() != "开发板":
+            return True, None
+        remote_dir = self.global_state.dataset_dir
+        if not remote_dir:
+            QMessageBox.warning(self, "警告", "请先上传单个数据集或数据文件夹，脚本将在数据集目录中执行")
+            return False, None
+        if not SSHManager.get_instance().ssh_client:
+            QMessageBox.warning(self, "警告", "SSH连接未建立")
+            return False, None
+        return True, remote_dir
+    
+    def start_execution(self):
+        """开始执行脚本"""
+        ok, remote_dir = self.check_target()
+        if not ok:
             return
-            
         script_path = self.selected_script_path
         
         self.start_btn.setEnabled(False)
-        self.output_text.clear()
-        self.output_text.append(f"正在开始执行本地脚本: {script_path}\n")
+        self.log_sink.open(get_app_path("logs", f"run_{time.strftime('%Y%m%d_%H%M%S')}.log"))
+        self.log_sink.append(f"正在开始执行脚本: {script_path}\n")
+        
+        self.metrics = TrainingMetrics(time.monotonic())
+        self.metric_combo.clear()
+        self.metrics_chart.set_metrics(self.metrics)
+        self.metrics_timer.start()
         
         # 创建并启动执行线程
-        self.execution_thread = ExecutionThread(script_path)
+        self.execution_thread = ExecutionThread(script_path, remote_dir)
         self.execution_thread.update_signal.connect(self.update_output)
+        self.execution_thread.line_signal.connect(self.update_metrics)
         self.execution_thread.finished_signal.connect(self.execution_finished)
         self.execution_thread.start()
     
+    def enqueue_job(self):
+        """将当前脚本、数据集和参数加入任务队列"""
+        ok, remote_dir = self.check_target()
+        if not ok:
+            return
+        params = {}
+        for token in self.params_input.text().split():
+            name, sep, value = token.partition("=")
+            if not sep or not name:
+                QMessageBox.warning(self, "警告", f"参数格式应为 名称=值: {token}")
+                return
+            params[name.lstrip("-")] = value
+        self.job_queue.add(self.selected_script_path, remote_dir or self.global_state.dataset_dir,
+                           self.global_state.task_type, self.target_combo.currentText(), params,
+                           self.priority_spin.value(), self.retries_spin.value())
+        self.scheduler.schedule()
+    
+    def set_job_limit(self, target, value):
+        self.scheduler.set_limit(target, value)
+    
+    def toggle_queue(self):
+        if self.scheduler.running:
+            self.scheduler.pause()
+            self.queue_btn.setText("启动队列")
+        else:
+            self.scheduler.start()
+            self.queue_btn.setText("暂停队列")
+    
+    def selected_job_id(self):
+        row = self.jobs_table.currentRow()
+        if row < 0:
+            return None
+        return int(self.jobs_table.item(row, 0).text())
+    
+    def cancel_job(self):
+        job_id = self.selected_job_id()
+        if job_id is None:
+            return
+        if not self.job_queue.cancel(job_id):
+            QMessageBox.warning(self, "警告", "只能取消等待中的任务")
+        self.refresh_jobs()
+    
+    def clear_jobs(self):
+        self.job_queue.clear_finished()
+        self.refresh_jobs()
+    
+    def refresh_jobs(self):
+        """刷新任务列表"""
+        jobs = self.job_queue.snapshot()
+        self.jobs_table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            values = [job["id"], os.path.basename(job["script"]), job["target"], job["priority"],
+                      job["status"], f"{job['attempts']}/{job['max_retries'] + 1}",
+                      f"{job['wait_time']:.0f}s", f"{job['run_time']:.0f}s"]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if column == 4 and job["error"]:
+                    item.setToolTip(job["error"])
+                self.jobs_table.setItem(row, column, item)
+    
     def clear_output(self):
-        """清空输出"""
-        self.output_text.clear()
+        """清空输出，磁盘上的完整日志保留"""
+        self.log_sink.clear()
     
     def update_output(self, text):
-        """更新输出显示"""
-        self.output_text.insertPlainText(text + '\n')
-        self.output_text.moveCursor(self.output_text.textCursor().End)
-        self.output_text.ensureCursorVisible()
-        self.output_text.repaint()
-        QApplication.processEvents()
+        """更新输出显示，实际插入由日志缓冲按帧率合并完成"""
+        self.log_sink.append(text)
+    
+    def update_metrics(self, stream, timestamp, line):
+        """解析输出行中的训练指标，新指标加入选择框"""
+        if self.metrics is None or not self.metrics.feed(line, timestamp):
+            return
+        for metric in self.metrics.metrics():
+            if self.metric_combo.findText(metric) == -1:
+                self.metric_combo.addItem(metric)
+        # update() 会合并为一次重绘
+        self.metrics_chart.update()
+    
+    def save_run_record(self, upload_id, success, result_path=None):
+        """保存运行记录：任务类型、数据集目录及各文件的sha256；解析到的指标和评估结果为可选项"""
+        global_state = GlobalState.get_instance()
+        record = {
+            "upload_id": upload_id,
+            "task_type": global_state.task_type,
+            "script": self.selected_script_path,
+            "success": success,
+            "dataset_dir": global_state.dataset_dir,
+            "dataset_files": global_state.dataset_files,
+            "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if self.metrics is not None and self.metrics.series:
+            # 各指标曲线的最后一个值
+            record["last_iteration"] = self.metrics.last_iteration
+            record["metrics"] = {series.name: series.values[-1] for series in self.metrics.series.values()}
+        if result_path is not None:
+            record["result_file"] = result_path
+        try:
+            with open(get_app_path("runs", f"run_{upload_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"保存运行记录失败: {e}")
     
     def execution_finished(self, success):
         """脚本执行完成处理"""
-        # 1. 获取终端输出
-        result_text = self.output_text.toPlainText()
+        self.metrics_timer.stop()
+        self.metrics_chart.update()
+        
+        # 1. 获取完整的终端输出（输出框只保留最近的行）
+        self.log_sink.close()
+        result_text = self.log_sink.read_log()
+        # 2. 增加upload_id，有评估结果时保存结果；无论成败都保存运行记录
+        global_state = GlobalState.get_instance()
+        global_state.upload_id = getattr(global_state, 'upload_id', 0) + 1
+        upload_id = global_state.upload_id - 1  # 使用增加前的ID作为文件名
+        cache_path = None
         idx = result_text.find("评估指标")
         if idx != -1:
-            # 2. 增加upload_id并保存结果
-            global_state = GlobalState.get_instance()
-            global_state.upload_id = getattr(global_state, 'upload_id', 0) + 1
-            upload_id = global_state.upload_id - 1  # 使用增加前的ID作为文件名
             cache_path = f"/tmp/classification_result_cache_{upload_id}.txt"
             with open(cache_path, "w", encoding="utf-8") as f:
                 f.write(result_text[idx:])
+        self.save_run_record(upload_id, success, cache_path)
 
         if success:
-            self.output_text.append("\n脚本执行完成！")
+            self.log_sink.append("\n脚本执行完成！")
             QMessageBox.information(self, "完成", "脚本执行完成！")
             
             # 通知主窗口执行完成
@@ -454,6 +883,6 @@ class TrainingWidget(QWidget):
                 main_page.step_completed[3] = True
                 main_page.set_button_enabled(main_page.buttons[4], True)
         else:
-            self.output_text.append("\n脚本执行失败！")
+            self.log_sink.append("\n脚本执行失败！")
             QMessageBox.critical(self, "错误", "脚本执行过程中出现错误，请检查输出日志。")
             self.start_btn.setEnabled(True)
\ No newline at end of file
@@ -1,12 +1,412 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                            QPushButton, QMessageBox, QFileDialog, QGroupBox,
-                           QApplication)
-from PyQt5.QtCore import Qt
+                           QCheckBox, QComboBox, QSpinBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from ssh_manager import SSHManager
-import paramiko
 import os
-import pandas as pd
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from global_state import GlobalState
+from dataset_validator import DatasetValidator, LabelValidator, SUPPORTED_EXTENSIONS
+from upload_engine import ChunkedUploader, CompressedUploader, TransferControl, available_compressions
+from delta_sync import DeltaSync
+from dataset_store import HashCache, RemoteStore, file_sha256
+from dataset_profile import DatasetProfiler, load_profile, save_profile, format_profile
+from remote_paths import RemotePathManager
+from dataset_convert import DatasetConverter, available_formats
+from dataset_sample import DatasetSampler
+
+def format_eta(seconds):
+    """将剩余秒数格式化为 时:分:秒"""
+    if seconds < 0:
+        return "--:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+class ValidationWorker(QThread):
+    """后台流式校验数据文件并生成数据概况，表头有效后即通知界面
+
+    校验结果和数据概况按文件sha256缓存，同一文件再次选择时不再扫描。
+    """
+    header_signal = pyqtSignal(str, list)
+    progress_signal = pyqtSignal(object, object)
+    finished_signal = pyqtSignal(object)
+    profile_signal = pyqtSignal(str, object)
+    error_signal = pyqtSignal(str, str)
+    
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.validator = DatasetValidator(file_path)
+        self.control = TransferControl()
+    
+    def run(self):
+        try:
+            columns, _ = self.validator.check_header()
+            self.header_signal.emit(self.file_path, columns)
+            hash_cache = HashCache.get_instance()
+            digest = hash_cache.get(self.file_path)
+            profile = load_profile(digest) if digest else None
+            if profile is not None:
+                self.validator.load_dict(profile["validation"])
+            else:
+                profile, digest = self.scan_and_hash(digest)
+                if profile is None:
+                    return
+                hash_cache.put(self.file_path, digest)
+                if "validation" not in profile:
+                    profile["validation"] = self.validator.to_dict()
+                    save_profile(digest, profile)
+                else:
+                    self.validator.load_dict(profile["validation"])
+            self.finished_signal.emit(self.validator)
+            self.profile_signal.emit(self.file_path, profile)
+        except Exception as e:
+            self.error_signal.emit(self.file_path, str(e))
+    
+    def scan_and_hash(self, digest):
+        """扫描与计算sha256并行进行，扫描进度照常显示
+
+        摘要先算出且已有缓存的数据概况时停止扫描、改用缓存；返回 (数据概况, 摘要)，
+        被停止时返回 (None, None)。
+        """
+        hash_control = TransferControl(self.control)
+        cached = []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            hash_future = None if digest else pool.submit(file_sha256, self.file_path, hash_control)
+            profiler = DatasetProfiler()
+            
+            def update(chunk):
+                profiler.update(chunk)
+                if hash_future is not None and hash_future.done() and not cached:
+                    cached.append(load_profile(hash_future.result()))
+                    if cached[0] is not None:
+                        self.validator.stop()
+            
+            try:
+                # 校验和统计在同一遍读取中完成
+                completed = self.validator.scan(self.progress_signal.emit, chunk_callback=update)
+            except Exception:
+                hash_control.cancel()
+                raise
+            finally:
+                profile = profiler.finish()
+            if cached and cached[0] is not None:
+                return cached[0], hash_future.result()
+            if not completed:
+                hash_control.cancel()
+                return None, None
+            return profile, digest or hash_future.result()
+    
+    def stop(self):
+        self.control.cancel()
+        self.validator.stop()
+
+class UploadWorker(QThread):
+    """后台创建远程目录、转换并上传数据文件，支持暂停和取消"""
+    progress_signal = pyqtSignal(object, object, float, float)
+    status_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(str, list, list)
+    error_signal = pyqtSignal(str)
+    cancelled_signal = pyqtSignal()
+    
+    def __init__(self, file_path, remote_dir, options):
+        super().__init__()
+        self.file_path = file_path
+        self.remote_dir = remote_dir
+        self.options = options
+        self.ssh_manager = SSHManager.get_instance()
+        self.control = TransferControl()
+        self.sessions = 3
+        self.hash_cache = HashCache.get_instance()
+        self.store = RemoteStore(self.ssh_manager)
+        self.paths = RemotePathManager.get_instance()
+        # 已上传并校验的文件: [{name, remote_path, size, sha256}, ...]
+        self.records = []
+        self._records_lock = threading.Lock()
+        # 是否有文件走了分块上传；只有分块上传取消后留有断点可以续传
+        self.resumable = False
+    
+    def run(self):
+        try:
+            # 获取文件名（不含后缀）
+            file_name = os.path.splitext(os.path.basename(self.file_path))[0]
+            
+            # 构建远程路径
+            remote_dir_path = f"{self.remote_dir}/{file_name}"
+            source_file = self.file_path
+            
+            # 界面中未能用数据概况完成标签检查时，在此只读取标签列检查
+            notes = []
+            if self.options['task_type'] and self.options['label_column'] and not self.options.get('label_checked'):
+                self.status_signal.emit("正在检查标签列...")
+                errors, warnings_ = LabelValidator(self.file_path, self.options['label_column'],
+                                                   self.options['task_type']).check()
+                if errors:
+                    raise Exception("标签检查未通过: " + "；".join(errors))
+                notes.extend(warnings_)
+            
+            # 可选：抽取样本，上传到数据集目录下单独的 sample_<比例>pct 子目录
+            sample_percent = self.options.get('sample_percent')
+            if sample_percent:
+                self.status_signal.emit(f"正在抽取 {sample_percent}% 样本...")
+                sampler = DatasetSampler(self.file_path, sample_percent / 100,
+                                         label_column=self.options['label_column'],
+                                         class_counts=self.options.get('class_counts'),
+                                         total_rows=self.options.get('total_rows'))
+                source_file = sampler.sample(
+                    progress_callback=lambda rows, sampled: self.status_signal.emit(
+                        f"正在抽样: 已读取 {rows} 行，抽取 {sampled} 行"),
+                    control=self.control)
+                remote_dir_path = f"{remote_dir_path}/sample_{sample_percent}pct"
+                notes.append(f'{"分层" if sampler.stratified else "随机"}抽样: '
+                             f'{sampler.rows} 行中抽取 {sampler.sampled_rows} 行')
+            
+            # 一次往返创建远程目录结构并验证，已确认的目录直接跳过
+            self.status_signal.emit("正在创建远程目录...")
+            try:
+                self.paths.ensure_dir(remote_dir_path)
+            except Exception as e:
+                raise Exception(f"目录创建失败: {str(e)}")
+            
+            # 可选：先在本地转换为二进制格式，再上传转换结果和清单
+            output_format = self.options['output_format']
+            if output_format:
+                self.status_signal.emit(f"正在转换为 {output_format}...")
+                converter = DatasetConverter(source_file, self.options['label_column'], output_format,
+                                             self.options['task_type'], downcast=self.options['downcast'],
+                                             control=self.control)
+                local_files = converter.convert(
+                    progress_callback=lambda stage, rows: self.status_signal.emit(f"正在{stage}: 已处理 {rows} 行"))
+                notes.append(f'已转换为 {output_format}（{converter.rows} 行，清单见 .manifest.json）')
+                notes.append(f'内存占用: {converter.memory_before / 1024 / 1024:.1f} MB → '
+                             f'{converter.memory_after / 1024 / 1024:.1f} MB')
+            else:
+                local_files = [source_file]
+            
+            # 上传文件
+            for local_file in local_files:
+                remote_path = f"{remote_dir_path}/{os.path.basename(local_file)}"
+                try:
+                    self.status_signal.emit(f"正在上传: {os.path.basename(local_file)}...")
+                    note = self.transfer_file(local_file, remote_path)
+                    if note:
+                        notes.append(note)
+                except Exception as e:
+                    # 目录可能已被删除，下次重新确认
+                    self.paths.invalidate(remote_dir_path)
+                    raise Exception(f"文件上传失败: {str(e)}")
+            
+            self.finished_signal.emit(remote_dir_path, [os.path.basename(path) for path in local_files], notes)
+        except Exception as e:
+            if self.control.cancelled:
+                self.cancelled_signal.emit()
+            else:
+                self.error_signal.emit(str(e))
+    
+    def transfer_file(self, local_file, remote_file_path, progress_callback=None):
+        """上传单个文件并记录其sha256；开启秒传时远程存储已有相同内容则直接链接，不传输数据"""
+        progress_callback = progress_callback or self.progress_signal.emit
+        file_name = os.path.basename(local_file)
+        size = os.path.getsize(local_file)
+        if not self.options.get('dedup'):
+            digest, note = self.send_file(local_file, remote_file_path, progress_callback, self.control)
+            self.record(local_file, remote_file_path, digest)
+            return note
+        digest = self.hash_cache.get(local_file)
+        if digest and self.store.contains(digest, size):
+            self.store.link(digest, remote_file_path)
+            progress_callback(size, size, 0.0, 0.0)
+            self.record(local_file, remote_file_path, digest)
+            return f'{file_name} 远程已有相同内容，已直接链接'
+        
+        # 摘要未知时与上传并行计算，命中存储后立即停止传输并改为链接
+        control = TransferControl(self.control)
+        hit = threading.Event()
+        
+        def hash_and_check():
+            try:
+                result = digest or file_sha256(local_file, control=control)
+                if self.store.contains(result, size):
+                    hit.set()
+                    control.cancel()
+                return result
+            except Exception as e:
+                print(f"计算摘要或查询远程存储失败: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            hash_future = pool.submit(hash_and_check)
+            try:
+                verified_digest, note = self.send_file(local_file, remote_file_path, progress_callback, control)
+            except Exception:
+                if self.control.cancelled or not hit.is_set():
+                    # 上传失败时停止仍在进行的摘要计算
+                    control.cancel()
+                    raise
+                verified_digest, note = None, None
+            # 传输完成即已得到校验过的摘要，不再等待并行计算
+            if verified_digest and not hit.is_set():
+                control.cancel()
+            hashed_digest = hash_future.result()
+        if hit.is_set():
+            self.store.link(hashed_digest, remote_file_path)
+            progress_callback(size, size, 0.0, 0.0)
+            self.record(local_file, remote_file_path, hashed_digest)
+            return f'{file_name} 远程已有相同内容，已直接链接'
+        self.record(local_file, remote_file_path, verified_digest)
+        try:
+            self.store.add(remote_file_path, verified_digest)
+        except Exception as e:
+            print(f"加入远程存储失败: {e}")
+        return note
+    
+    def record(self, local_file, remote_file_path, digest):
+        """记录已校验的文件，摘要同时写入本地缓存供秒传使用"""
+        self.hash_cache.put(local_file, digest)
+        with self._records_lock:
+            self.records.append({
+                "name": os.path.basename(local_file),
+                "remote_path": remote_file_path,
+                "size": os.path.getsize(local_file),
+                "sha256": digest,
+            })
+    
+    def send_file(self, local_file, remote_file_path, progress_callback, control):
+        """按上传选项选择增量同步、压缩传输或分块上传
+
+        三种方式都在远程计算sha256并与本地边读边算的摘要比对，返回 (sha256, 结果说明)。
+        """
+        file_name = os.path.basename(local_file)
+        file_ext = os.path.splitext(local_file)[1].lower()
+        if self.options['delta'] and self.remote_file_exists(remote_file_path):
+            # 远程已有同名文件时，只传输变化的部分，代理在替换前校验sha256
+            delta_syncer = DeltaSync(self.ssh_manager)
+            digest = delta_syncer.sync(local_file, remote_file_path, progress_callback=progress_callback,
+                                       control=control)
+            return digest, (f'{file_name} 增量同步: 发送 {delta_syncer.literal_bytes / 1024 / 1024:.1f} MB，'
+                            f'复用 {delta_syncer.copied_bytes / 1024 / 1024:.1f} MB')
+        uploader = ChunkedUploader(self.ssh_manager, sessions=self.sessions)
+        # 压缩传输中断后不能续传，之前的分块上传留有断点时继续分块上传
+        if (self.options['compress'] and file_ext in ['.csv', '.txt']
+                and not uploader.has_resume_point(local_file, remote_file_path)):
+            # 压缩传输在远程解压后已校验长度和sha256
+            compressed_uploader = CompressedUploader(self.ssh_manager, algorithm=self.options['algorithm'],
+                                                     level=self.options['level'])
+            digest = compressed_uploader.upload(local_file, remote_file_path, progress_callback=progress_callback,
+                                                control=control)
+            return digest, (f'{file_name} 压缩传输: 实际发送 '
+                            f'{compressed_uploader.compressed_bytes / 1024 / 1024:.1f} MB')
+        self.resumable = True
+        digest = uploader.upload(local_file, remote_file_path, progress_callback=progress_callback,
+                                 control=control)
+        if uploader.skipped_bytes:
+            return digest, f'{file_name} 断点续传: 跳过已上传的 {uploader.skipped_bytes / 1024 / 1024:.1f} MB'
+        return digest, None
+    
+    def remote_file_exists(self, remote_file_path):
+        """增量同步需要远程代理和非空的已有文件"""
+        agent = self.ssh_manager.agent
+        if agent is None:
+            return False
+        result = agent.stat(remote_file_path)
+        return result.get("exists", False) and result.get("size", 0) > 0
+    
+    def pause(self):
+        self.control.pause()
+    
+    def resume(self):
+        self.control.resume()
+    
+    def cancel(self):
+        self.control.cancel()
+
+class BatchUploadWorker(UploadWorker):
+    """并发上传多个文件，汇总整体进度和各文件的失败原因
+
+    items 为 [(本地路径, 远程路径), ...]；批量上传不做格式转换。
+    """
+    MAX_WORKERS = 3
+    # 各文件的公共远程目录, 上传成功的文件, 结果说明, 失败列表[(文件, 原因)]
+    batch_finished_signal = pyqtSignal(str, list, list, list)
+    
+    def __init__(self, items, remote_dir, options):
+        super().__init__(None, remote_dir, options)
+        self.items = items
+        # 每个文件使用两个SFTP会话，避免并发文件占满通道池
+        self.sessions = 2
+        self._progress_lock = threading.Lock()
+        self._file_progress = {}
+        self._total = sum(os.path.getsize(local) for local, _ in items)
+        # 上传文件夹时为 {任务目录}/{文件夹}；多个文件各自一个目录时即任务目录本身
+        self.dataset_dir = posixpath.commonpath([posixpath.dirname(remote) for _, remote in items])
+    
+    def run(self):
+        uploaded, notes, failures = [], [], []
+        try:
+            self.status_signal.emit("正在创建远程目录...")
+            try:
+                self.paths.ensure_dirs({posixpath.dirname(remote) for _, remote in self.items})
+            except Exception as e:
+                raise Exception(f"目录创建失败: {str(e)}")
+            
+            self.status_signal.emit(f"正在上传 {len(self.items)} 个文件...")
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+                futures = {pool.submit(self.upload_one, local, remote): local for local, remote in self.items}
+                for future in as_completed(futures):
+                    local = futures[future]
+                    try:
+                        note = future.result()
+                        uploaded.append(os.path.basename(local))
+                        if note:
+                            notes.append(note)
+                    except Exception as e:
+                        failures.append((local, str(e)))
+        except Exception as e:
+            if self.control.cancelled:
+                self.cancelled_signal.emit()
+            else:
+                self.error_signal.emit(str(e))
+            return
+        if self.control.cancelled:
+            self.cancelled_signal.emit()
+        else:
+            self.batch_finished_signal.emit(self.dataset_dir, uploaded, notes, failures)
+    
+    def upload_one(self, local_file, remote_file_path):
+        """上传单个文件，失败时使其目录缓存失效"""
+        size = os.path.getsize(local_file)
+        
+        def report(sent, total, rate, eta):
+            self.report_progress(local_file, sent, rate)
+        
+        try:
+            note = self.transfer_file(local_file, remote_file_path, progress_callback=report)
+        except Exception:
+            self.paths.invalidate(posixpath.dirname(remote_file_path))
+            # 失败的文件不再计入进度和总量，整体进度反映其余文件的实际情况
+            with self._progress_lock:
+                self._file_progress.pop(local_file, None)
+                self._total -= size
+            self.report_progress(None, 0, 0.0)
+            raise
+        # 完成的文件按全部大小计入，不再计入当前速率
+        self.report_progress(local_file, size, 0.0)
+        return note
+    
+    def report_progress(self, local_file, sent, rate):
+        """合并各文件的进度，发出整体的已传输字节、速率和剩余时间；local_file 为None时只重新汇总"""
+        with self._progress_lock:
+            if local_file is not None:
+                self._file_progress[local_file] = (sent, rate)
+            total_sent = sum(sent for sent, _ in self._file_progress.values())
+            total_rate = sum(rate for _, rate in self._file_progress.values())
+            total = self._total
+        eta = (total - total_sent) / total_rate if total_rate > 0 else -1.0
+        self.progress_signal.emit(total_sent, total, total_rate, eta)
 
 class UploadDataWidget(QWidget):
     def __init__(self, parent=None):
@@ -14,6 +414,11 @@ class UploadDataWidget(QWidget):
         self.ssh_manager = SSHManager.get_instance()
         # 存储选择的文件路径
         self.selected_file = None
+        # 批量上传的 [(本地路径, 远程路径), ...]
+        self.batch_items = None
+        self.validation_worker = None
+        self.upload_worker = None
+        self.profile = None
         # 从全局状态获取任务类型
         global_state = GlobalState.get_instance()
         self.task_type = global_state.task_type
@@ -90,10 +495,102 @@ class UploadDataWidget(QWidget):
         self.file_label.setStyleSheet("color: white; font-size: 24px;")
         self.file_label.setWordWrap(True)
         
+        # 批量选择多个文件或整个文件夹
+        batch_layout = QHBoxLayout()
+        select_files_btn = QPushButton("多个文件")
+        select_files_btn.setStyleSheet(self.get_button_style())
+        select_files_btn.clicked.connect(self.select_files)
+        select_dir_btn = QPushButton("文件夹")
+        select_dir_btn.setStyleSheet(self.get_button_style())
+        select_dir_btn.clicked.connect(self.select_directory)
+        batch_layout.addWidget(select_files_btn)
+        batch_layout.addWidget(select_dir_btn)
+        
+        # 数据概况：扫描完成后可查看各列统计和标签分布
+        self.profile_btn = QPushButton("数据概况")
+        self.profile_btn.setStyleSheet(self.get_button_style())
+        self.profile_btn.clicked.connect(self.show_profile)
+        self.profile_btn.setEnabled(False)
+        
         group_layout.addWidget(select_btn)
+        group_layout.addLayout(batch_layout)
         group_layout.addWidget(self.file_label)
+        group_layout.addWidget(self.profile_btn)
         form_layout.addWidget(group)
         
+        # 上传选项
+        self.delta_checkbox = QCheckBox("增量同步（仅传输变化部分）")
+        self.delta_checkbox.setStyleSheet(self.get_checkbox_style())
+        self.delta_checkbox.setChecked(True)
+        form_layout.addWidget(self.delta_checkbox)
+        
+        # 远程存储中已有相同内容（按sha256）时直接建立链接
+        self.dedup_checkbox = QCheckBox("秒传（远程已有相同文件时不传输）")
+        self.dedup_checkbox.setStyleSheet(self.get_checkbox_style())
+        self.dedup_checkbox.setChecked(True)
+        form_layout.addWidget(self.dedup_checkbox)
+        
+        # 压缩传输选项（仅对CSV/TXT文本数据生效）
+        # 压缩传输中断后需要重新上传，默认使用可断点续传的分块上传
+        self.compress_checkbox = QCheckBox("压缩传输（CSV/TXT）")
+        self.compress_checkbox.setStyleSheet(self.get_checkbox_style())
+        self.compress_checkbox.setChecked(False)
+        form_layout.addWidget(self.compress_checkbox)
+        
+        compress_layout = QHBoxLayout()
+        self.compress_combo = QComboBox()
+        self.compress_combo.addItems(available_compressions())
+        self.compress_combo.setStyleSheet("color: white; font-size: 18px;")
+        self.compress_level_spin = QSpinBox()
+        self.compress_level_spin.setRange(1, 9)
+        self.compress_level_spin.setValue(6)
+        self.compress_level_spin.setPrefix("级别 ")
+        self.compress_level_spin.setStyleSheet("color: white; font-size: 18px;")
+        compress_layout.addWidget(self.compress_combo)
+        compress_layout.addWidget(self.compress_level_spin)
+        form_layout.addLayout(compress_layout)
+        self.compress_combo.setEnabled(False)
+        self.compress_level_spin.setEnabled(False)
+        self.compress_checkbox.toggled.connect(self.compress_combo.setEnabled)
+        self.compress_checkbox.toggled.connect(self.compress_level_spin.setEnabled)
+        self.compress_combo.currentTextChanged.connect(self.update_compress_level_range)
+        
+        # 上传前转换为二进制格式（特征float32，标签按任务类型定型）
+        convert_layout = QHBoxLayout()
+        self.convert_combo = QComboBox()
+        self.convert_combo.addItems(["不转换"] + available_formats())
+        self.convert_combo.setStyleSheet("color: white; font-size: 18px;")
+        self.label_combo = QComboBox()
+        self.label_combo.setToolTip("标签列")
+        self.label_combo.setStyleSheet("color: white; font-size: 18px;")
+        self.label_combo.setEnabled(False)
+        convert_layout.addWidget(self.convert_combo)
+        convert_layout.addWidget(self.label_combo)
+        form_layout.addLayout(convert_layout)
+        
+        # 转换时按全文件取值范围降低数值列位宽，低基数字符串列做字典编码
+        self.downcast_checkbox = QCheckBox("类型压缩（降位宽、字符串编码）")
+        self.downcast_checkbox.setStyleSheet(self.get_checkbox_style())
+        self.downcast_checkbox.setChecked(True)
+        self.downcast_checkbox.setEnabled(False)
+        form_layout.addWidget(self.downcast_checkbox)
+        self.convert_combo.currentTextChanged.connect(self.update_label_combo_state)
+        
+        # 抽样上传：分类任务按标签分层
+        sample_layout = QHBoxLayout()
+        self.sample_checkbox = QCheckBox("抽样上传")
+        self.sample_checkbox.setStyleSheet(self.get_checkbox_style())
+        self.sample_spin = QSpinBox()
+        self.sample_spin.setRange(1, 50)
+        self.sample_spin.setValue(5)
+        self.sample_spin.setSuffix(" %")
+        self.sample_spin.setStyleSheet("color: white; font-size: 18px;")
+        self.sample_spin.setEnabled(False)
+        self.sample_checkbox.toggled.connect(self.sample_spin.setEnabled)
+        sample_layout.addWidget(self.sample_checkbox)
+        sample_layout.addWidget(self.sample_spin)
+        form_layout.addLayout(sample_layout)
+        
         # 上传按钮
         self.upload_btn = QPushButton("上传文件")
         self.upload_btn.setStyleSheet(self.get_button_style())
@@ -101,9 +598,24 @@ class UploadDataWidget(QWidget):
         self.upload_btn.setEnabled(False)
         form_layout.addWidget(self.upload_btn, alignment=Qt.AlignCenter)
         
+        # 上传期间显示暂停和取消按钮
+        control_layout = QHBoxLayout()
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setStyleSheet(self.get_button_style())
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setVisible(False)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.setStyleSheet(self.get_button_style())
+        self.cancel_btn.clicked.connect(self.cancel_upload)
+        self.cancel_btn.setVisible(False)
+        control_layout.addWidget(self.pause_btn)
+        control_layout.addWidget(self.cancel_btn)
+        form_layout.addLayout(control_layout)
+        
         # 状态标签
         self.status_label = QLabel("")
         self.status_label.setStyleSheet("color: white; font-size: 24px;")
+        self.status_label.setWordWrap(True)
         form_layout.addWidget(self.status_label, alignment=Qt.AlignCenter)
         
         layout.addWidget(form_widget)
@@ -130,6 +642,27 @@ class UploadDataWidget(QWidget):
             }
         """
         
+    def get_checkbox_style(self):
+        return """
+            QCheckBox {
+                color: white;
+                font-size: 18px;
+            }
+            QCheckBox:disabled {
+                color: #888888;
+            }
+        """
+        
+    def update_compress_level_range(self, algorithm):
+        """gzip级别为1-9，zstd为1-19"""
+        self.compress_level_spin.setMaximum(19 if algorithm == 'zstd' else 9)
+        
+    def update_label_combo_state(self, *args):
+        """单文件模式下标签列始终可选（用于标签检查和转换），选择了转换格式时才能开启类型压缩"""
+        converting = self.convert_combo.currentText() != "不转换" and self.convert_combo.isEnabled()
+        self.label_combo.setEnabled(self.convert_combo.isEnabled())
+        self.downcast_checkbox.setEnabled(converting)
+        
     def select_file(self):
         """选择数据文件"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -140,141 +673,337 @@ class UploadDataWidget(QWidget):
         )
         
         if file_path:
-            try:
-                # 验证文件格式
-                file_ext = os.path.splitext(file_path)[1].lower()
-                if file_ext == '.csv':
-                    df = pd.read_csv(file_path)
-                elif file_ext in ['.xlsx', '.xls']:
-                    df = pd.read_excel(file_path)
-                elif file_ext == '.txt':
-                    df = pd.read_csv(file_path, sep='\t')
-                else:
-                    raise Exception("不支持的文件格式")
-                
-                self.selected_file = file_path
-                self.file_label.setText(f"已选择: {os.path.basename(file_path)}")
-                
-                # 启用上传按钮
-                self.upload_btn.setEnabled(True)
-                
-            except Exception as e:
-                self.selected_file = None
-                self.file_label.setText("")
-                QMessageBox.critical(self, "错误", f"无法读取文件：{str(e)}")
+            # 停止上一个文件的校验
+            if self.validation_worker is not None:
+                self.validation_worker.stop()
+            self.selected_file = None
+            self.batch_items = None
+            self.profile = None
+            self.profile_btn.setEnabled(False)
+            self.convert_combo.setEnabled(True)
+            self.sample_checkbox.setEnabled(True)
+            self.update_label_combo_state()
+            self.upload_btn.setEnabled(False)
+            self.file_label.setText(f"正在校验: {os.path.basename(file_path)}...")
+            
+            # 后台读取表头和样本，再按块扫描全文件
+            self.validation_worker = ValidationWorker(file_path)
+            self.validation_worker.header_signal.connect(self.header_validated)
+            self.validation_worker.progress_signal.connect(self.update_validation_progress)
+            self.validation_worker.finished_signal.connect(self.validation_finished)
+            self.validation_worker.profile_signal.connect(self.profile_ready)
+            self.validation_worker.error_signal.connect(self.validation_failed)
+            self.validation_worker.start()
     
-    def upload_file(self):
-        """上传文件到远程服务器"""
+    def select_files(self):
+        """选择多个数据文件，每个文件上传到以其文件名命名的目录"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择多个数据文件",
+            "",
+            "Data Files (*.csv *.xlsx *.xls *.txt)"
+        )
+        if file_paths:
+            items = [(path, f"{self.remote_dir}/{os.path.splitext(os.path.basename(path))[0]}/"
+                            f"{os.path.basename(path)}") for path in file_paths]
+            self.set_batch(items, f"已选择 {len(items)} 个文件")
+    
+    def select_directory(self):
+        """选择文件夹，上传其中所有数据文件并保留相对目录结构"""
+        dir_path = QFileDialog.getExistingDirectory(self, "选择数据文件夹", "")
+        if not dir_path:
+            return
+        base_name = os.path.basename(os.path.normpath(dir_path))
+        items = []
+        for root, _, files in os.walk(dir_path):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                local_path = os.path.join(root, name)
+                relative = os.path.relpath(local_path, dir_path).replace(os.sep, "/")
+                items.append((local_path, f"{self.remote_dir}/{base_name}/{relative}"))
+        if not items:
+            QMessageBox.warning(self, "警告", "所选文件夹中没有数据文件")
+            return
+        self.set_batch(items, f"已选择文件夹 {base_name}（{len(items)} 个数据文件）")
+    
+    def set_batch(self, items, text):
+        """切换到批量上传，批量模式不做格式转换"""
+        if self.validation_worker is not None:
+            self.validation_worker.stop()
+            self.validation_worker = None
+        self.selected_file = None
+        self.batch_items = items
+        self.profile = None
+        self.profile_btn.setEnabled(False)
+        total = sum(os.path.getsize(local) for local, _ in items)
+        self.file_label.setText(f"{text}，共 {total / 1024 / 1024:.1f} MB")
+        self.file_label.setToolTip("\n".join(os.path.basename(local) for local, _ in items))
+        self.convert_combo.setCurrentText("不转换")
+        self.convert_combo.setEnabled(False)
+        self.sample_checkbox.setChecked(False)
+        self.sample_checkbox.setEnabled(False)
+        self.update_label_combo_state()
+        self.upload_btn.setEnabled(True)
+    
+    def is_current_validation(self, file_path):
+        return self.validation_worker is not None and self.validation_worker.file_path == file_path
+    
+    def header_validated(self, file_path, columns):
+        """表头有效后立即允许上传，全文件扫描继续在后台进行"""
+        if not self.is_current_validation(file_path):
+            return
+        self.selected_file = file_path
+        self.file_label.setText(f"已选择: {os.path.basename(file_path)}（{len(columns)} 列，正在扫描...）")
+        
+        # 标签列默认取最后一列
+        self.label_combo.clear()
+        self.label_combo.addItems(columns)
+        self.label_combo.setCurrentIndex(len(columns) - 1)
+        
+        # 启用上传按钮
+        self.upload_btn.setEnabled(True)
+    
+    def update_validation_progress(self, row_count, bad_line_count):
+        """显示扫描进度"""
         if not self.selected_file:
+            return
+        text = f"已选择: {os.path.basename(self.selected_file)}（已扫描 {row_count} 行"
+        if bad_line_count:
+            text += f"，异常行 {bad_line_count}"
+        self.file_label.setText(text + "）")
+    
+    def validation_finished(self, validator):
+        """显示扫描结果：行数、列类型和异常行位置"""
+        if not self.is_current_validation(validator.file_path):
+            return
+        dtype_text = ", ".join(f"{column}: {dtype}" for column, dtype in list(validator.dtypes.items())[:10])
+        if len(validator.dtypes) > 10:
+            dtype_text += f" 等 {len(validator.dtypes)} 列"
+        self.file_label.setText(f"已选择: {os.path.basename(validator.file_path)}\n"
+                                f"共 {validator.row_count} 行\n列类型: {dtype_text}")
+        self.file_label.setToolTip("\n".join(f"{column}: {dtype}" for column, dtype in validator.dtypes.items()))
+        if validator.bad_line_count:
+            positions = ", ".join(str(line) for line in validator.bad_lines)
+            QMessageBox.warning(self, "数据格式警告",
+                                f"发现 {validator.bad_line_count} 行字段数不正确，已在校验中跳过。\n"
+                                f"行号: {positions}")
+    
+    def profile_ready(self, file_path, profile):
+        """数据概况生成（或从缓存读取）后允许查看"""
+        if not self.is_current_validation(file_path):
+            return
+        self.profile = profile
+        self.profile_btn.setEnabled(True)
+        self.profile_btn.setStyleSheet(self.get_button_style())
+    
+    def show_profile(self):
+        """显示数据概况，逐列统计放在详细信息中"""
+        if not self.profile:
+            return
+        report = format_profile(self.profile, self.label_combo.currentText() or None)
+        summary, _, details = report.partition("\n\n")
+        box = QMessageBox(self)
+        box.setWindowTitle("数据概况")
+        box.setText(summary)
+        box.setDetailedText(details)
+        box.exec_()
+    
+    def validation_failed(self, file_path, error):
+        """文件无法读取时取消选择"""
+        if not self.is_current_validation(file_path):
+            return
+        self.selected_file = None
+        self.file_label.setText("")
+        self.upload_btn.setEnabled(False)
+        QMessageBox.critical(self, "错误", f"无法读取文件：{error}")
+    
+    def upload_file(self):
+        """在后台线程中上传文件到远程服务器"""
+        if not self.selected_file and not self.batch_items:
             QMessageBox.warning(self, "警告", "请先选择要上传的文件")
             return
-            
-        try:
-            # 获取SFTP客户端
-            sftp = self.ssh_manager.ssh_client.open_sftp()
-            
-            # 获取文件名（不含后缀）
-            file_name = os.path.splitext(os.path.basename(self.selected_file))[0]
-            
-            # 构建远程路径
-            remote_dir_path = f"{self.remote_dir}/{file_name}"
-            remote_file_path = f"{remote_dir_path}/{os.path.basename(self.selected_file)}"
-            
-            # 创建远程目录结构并验证
-            try:
-                # 创建主目录
-                try:
-                    sftp.mkdir('/home/HwHiAiUser/Desktop/2t')
-                except:
-                    pass
-                
-                # 确保任务类型目录存在
-                try:
-                    sftp.mkdir(self.remote_dir)
-                except:
-                    pass
-                
-                # 创建文件专属目录
-                try:
-                    sftp.mkdir(remote_dir_path)
-                except:
-                    pass
-                
-                # 验证目录是否存在
-                try:
-                    sftp.stat(remote_dir_path)
-                except IOError:
-                    raise Exception(f"无法创建或访问目录: {remote_dir_path}")
-                
-            except Exception as e:
-                raise Exception(f"目录创建失败: {str(e)}")
-            
-            # 更新状态
-            self.status_label.setText("正在上传...")
-            self.status_label.setStyleSheet("color: white; font-size: 24px;")
-            QApplication.processEvents()
-            
-            # 上传文件
-            try:
-                self.status_label.setText(f"正在上传: {os.path.basename(self.selected_file)}...")
-                QApplication.processEvents()
-                sftp.put(self.selected_file, remote_file_path)
-                
-                # 验证文件是否成功上传
-                try:
-                    stats = sftp.stat(remote_file_path)
-                    local_size = os.path.getsize(self.selected_file)
-                    if stats.st_size != local_size:
-                        raise Exception(f"文件大小不匹配: {os.path.basename(self.selected_file)}")
-                except IOError:
-                    raise Exception(f"文件上传后无法访问: {os.path.basename(self.selected_file)}")
-                
-            except Exception as e:
-                raise Exception(f"文件上传失败: {str(e)}")
-            
-            # 列出目录内容进行确认
-            try:
-                dir_content = sftp.listdir(remote_dir_path)
-                if not dir_content:
-                    raise Exception("目录为空，上传可能失败")
-                print(f"远程目录内容: {dir_content}")  # 调试信息
-            except Exception as e:
-                raise Exception(f"无法验证目录内容: {str(e)}")
-            
-            # 关闭SFTP连接
-            sftp.close()
-            
-            # 更新状态
-            self.status_label.setText("上传成功!")
-            self.status_label.setStyleSheet("color: #00ff00; font-size: 24px;")
-            
-            # 禁用所有按钮
+        
+        # 在界面线程中读取上传选项，后台线程不访问控件
+        output_format = self.convert_combo.currentText()
+        options = {
+            'delta': self.delta_checkbox.isChecked(),
+            'dedup': self.dedup_checkbox.isChecked(),
+            'compress': self.compress_checkbox.isChecked(),
+            'algorithm': self.compress_combo.currentText(),
+            'level': self.compress_level_spin.value(),
+            'output_format': output_format if output_format != "不转换" else None,
+            'label_column': self.label_combo.currentText(),
+            'downcast': self.downcast_checkbox.isChecked(),
+            'task_type': self.task_type,
+        }
+        
+        # 抽样时利用数据概况中的行数和类别分布做精确分层
+        if self.sample_checkbox.isChecked() and not self.batch_items:
+            options['sample_percent'] = self.sample_spin.value()
+            if self.profile is not None:
+                options['total_rows'] = self.profile['rows']
+                if self.task_type in ["二分类", "多分类"]:
+                    label_profile = self.profile['columns'].get(options['label_column'])
+                    options['class_counts'] = label_profile['values'] if label_profile else None
+        
+        # 数据概况已就绪时直接检查标签列是否符合任务类型
+        if not self.batch_items and not self.check_label(options):
+            return
+        
+        # 更新状态
+        self.status_label.setText("正在上传...")
+        self.status_label.setStyleSheet("color: white; font-size: 24px;")
+        self.set_uploading(True)
+        
+        if self.batch_items:
+            self.upload_worker = BatchUploadWorker(self.batch_items, self.remote_dir, options)
+            self.upload_worker.batch_finished_signal.connect(self.batch_upload_finished)
+        else:
+            self.upload_worker = UploadWorker(self.selected_file, self.remote_dir, options)
+        self.upload_worker.progress_signal.connect(self.update_progress)
+        self.upload_worker.status_signal.connect(self.status_label.setText)
+        self.upload_worker.finished_signal.connect(self.upload_finished)
+        self.upload_worker.error_signal.connect(self.upload_failed)
+        self.upload_worker.cancelled_signal.connect(self.upload_cancelled)
+        self.upload_worker.start()
+    
+    def check_label(self, options):
+        """用数据概况检查标签列，有错误时拒绝上传，有警告时询问是否继续"""
+        if not self.task_type or not options['label_column'] or self.profile is None:
+            return True
+        stats = LabelValidator.stats_from_profile(self.profile, options['label_column'])
+        if stats is None:
+            return True
+        errors, warnings_ = LabelValidator(self.selected_file, options['label_column'], self.task_type).check(stats)
+        options['label_checked'] = True
+        if errors:
+            QMessageBox.critical(self, "标签检查未通过",
+                                 f"数据不符合{self.task_type}任务：\n" + "\n".join(errors))
+            return False
+        if warnings_:
+            reply = QMessageBox.question(self, "标签检查警告",
+                                         "\n".join(warnings_) + "\n\n是否仍然上传？")
+            return reply == QMessageBox.Yes
+        return True
+    
+    def upload_finished(self, remote_dir_path, file_names, notes):
+        """上传完成后更新状态并通知父窗口"""
+        self.set_uploading(False)
+        
+        # 更新状态
+        self.status_label.setText("上传成功!")
+        self.status_label.setStyleSheet("color: #00ff00; font-size: 24px;")
+        
+        # 记录本次数据集及各文件的sha256，训练时随运行记录保存
+        records = self.upload_worker.records
+        # 多个文件分别上传到各自目录时没有单一的数据集目录，不能在开发板上执行脚本
+        global_state = GlobalState.get_instance()
+        global_state.dataset_dir = remote_dir_path if remote_dir_path != self.remote_dir else None
+        global_state.dataset_files = records
+        
+        # 禁用所有按钮
+        self.disable_inputs()
+        
+        # 通知父窗口上传完成
+        main_page = None
+        parent = self.parent()
+        while parent is not None:
+            if hasattr(parent, 'step_completed'):
+                main_page = parent
+                break
+            parent = parent.parent()
+        
+        if main_page:
+            main_page.step_completed[2] = True
+            main_page.set_button_enabled(main_page.buttons[3], True)
+            success_msg = (f'文件已上传至 {remote_dir_path}\n'
+                         f'上传文件: {", ".join(file_names)}')
+            for note in notes:
+                success_msg += f'\n{note}'
+            if global_state.dataset_dir is None:
+                success_msg += '\n文件分布在多个数据集目录中，训练脚本只能在本机执行'
+            if records:
+                success_msg += '\n已校验SHA256:'
+                for record in records[:10]:
+                    success_msg += f'\n  {record["name"]}: {record["sha256"][:16]}…'
+            QMessageBox.information(self, "上传成功", success_msg)
+        else:
+            QMessageBox.warning(self, "警告", "无法更新任务状态。")
+    
+    def batch_upload_finished(self, remote_dir, uploaded, notes, failures):
+        """全部成功时与单文件上传相同；有失败时列出原因，保留失败的文件以便重试"""
+        if not failures:
+            self.batch_items = None
+            self.upload_finished(remote_dir, uploaded, notes)
+            return
+        self.set_uploading(False)
+        failed = set(local for local, _ in failures)
+        self.batch_items = [item for item in self.upload_worker.items if item[0] in failed]
+        self.status_label.setText(f"上传完成 {len(uploaded)} 个，失败 {len(failures)} 个")
+        self.status_label.setStyleSheet("color: #ff0000; font-size: 24px;")
+        self.file_label.setText(f"待重试 {len(self.batch_items)} 个文件")
+        summary = "\n".join(f"{os.path.basename(local)}: {error}" for local, error in failures)
+        QMessageBox.warning(self, "部分文件上传失败",
+                            f"成功 {len(uploaded)} 个，失败 {len(failures)} 个：\n{summary}\n\n"
+                            f"点击“上传文件”重试失败的文件")
+        self.enable_inputs()
+    
+    def upload_failed(self, error):
+        """上传失败时提示并恢复输入"""
+        self.set_uploading(False)
+        self.status_label.setText("上传失败")
+        self.status_label.setStyleSheet("color: #ff0000; font-size: 24px;")
+        error_msg = f"文件上传失败：{error}\n请检查：\n1. 远程目录权限\n2. 磁盘空间\n3. 网络连接"
+        QMessageBox.critical(self, "错误", error_msg)
+        self.enable_inputs()
+    
+    def upload_cancelled(self):
+        """取消后目标文件保持原样；分块上传留下的 .part 文件在再次上传时从已确认的数据块继续"""
+        self.set_uploading(False)
+        if self.upload_worker is not None and self.upload_worker.resumable:
+            self.status_label.setText("上传已取消，重新上传将从断点继续")
+        else:
+            self.status_label.setText("上传已取消")
+        self.status_label.setStyleSheet("color: white; font-size: 24px;")
+        self.enable_inputs()
+    
+    def toggle_pause(self):
+        """暂停或继续上传"""
+        if self.upload_worker is None:
+            return
+        if self.upload_worker.control.paused:
+            self.upload_worker.resume()
+            self.pause_btn.setText("暂停")
+        else:
+            self.upload_worker.pause()
+            self.pause_btn.setText("继续")
+            self.status_label.setText("已暂停")
+    
+    def cancel_upload(self):
+        if self.upload_worker is not None:
+            self.cancel_btn.setEnabled(False)
+            self.pause_btn.setEnabled(False)
+            self.status_label.setText("正在取消...")
+            self.upload_worker.cancel()
+    
+    def set_uploading(self, uploading):
+        """上传期间只保留暂停和取消按钮可用"""
+        if uploading:
             self.disable_inputs()
-            
-            # 通知父窗口上传完成
-            main_page = None
-            parent = self.parent()
-            while parent is not None:
-                if hasattr(parent, 'step_completed'):
-                    main_page = parent
-                    break
-                parent = parent.parent()
-            
-            if main_page:
-                main_page.step_completed[2] = True
-                main_page.set_button_enabled(main_page.buttons[3], True)
-                success_msg = (f'文件已上传至 {remote_file_path}\n'
-                             f'上传文件: {os.path.basename(self.selected_file)}')
-                QMessageBox.information(self, "上传成功", success_msg)
-            else:
-                QMessageBox.warning(self, "警告", "无法更新任务状态。")
-                
-        except Exception as e:
-            self.status_label.setText("上传失败")
-            self.status_label.setStyleSheet("color: #ff0000; font-size: 24px;")
-            error_msg = f"文件上传失败：{str(e)}\n请检查：\n1. 远程目录权限\n2. 磁盘空间\n3. 网络连接"
-            QMessageBox.critical(self, "错误", error_msg)
-            self.enable_inputs()
+            for button in [self.pause_btn, self.cancel_btn]:
+                button.setEnabled(True)
+                button.setStyleSheet(self.get_button_style())
+        self.pause_btn.setText("暂停")
+        self.pause_btn.setVisible(uploading)
+        self.cancel_btn.setVisible(uploading)
+    
+    def update_progress(self, sent, total, rate, eta):
+        """显示上传进度、速率和剩余时间"""
+        if self.upload_worker is not None and self.upload_worker.control.paused:
+            return
+        percent = sent * 100 / total if total else 100
+        self.status_label.setText(f"已上传 {percent:.1f}%  {rate / 1024 / 1024:.2f} MB/s  剩余 {format_eta(eta)}")
     
     def disable_inputs(self):
         """禁用所有输入和上传按钮"""
@@ -291,6 +1020,8 @@ class UploadDataWidget(QWidget):
                     min-width: 150px;
                 }
             """)
+        for child in self.findChildren(QCheckBox) + self.findChildren(QComboBox) + self.findChildren(QSpinBox):
+            child.setEnabled(False)
     
     def enable_inputs(self):
         """启用所有输入和上传按钮"""
@@ -298,9 +1029,18 @@ class UploadDataWidget(QWidget):
             if child != self.upload_btn:
                 child.setEnabled(True)
                 child.setStyleSheet(self.get_button_style())
+        for child in self.findChildren(QCheckBox):
+            if child != self.downcast_checkbox:
+                child.setEnabled(True)
+        self.compress_combo.setEnabled(self.compress_checkbox.isChecked())
+        self.compress_level_spin.setEnabled(self.compress_checkbox.isChecked())
+        self.convert_combo.setEnabled(not self.batch_items)
+        self.sample_checkbox.setEnabled(not self.batch_items)
+        self.sample_spin.setEnabled(self.sample_checkbox.isChecked())
+        self.update_label_combo_state()
         
         # 只有在文件选择后才启用上传按钮
-        if self.selected_file:
+        if self.selected_file or self.batch_items:
             self.upload_btn.setEnabled(True)
             self.upload_btn.setStyleSheet(self.get_button_style())
     
@@ -0,0 +1,479 @@
+import hashlib
+import json
+import os
+import queue
+import shlex
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import ExitStack
+from app_paths import get_app_path
+from ssh_manager import iter_channel
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 单个SFTP写请求的最大长度
+SFTP_REQUEST_SIZE = 32768
+
+
+class TransferProgress:
+    """统计已传输字节数，计算滑动窗口内的速率和剩余时间
+
+    续传时跳过的字节计入进度，但不参与速率计算。
+    """
+    def __init__(self, total, window=5.0):
+        self.total = total
+        self.sent = 0
+        self.skipped = 0
+        self.window = window
+        self.start_time = time.monotonic()
+        self._samples = deque([(self.start_time, 0)])
+        self._lock = threading.Lock()
+
+    def add(self, size):
+        with self._lock:
+            self.sent += size
+
+    def skip(self, size):
+        with self._lock:
+            self.sent += size
+            self.skipped += size
+
+    def snapshot(self):
+        """返回(已传输, 总量, 速率B/s, 剩余秒数)"""
+        now = time.monotonic()
+        with self._lock:
+            sent = self.sent
+            transferred = sent - self.skipped
+            self._samples.append((now, transferred))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            first_time, first_transferred = self._samples[0]
+        elapsed = now - first_time
+        rate = (transferred - first_transferred) / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - sent) / rate if rate > 0 else -1.0
+        return sent, self.total, rate, eta
+
+
+class TransferControl:
+    """上传的暂停、继续和取消控制，各传输循环在处理每个数据块前调用 checkpoint()
+
+    传入 parent 时同时受上级控制，可单独取消一个文件而不影响整个上传。
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = False
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._running.set()
+
+    def checkpoint(self):
+        """暂停时阻塞，已取消时抛出异常"""
+        if self.parent:
+            self.parent.checkpoint()
+        self._running.wait()
+        if self._cancelled:
+            raise Exception("上传已取消")
+
+
+class UploadManifest:
+    """断点续传清单，记录 (本地文件, 远程路径) 已确认写入的数据块偏移及其摘要"""
+    SAVE_INTERVAL = 1.0
+
+    def __init__(self, local_path, remote_path, chunk_size):
+        self.local_path = os.path.abspath(local_path)
+        self.remote_path = remote_path
+        self.chunk_size = chunk_size
+        stat = os.stat(self.local_path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        key = hashlib.sha1(f"{self.local_path}|{remote_path}".encode('utf-8')).hexdigest()
+        self.path = get_app_path("upload_manifests", f"{key}.json")
+        self.chunks = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # 本地文件或分块大小变化后，旧清单作废
+        if (data.get("size") == self.size and data.get("mtime") == self.mtime
+                and data.get("chunk_size") == self.chunk_size):
+            self.chunks = {int(offset): digest for offset, digest in data.get("chunks", {}).items()}
+
+    def mark_done(self, offset, digest):
+        with self._lock:
+            self.chunks[offset] = digest
+            due = time.monotonic() - self._last_save >= self.SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def discard(self, offsets):
+        with self._lock:
+            for offset in offsets:
+                self.chunks.pop(offset, None)
+
+    def save(self):
+        with self._lock:
+            data = {
+                "local_path": self.local_path,
+                "remote_path": self.remote_path,
+                "size": self.size,
+                "mtime": self.mtime,
+                "chunk_size": self.chunk_size,
+                "chunks": {str(offset): digest for offset, digest in self.chunks.items()},
+            }
+            self._last_save = time.monotonic()
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(self.path + ".tmp", self.path)
+
+    def remove(self):
+        """上传完成后删除清单"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ChunkedUploader:
+    """分块、流水线化的并行SFTP上传引擎
+
+    文件按顺序切分为数据块，由多个SFTP会话并行写入远程 .part 文件的对应偏移；
+    每个会话内部的写请求以流水线方式发送，不逐个等待确认。
+    整体sha256校验通过后才重命名为目标文件，中途取消或失败时目标文件保持原样。
+    """
+    def __init__(self, ssh_manager, chunk_size=4 * 1024 * 1024, sessions=3, progress_interval=0.5):
+        self.ssh_manager = ssh_manager
+        self.chunk_size = chunk_size
+        self.sessions = sessions
+        self.progress_interval = progress_interval
+
+    def has_resume_point(self, local_path, remote_path):
+        """本地清单中是否记录了该目标已写入的数据块"""
+        return bool(UploadManifest(local_path, f"{remote_path}.part", self.chunk_size).chunks)
+
+    def upload(self, local_path, remote_path, progress_callback=None, resume=True, control=None):
+        """上传文件并校验整体sha256，返回本地文件的sha256
+
+        progress_callback(已传输, 总量, 速率B/s, 剩余秒数) 在调用线程中执行；
+        resume=True 时根据本地清单跳过远程已存在且摘要一致的数据块；
+        control 为 TransferControl，取消后保留清单，下次可从已确认的数据块继续。
+        """
+        total = os.path.getsize(local_path)
+        chunk_count = max(1, (total + self.chunk_size - 1) // self.chunk_size)
+        session_count = max(1, min(self.sessions, chunk_count))
+        progress = TransferProgress(total)
+        # 数据写入临时文件，清单和续传校验都针对该文件
+        temp_path = f"{remote_path}.part"
+        manifest = UploadManifest(local_path, temp_path, self.chunk_size)
+        completed = self._verify_remote_chunks(manifest, total) if resume else {}
+        if not completed:
+            manifest.discard(list(manifest.chunks))
+        self.skipped_bytes = 0
+        # 有界队列限制同时驻留内存的数据块数量
+        chunks = queue.Queue(maxsize=session_count * 2)
+        abort = threading.Event()
+        errors = []
+        # 读取线程顺序读取整个文件，同时计算整体摘要，文件只读一遍
+        file_digest = hashlib.sha256()
+
+        with ExitStack() as stack:
+            sftp_sessions = [stack.enter_context(self.ssh_manager.sftp_session())
+                             for _ in range(session_count)]
+            # 预先创建临时文件，各会话再按偏移写入；续传时保留已有内容。
+            # 重新上传前先删除旧的临时文件，已有的目标文件在校验通过前不受影响
+            if not completed:
+                try:
+                    sftp_sessions[0].remove(temp_path)
+                except IOError:
+                    pass
+                with sftp_sessions[0].open(temp_path, 'wb') as f:
+                    f.truncate(total)
+
+            def read_chunks():
+                try:
+                    with open(local_path, 'rb') as f:
+                        offset = 0
+                        while not abort.is_set():
+                            if control:
+                                control.checkpoint()
+                            data = f.read(self.chunk_size)
+                            if not data:
+                                break
+                            file_digest.update(data)
+                            digest = hashlib.sha256(data).hexdigest()
+                            if completed.get(offset) == digest:
+                                progress.skip(len(data))
+                            else:
+                                self._put(chunks, (offset, data, digest), abort)
+                            offset += len(data)
+                except Exception as e:
+                    errors.append(e)
+                    abort.set()
+                finally:
+                    for _ in sftp_sessions:
+                        self._put(chunks, None, abort)
+
+            def write_chunks(sftp):
+                try:
+                    while True:
+                        item = self._get(chunks, abort)
+                        if item is None:
+                            break
+                        offset, data, digest = item
+                        if control:
+                            control.checkpoint()
+                        self._write_chunk(sftp, temp_path, offset, data, progress)
+                        manifest.mark_done(offset, digest)
+                except Exception as e:
+                    errors.append(e)
+                    abort.set()
+
+            threads = [threading.Thread(target=read_chunks, name="upload-reader", daemon=True)]
+            threads += [threading.Thread(target=write_chunks, args=(sftp,), name=f"upload-writer-{i}",
+                                         daemon=True)
+                        for i, sftp in enumerate(sftp_sessions)]
+            for thread in threads:
+                thread.start()
+            while True:
+                alive = [thread for thread in threads if thread.is_alive()]
+                if not alive:
+                    break
+                alive[0].join(self.progress_interval)
+                if progress_callback:
+                    progress_callback(*progress.snapshot())
+
+        self.skipped_bytes = progress.skipped
+        if errors:
+            # 保留清单，下次上传从已确认的数据块继续
+            manifest.save()
+            raise errors[0]
+        local_digest = file_digest.hexdigest()
+        remote_digest = self._remote_file_digest(temp_path)
+        if remote_digest != local_digest:
+            # 远程内容与本地不一致，清单中的块摘要也不再可信
+            manifest.remove()
+            self.ssh_manager.execute_command(f"rm -f {shlex.quote(temp_path)}")
+            raise Exception(f"上传后SHA256校验失败: 本地 {local_digest[:16]}，远程 {remote_digest[:16] or '无'}")
+        # 重命名替换目标路径上的目录项，不会写入与存储对象共享的硬链接
+        _, error, exit_status = self.ssh_manager.submit_command(
+            f"mv -f {shlex.quote(temp_path)} {shlex.quote(remote_path)}").result()
+        if exit_status != 0:
+            raise Exception(f"无法移动上传的文件: {error.strip()}")
+        manifest.remove()
+        if progress_callback:
+            progress_callback(*progress.snapshot())
+        return local_digest
+
+    def _verify_remote_chunks(self, manifest, total):
+        """核对清单中的数据块在远程文件中是否仍然完整，返回 {偏移: 摘要}"""
+        if not manifest.chunks:
+            return {}
+        try:
+            with self.ssh_manager.sftp_session() as sftp:
+                remote_size = sftp.stat(manifest.remote_path).st_size
+        except IOError:
+            return {}
+        if remote_size != total:
+            return {}
+        offsets = sorted(manifest.chunks)
+        ranges = [(offset, min(self.chunk_size, total - offset)) for offset in offsets]
+        try:
+            digests = self._remote_chunk_digests(manifest.remote_path, ranges)
+        except Exception as e:
+            print(f"无法校验远程数据块，重新上传: {e}")
+            return {}
+        verified = {}
+        for offset, digest in zip(offsets, digests):
+            if digest == manifest.chunks[offset]:
+                verified[offset] = digest
+        manifest.discard([offset for offset in offsets if offset not in verified])
+        return verified
+
+    def _remote_file_digest(self, remote_path):
+        """计算远程文件的sha256，优先使用常驻代理，否则在一个通道上执行sha256sum"""
+        agent = self.ssh_manager.agent
+        if agent is not None:
+            return agent.hash_file(remote_path)
+        output, _, _ = self.ssh_manager.submit_command(f"sha256sum {shlex.quote(remote_path)}").result()
+        return output.split()[0] if output.strip() else ""
+
+    def _remote_chunk_digests(self, remote_path, ranges):
+        """计算远程文件各区间的sha256，优先使用常驻代理"""
+        agent = self.ssh_manager.agent
+        if agent is not None:
+            return agent.hash_file(remote_path, ranges=ranges)
+        futures = []
+        for offset, length in ranges:
+            command = (f"dd if={shlex.quote(remote_path)} bs=1M skip={offset} count={length} "
+                       f"iflag=skip_bytes,count_bytes 2>/dev/null | sha256sum")
+            futures.append(self.ssh_manager.submit_command(command))
+        return [future.result()[0].split()[0] if future.result()[0] else "" for future in futures]
+
+    @staticmethod
+    def _put(chunks, item, abort):
+        """放入队列，中止时不再阻塞"""
+        while True:
+            try:
+                chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if abort.is_set():
+                    return
+
+    @staticmethod
+    def _get(chunks, abort):
+        """从队列取数据块，中止时返回None"""
+        while not abort.is_set():
+            try:
+                return chunks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    @staticmethod
+    def _write_chunk(sftp, remote_path, offset, data, progress):
+        """在远程文件的指定偏移写入一个数据块，关闭句柄时等待全部写请求确认"""
+        with sftp.open(remote_path, 'r+', bufsize=0) as f:
+            f.set_pipelined(True)
+            f.seek(offset)
+            for position in range(0, len(data), SFTP_REQUEST_SIZE):
+                block = data[position:position + SFTP_REQUEST_SIZE]
+                f.write(block)
+                progress.add(len(block))
+
+
+def available_compressions():
+    """本地可用的压缩算法"""
+    return ['gzip', 'zstd'] if zstandard is not None else ['gzip']
+
+
+class CompressedUploader:
+    """边压缩边上传，远程边接收边解压
+
+    本地按块读取并压缩后直接写入命令通道，远程由 gzip/zstd 解压到目标文件，
+    两端都不暂存完整数据；完成后比较解压后的长度和sha256。
+    """
+    READ_SIZE = 1024 * 1024
+    DECOMPRESS_COMMANDS = {'gzip': 'gzip -dc', 'zstd': 'zstd -dcq'}
+
+    def __init__(self, ssh_manager, algorithm='gzip', level=6, progress_interval=0.5):
+        self.ssh_manager = ssh_manager
+        self.algorithm = algorithm
+        self.level = level
+        self.progress_interval = progress_interval
+        self.compressed_bytes = 0
+
+    def _resolve_algorithm(self):
+        """zstd在本地或远程不可用时回退到gzip"""
+        if self.algorithm != 'zstd':
+            return 'gzip'
+        if zstandard is None:
+            print("本地未安装zstandard，使用gzip压缩")
+            return 'gzip'
+        output, _ = self.ssh_manager.execute_command("command -v zstd")
+        if not output.strip():
+            print("远程未安装zstd，使用gzip压缩")
+            return 'gzip'
+        return 'zstd'
+
+    def _make_compressor(self, algorithm):
+        if algorithm == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compressobj()
+        # wbits=31 生成gzip格式；zstd回退到gzip时级别可能超出gzip的1-9
+        return zlib.compressobj(max(1, min(self.level, 9)), zlib.DEFLATED, 31)
+
+    def upload(self, local_path, remote_path, progress_callback=None, control=None):
+        """压缩上传文件并校验，返回原始数据的sha256"""
+        algorithm = self._resolve_algorithm()
+        total = os.path.getsize(local_path)
+        progress = TransferProgress(total)
+        temp_path = f"{remote_path}.part"
+        quoted = shlex.quote(temp_path)
+        command = (f"{self.DECOMPRESS_COMMANDS[algorithm]} > {quoted} && "
+                   f"wc -c < {quoted} && sha256sum {quoted}")
+        compressor = self._make_compressor(algorithm)
+        digest = hashlib.sha256()
+        self.compressed_bytes = 0
+
+        pool = self.ssh_manager.channel_pool
+        channel = pool.open_channel()
+        try:
+            channel.exec_command(command)
+            last_report = 0.0
+            with open(local_path, 'rb') as f:
+                while True:
+                    if control:
+                        control.checkpoint()
+                    block = f.read(self.READ_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    self._send(channel, compressor.compress(block))
+                    progress.add(len(block))
+                    now = time.monotonic()
+                    if progress_callback and now - last_report >= self.progress_interval:
+                        last_report = now
+                        progress_callback(*progress.snapshot())
+            self._send(channel, compressor.flush())
+            channel.shutdown_write()
+            stdout, stderr = [], []
+            for name, data in iter_channel(channel):
+                (stdout if name == 'stdout' else stderr).append(data)
+            exit_status = channel.recv_exit_status()
+        except Exception:
+            # 中途取消或出错时远程只留下未完成的 .part 文件，目标文件不受影响
+            pool.release_channel(channel)
+            try:
+                self.ssh_manager.execute_command(f"rm -f {quoted}")
+            except Exception as e:
+                print(f"清理临时文件失败: {e}")
+            raise
+        pool.release_channel(channel)
+
+        output = b''.join(stdout).decode(errors='replace').split()
+        if exit_status != 0 or len(output) < 2:
+            self.ssh_manager.execute_command(f"rm -f {quoted}")
+            raise Exception(f"远程解压失败: {b''.join(stderr).decode(errors='replace').strip()}")
+        remote_size, remote_digest = int(output[0]), output[1]
+        if remote_size != total or remote_digest != digest.hexdigest():
+            self.ssh_manager.execute_command(f"rm -f {quoted}")
+            raise Exception(f"解压后校验失败: 长度 {remote_size}/{total}")
+        _, error, exit_status = self.ssh_manager.submit_command(
+            f"mv -f {quoted} {shlex.quote(remote_path)}").result()
+        if exit_status != 0:
+            raise Exception(f"无法移动上传的文件: {error.strip()}")
+        if progress_callback:
+            progress_callback(*progress.snapshot())
+        return digest.hexdigest()
+
+    def _send(self, channel, data):
+        if data:
+            channel.sendall(data)
+            self.compressed_bytes += len(data)